@@ -0,0 +1,6 @@
+"""
+Micro-benchmarks for Mimic's hot paths.
+
+Each module in this package is runnable with ``python -m
+benchmarks.<module>`` from the root of the repository.
+"""
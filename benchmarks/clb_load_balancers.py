@@ -0,0 +1,59 @@
+"""
+List every load balancer in a :class:`mimic.model.clb_objects.RegionalCLBCollection`
+holding thousands of them, as an LB-inventory client polling
+``GET /loadbalancers`` does, while some of them are still building, and list
+one page of them.
+
+To compare with the listing as it was when every read polled each load
+balancer for due status transitions, run this against a checkout from
+before that changed; only the full listing can be timed there.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import json
+import sys
+
+from twisted.internet.task import Clock
+
+from mimic.model.clb_objects import RegionalCLBCollection
+
+from benchmarks.harness import rate
+
+
+def populated_collection(count, building_every=10):
+    """
+    Build a collection holding ``count`` load balancers, one in every
+    ``building_every`` of them still building.
+    """
+    clock = Clock()
+    collection = RegionalCLBCollection(clock)
+    for i in range(count):
+        metadata = ([{"key": "lb_building", "value": 3600}]
+                    if i % building_every == 0 else [])
+        collection.add_load_balancer(
+            {"name": "lb-{0}".format(i), "protocol": "HTTP",
+             "metadata": metadata}, i)
+    return collection
+
+
+def main(count=5000, listings=50):
+    """
+    List a collection of ``count`` load balancers ``listings`` times, and
+    list one page of its active load balancers as many times.
+    """
+    collection = populated_collection(count)
+
+    def listing():
+        json.dumps(collection.list_load_balancers()[0])
+
+    def paged_listing():
+        json.dumps(collection.list_load_balancers(
+            marker=count // 2, limit=100, status="ACTIVE")[0])
+
+    rate("{0} LBs, listing".format(count), listings, listing)
+    rate("{0} LBs, page of 100 active".format(count), listings, paged_listing)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,54 @@
+"""
+Schedule many delayed calls and advance through them, on
+:class:`twisted.internet.task.Clock` and on :class:`mimic.clock.HeapClock`.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import random
+import sys
+import time
+
+from twisted.internet.task import Clock
+
+from mimic.clock import HeapClock
+
+
+def schedule_and_advance(clock, count):
+    """
+    Schedule ``count`` calls at random times over the next day, cancel every
+    tenth one, then advance through the day a minute at a time.
+
+    :return: seconds taken to schedule, and to advance
+    """
+    rng = random.Random(0)
+    fired = []
+    start = time.time()
+    calls = [clock.callLater(rng.uniform(0, 86400), fired.append, i)
+             for i in range(count)]
+    for call in calls[::10]:
+        call.cancel()
+    scheduled = time.time()
+    for _ in range(24 * 60):
+        clock.advance(60)
+    advanced = time.time()
+    assert len(fired) == count - len(calls[::10])
+    return scheduled - start, advanced - scheduled
+
+
+def main(heap_count=100000, clock_count=5000):
+    """
+    Time :class:`HeapClock` with ``heap_count`` calls, and
+    :class:`twisted.internet.task.Clock` with ``clock_count`` calls (it is too
+    slow to wait for at the larger number).
+    """
+    for label, factory, count in [("Clock", Clock, clock_count),
+                                  ("HeapClock", HeapClock, clock_count),
+                                  ("HeapClock", HeapClock, heap_count)]:
+        schedule, advance = schedule_and_advance(factory(), count)
+        print("{0} with {1} calls: schedule {2:.3f}s, advance {3:.3f}s".format(
+            label, count, schedule, advance))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
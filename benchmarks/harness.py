@@ -0,0 +1,60 @@
+"""
+Shared helpers for driving Mimic's resources in-process, without a network.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import time
+
+from twisted.internet.address import IPv4Address
+from twisted.internet.error import ConnectionDone
+from twisted.python.failure import Failure
+from twisted.test.proto_helpers import StringTransport
+
+from mimic.resource import get_site
+
+
+def serve(site, method, path, body=b"", host=b"localhost:8900"):
+    """
+    Feed one raw HTTP/1.1 request to ``site`` and return the raw response
+    bytes.  Only the server side of the exchange is exercised, so the timing
+    reflects Mimic's cost rather than that of an HTTP client.
+    """
+    request_bytes = b"".join([
+        method, b" ", path, b" HTTP/1.1\r\n",
+        b"Host: ", host, b"\r\n",
+        b"Content-Length: ", str(len(body)).encode("ascii"), b"\r\n",
+        b"Connection: close\r\n\r\n",
+        body])
+    channel = site.buildProtocol(None)
+    transport = StringTransport()
+    transport.hostAddr = IPv4Address('TCP', '127.0.0.1', 8900)
+    channel.makeConnection(transport)
+    channel.dataReceived(request_bytes)
+    channel.connectionLost(Failure(ConnectionDone()))
+    return transport.io.getvalue()
+
+
+def site_for(root_resource):
+    """
+    Build a non-logging :class:`twisted.web.server.Site` for a root resource.
+    """
+    return get_site(root_resource)
+
+
+def rate(label, count, func):
+    """
+    Call ``func`` ``count`` times and print how many calls per second that
+    works out to.
+
+    :return: calls per second
+    :rtype: float
+    """
+    start = time.time()
+    for _ in range(count):
+        func()
+    elapsed = time.time() - start
+    per_second = count / elapsed
+    print("{0}: {1} calls in {2:.3f}s ({3:,.0f}/s)".format(
+        label, count, elapsed, per_second))
+    return per_second
@@ -0,0 +1,118 @@
+"""
+Look servers up by ID in a :class:`mimic.model.nova_objects.RegionalServerCollection`
+holding many servers, as every Nova GET, DELETE, ips, metadata and action
+request does, page through the whole collection with ``marker`` and
+``limit``, and repeatedly list it in detail, as a polling client does.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import json
+import random
+import sys
+import time
+from itertools import cycle
+
+from twisted.internet.task import Clock
+from twisted.web.test.requesthelper import DummyRequest
+
+from mimic.model.behaviors import BehaviorRegistryCollection
+from mimic.model.nova_objects import (
+    IPv4Address, RegionalServerCollection, Server)
+
+from benchmarks.harness import rate
+
+
+def populated_collection(count):
+    """
+    Build a collection holding ``count`` servers.  The servers are built
+    directly rather than through a creation request, so that populating the
+    collection does not dominate the run.
+    """
+    clock = Clock()
+    collection = RegionalServerCollection(
+        tenant_id="1234", region_name="ORD", clock=clock,
+        behavior_registry_collection=BehaviorRegistryCollection(clock=clock))
+    for i in range(count):
+        collection.add_server(Server(
+            admin_password="password",
+            collection=collection,
+            creation_request_json={},
+            creation_time=0,
+            disk_config="AUTO",
+            flavor_ref="2",
+            image_ref="image",
+            key_name=None,
+            metadata={},
+            private_ips=[IPv4Address(address="10.{0}.{1}.{2}".format(
+                i >> 16, (i >> 8) & 0xff, i & 0xff))],
+            public_ips=[],
+            server_id="server-{0}".format(i),
+            server_name="server-{0}".format(i),
+            status="ACTIVE",
+            update_time=0))
+    return collection
+
+
+def linear_server_by_id(collection, server_id):
+    """
+    The lookup as it was before the collection kept an index.
+    """
+    for server in collection.servers:
+        if server.server_id == server_id and server.status != u"DELETED":
+            return server
+
+
+def absolutize_url(path):
+    """
+    Make a URL absolute, for rendering server JSON.
+    """
+    return "http://localhost:8900/mimicking/NovaApi/ORD/" + path
+
+
+def paginate(collection, limit):
+    """
+    List every server in ``collection``, ``limit`` at a time.
+
+    :return: the number of pages
+    """
+    pages = 0
+    marker = None
+    while True:
+        body = json.loads(collection.request_list(
+            DummyRequest([b""]), False, absolutize_url,
+            limit=limit, marker=marker))
+        pages += 1
+        if "servers_links" not in body:
+            return pages
+        marker = body["servers"][-1]["id"]
+
+
+def main(lookups=10000, linear_lookups=200, page_size=100):
+    """
+    Look up ``lookups`` random servers by ID in collections of 10k and 100k
+    servers, and ``linear_lookups`` by scanning the server list.  Then list
+    both collections in full, ``page_size`` servers at a time.
+    """
+    rng = random.Random(0)
+    for size in [10000, 100000]:
+        collection = populated_collection(size)
+        ids = cycle(["server-{0}".format(rng.randrange(size))
+                     for _ in range(64)])
+        rate("{0} servers, indexed".format(size), lookups,
+             lambda: collection.server_by_id(next(ids)))
+        rate("{0} servers, linear scan".format(size), linear_lookups,
+             lambda: linear_server_by_id(collection, next(ids)))
+        start = time.time()
+        pages = paginate(collection, page_size)
+        print("{0} servers, listed in {1} pages: {2:.3f}s".format(
+            size, pages, time.time() - start))
+        for label in ["first", "repeated"]:
+            start = time.time()
+            collection.request_list(DummyRequest([b""]), True, absolutize_url)
+            print("{0} servers, {1} detailed listing: {2:.3f}s".format(
+                size, label, time.time() - start))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,43 @@
+"""
+Requests per second through ``/mimicking/<service>/<region>/...``, with and
+without :class:`mimic.core.MimicCore`'s per-region resource cache.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import sys
+
+from twisted.internet.task import Clock
+
+from mimic.core import MimicCore
+from mimic.resource import MimicRoot
+
+from benchmarks.harness import rate, serve, site_for
+
+
+def main(count=5000):
+    """
+    Issue ``count`` Nova ``GET /servers`` requests with a warm resource cache,
+    then again with the cache cleared before every request (which is what
+    every request used to cost).
+    """
+    core = MimicCore.fromPlugins(Clock())
+    site = site_for(MimicRoot(core, Clock()).app.resource())
+    nova_id = [service_id for (service_id, api) in core._uuid_to_api.items()
+               if type(api).__name__ == "NovaApi"][0]
+    path = "/mimicking/{0}/ORD/v2/1234/servers".format(nova_id).encode("ascii")
+
+    def cached():
+        serve(site, b"GET", path)
+
+    def uncached():
+        core._resource_cache.clear()
+        serve(site, b"GET", path)
+
+    before = rate("uncached", count, uncached)
+    after = rate("cached", count, cached)
+    print("speedup: {0:.2f}x".format(after / before))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
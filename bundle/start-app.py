@@ -17,11 +17,11 @@ from Foundation import (
     TRUE
 )
 
+from mimic.clock import HeapClock
 from mimic.core import MimicCore
 from mimic.resource import MimicRoot
 
 from twisted.internet.endpoints import serverFromString
-from twisted.internet.task import Clock
 from twisted.web.server import Site
 from twisted.python import log
 
@@ -101,7 +101,7 @@ def startMimic():
     Setup the mimic application using steps similar to
     :obj:`mimic.tap.makeService' and start listening for requests.
     """
-    clock = Clock()
+    clock = HeapClock()
     core = MimicCore.fromPlugins(clock)
     root = MimicRoot(core, clock)
     site = Site(root.app.resource())
@@ -80,23 +80,6 @@ def get_token(tenant_id,
     :return: a JSON-serializable dictionary matching the format of the JSON
              response for the identity ``/v2/tokens`` request.
     """
-    def entry_json():
-        for entry in entry_generator(tenant_id):
-            def endpoint_json():
-                for endpoint in entry.endpoints:
-                    yield {
-                        "region": endpoint.region,
-                        "tenantId": endpoint.tenant_id,
-                        "publicURL": endpoint.url_with_prefix(
-                            prefix_for_endpoint(endpoint)
-                        ),
-                    }
-            yield {
-                "name": entry.name,
-                "type": entry.type,
-                "endpoints": list(endpoint_json())
-            }
-
     response = {
         "access": {
             "token": {
@@ -117,10 +100,41 @@ def get_token(tenant_id,
     }
 
     if entry_generator is not None and prefix_for_endpoint is not None:
-        response["access"]["serviceCatalog"] = list(entry_json())
+        response["access"]["serviceCatalog"] = get_service_catalog(
+            entry_generator(tenant_id), prefix_for_endpoint)
     return response
 
 
+def get_service_catalog(entries, prefix_for_endpoint):
+    """
+    Canned service catalog, as found in the ``serviceCatalog`` key of the
+    response to an identity ``/v2/tokens`` request.
+
+    :param entries: An iterable of :obj:`mimic.catalog.Entry`.
+    :param prefix_for_endpoint: A callable which takes a
+        :obj:`mimic.catalog.Endpoint` and returns its URI prefix.
+
+    :return: a JSON-serializable list of catalog entries.
+    """
+    def endpoint_json(entry):
+        for endpoint in entry.endpoints:
+            yield {
+                "region": endpoint.region,
+                "tenantId": endpoint.tenant_id,
+                "publicURL": endpoint.url_with_prefix(
+                    prefix_for_endpoint(endpoint)
+                ),
+            }
+    return [
+        {
+            "name": entry.name,
+            "type": entry.type,
+            "endpoints": list(endpoint_json(entry))
+        }
+        for entry in entries
+    ]
+
+
 def get_endpoints(tenant_id, entry_generator, prefix_for_endpoint):
     """
     Canned response for Identity's get endpoints call.  This returns endpoints
@@ -0,0 +1,29 @@
+"""
+Canned responses for MAAS notification types.
+"""
+
+from __future__ import absolute_import, division, unicode_literals
+
+
+def notification_types():
+    """
+    Canned response for the /notification_types call.
+    """
+    return [{'id': 'webhook', 'fields': [{'name': 'url',
+                                          'optional': False,
+                                          'description': 'An HTTP or \
+                                                                      HTTPS URL to POST to'}]},
+            {'id': 'email', 'fields': [{'name': 'address',
+                                        'optional': False,
+                                        'description': 'Email \
+                                                                    address to send notifications to'}]},
+            {'id': 'pagerduty', 'fields': [{'name': 'service_key',
+                                            'optional': False,
+                                            'description': 'The PagerDuty \
+                                                                        service key to use.'}]},
+            {'id': 'sms', 'fields': [{'name': 'phone_number',
+                                      'optional': False,
+                                      'description': 'Phone number to send \
+                                                                  the notification to, \
+                                                                  with leading + and country \
+                                                                  code (E.164 format)'}]}]
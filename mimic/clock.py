@@ -0,0 +1,234 @@
+# -*- test-case-name: mimic.test.test_clock -*-
+
+"""
+Simulated clocks for Mimic's notion of time.
+"""
+
+from __future__ import absolute_import, division, unicode_literals
+
+from heapq import heapify, heappop, heappush
+from itertools import count
+
+from zope.interface import implementer
+
+from twisted.internet.base import DelayedCall
+from twisted.internet.interfaces import IReactorTime
+
+
+@implementer(IReactorTime)
+class HeapClock(object):
+    """
+    A drop-in replacement for :obj:`twisted.internet.task.Clock` which keeps
+    its pending calls in a binary heap.
+
+    :obj:`twisted.internet.task.Clock` re-sorts its whole list of pending
+    calls every time one is scheduled or rescheduled, which gets slow with
+    tens of thousands of pending calls.  Here scheduling, rescheduling and
+    firing a call are all ``O(log n)``, and cancelling one is amortized
+    ``O(1)``: cancelled and rescheduled calls leave stale entries in the heap,
+    which are discarded when they reach the top or when they outnumber the
+    live ones.
+
+    As with :obj:`twisted.internet.task.Clock`, time only passes when
+    :obj:`advance` is called, and every call which comes due during an
+    advance sees the final time as the current time.
+
+    :ivar float rightNow: The current time, in seconds.
+    """
+
+    rightNow = 0.0
+
+    def __init__(self):
+        """
+        Create a clock at time 0 with no pending calls.
+        """
+        self._heap = [
+            # heap of (time, sequence number, DelayedCall) entries
+        ]
+        self._sequence_for_call = {
+            # mapping of DelayedCall to the sequence number of its one live
+            # heap entry
+        }
+        self._counter = count()
+
+    def seconds(self):
+        """
+        The current time, as far as this clock is concerned.
+
+        :rtype: ``float``
+        """
+        return self.rightNow
+
+    def _push(self, call):
+        """
+        Add a heap entry for ``call`` at its current time, superseding any
+        previous entry for it.
+        """
+        sequence = next(self._counter)
+        self._sequence_for_call[call] = sequence
+        heappush(self._heap, (call.time, sequence, call))
+        self._compact()
+
+    def _cancelled(self, call):
+        """
+        Forget a cancelled call; its heap entry becomes stale.
+        """
+        del self._sequence_for_call[call]
+        self._compact()
+
+    def _compact(self):
+        """
+        Rebuild the heap without stale entries if they make up more than half
+        of it.
+        """
+        if len(self._heap) > 2 * len(self._sequence_for_call) + 64:
+            self._heap = [entry for entry in self._heap
+                          if self._sequence_for_call.get(entry[2]) == entry[1]]
+            heapify(self._heap)
+
+    def callLater(self, delay, callable, *args, **kw):
+        """
+        Schedule ``callable`` to be called ``delay`` seconds from now.
+
+        :rtype: :obj:`twisted.internet.base.DelayedCall`
+        """
+        call = DelayedCall(self.seconds() + delay, callable, args, kw,
+                           self._cancelled, self._push,
+                           self.seconds)
+        self._push(call)
+        return call
+
+    def getDelayedCalls(self):
+        """
+        All the calls which have been scheduled and have not yet been called
+        or cancelled, in the order they will be called.
+        """
+        live = [(entry[2].getTime(), entry[1], entry[2])
+                for entry in self._heap
+                if self._sequence_for_call.get(entry[2]) == entry[1]]
+        return [entry[2] for entry in sorted(live)]
+
+    def advance(self, amount):
+        """
+        Move time forward by ``amount`` seconds, and run every call which is
+        due by then, in order.
+        """
+        self.rightNow += amount
+        self._run_due_calls()
+
+    def _run_due_calls(self):
+        """
+        Run every call which is due as of :obj:`seconds`, in order.
+        """
+        now = self.seconds()
+        while self._heap and self._heap[0][0] <= now:
+            _, sequence, call = heappop(self._heap)
+            if self._sequence_for_call.get(call) != sequence:
+                continue
+            if call.delayed_time != 0:
+                # Pushing a call back (with ``reset`` or ``delay``) only
+                # records the extra delay; catch up with it now, as the
+                # reactor does.
+                call.activate_delay()
+                self._push(call)
+                continue
+            del self._sequence_for_call[call]
+            call.called = 1
+            call.func(*call.args, **call.kw)
+
+    def pump(self, timings):
+        """
+        Advance by each amount of time in ``timings`` in turn.
+        """
+        for amount in timings:
+            self.advance(amount)
+
+
+class ScaledClock(HeapClock):
+    """
+    A clock which runs faster (or slower) than real time by a constant
+    factor, while still running its calls from the real reactor as they come
+    due.
+
+    This sits between the simulated :class:`HeapClock`, where time only passes
+    when :obj:`advance` is called, and using the reactor itself as the clock.
+    :obj:`advance` still works, and moves this clock's time forward on top of
+    the scaled passage of real time.
+
+    Only a single reactor call is pending at any time, for the earliest of
+    this clock's pending calls.
+    """
+
+    def __init__(self, reactor, scale):
+        """
+        :param reactor: The real clock, usually the reactor, which drives this
+            one.
+        :type reactor: :obj:`twisted.internet.interfaces.IReactorTime`
+        :param float scale: How many seconds pass on this clock for every
+            second that passes on ``reactor``.
+        """
+        super(ScaledClock, self).__init__()
+        self._reactor = reactor
+        self.scale = scale
+        self._real_start = reactor.seconds()
+        self._offset = 0.0
+        self._wakeup = None
+
+    def seconds(self):
+        """
+        The current time: the real time elapsed since this clock was created,
+        multiplied by the scale, plus any time explicitly advanced.
+
+        :rtype: ``float``
+        """
+        return ((self._reactor.seconds() - self._real_start) * self.scale +
+                self._offset)
+
+    def _push(self, call):
+        """
+        Add a heap entry for ``call`` and make sure the reactor wakes this
+        clock up in time for it.
+        """
+        super(ScaledClock, self)._push(call)
+        self._schedule_wakeup()
+
+    def _schedule_wakeup(self):
+        """
+        Make sure a reactor call is pending for the earliest entry in the
+        heap.
+        """
+        if not self._heap:
+            return
+        when = self._heap[0][0]
+        delay = max(when - self.seconds(), 0) / self.scale
+        if self._wakeup is not None and self._wakeup.active():
+            if self._wakeup.getTime() <= self._reactor.seconds() + delay:
+                return
+            self._wakeup.cancel()
+        self._wakeup = self._reactor.callLater(delay, self._wake)
+
+    def _wake(self):
+        """
+        Run whatever is due now that the reactor has woken us up, then wait
+        for the next pending call, even if one of them raised an exception.
+        The reactor logs the exception, and any calls still due run as soon
+        as it wakes us up again.
+        """
+        self._wakeup = None
+        try:
+            self._run_due_calls()
+        finally:
+            self._schedule_wakeup()
+
+    def advance(self, amount):
+        """
+        Move this clock's time forward by ``amount`` seconds beyond the scaled
+        passage of real time, and run every call which is due by then.  An
+        exception raised by one of them is raised from here, but the calls
+        after it still run once the reactor wakes this clock up.
+        """
+        self._offset += amount
+        try:
+            self._run_due_calls()
+        finally:
+            self._schedule_wakeup()
@@ -6,11 +6,16 @@ Service catalog hub and integration for Mimic application objects.
 
 from __future__ import absolute_import, division, unicode_literals
 
+import json
+from collections import OrderedDict
+
 from twisted.python.urlpath import URLPath
 from twisted.plugin import getPlugins
 from mimic import plugins
 
+from mimic.canned_responses.auth import get_service_catalog
 from mimic.imimic import IAPIMock, IAPIDomainMock
+from mimic.metrics import RequestMetrics
 from mimic.session import SessionStore
 from mimic.util.helper import random_hex_generator
 from mimic.model.mailgun_objects import MessageStore
@@ -20,13 +25,21 @@ from mimic.model.glance_objects import GlanceAdminImageStore
 from mimic.model.valkyrie_objects import ValkyrieStore
 
 
+MAX_BASE_URIS = 32
+"""
+The number of base URIs to cache resources and service catalogs for.  The
+base URI comes from the ``Host`` header of each request, so without a limit
+a client could grow the caches indefinitely by varying it.
+"""
+
+
 class MimicCore(object):
     """
     A MimicCore contains a mapping from URI prefixes to particular service
     mocks.
     """
 
-    def __init__(self, clock, apis, domains=()):
+    def __init__(self, clock, apis, domains=(), session_store=None):
         """
         Create a MimicCore with an IReactorTime to do any time-based scheduling
         against.
@@ -40,30 +53,108 @@ class MimicCore(object):
 
         :param domains: an iterable of all :obj:`IAPIDomainMock`s that this
             MimicCore will expose.
+
+        :param session_store: the :obj:`SessionStore` to keep sessions in; by
+            default, an unbounded one using ``clock``.
         """
         self._uuid_to_api = {}
-        self.sessions = SessionStore(clock)
+        self._resource_cache = {
+            # mapping of (service_id, region_name, base_uri) to the resource
+            # returned by that service's ``resource_for_region``
+        }
+        self._catalog_cache = {
+            # mapping of (tenant_id, base_uri) to a 3-tuple of the list of
+            # catalog entries, the mapping of their endpoints to URI prefixes,
+            # and the rendered JSON service catalog
+        }
+        self._catalog_keys = {
+            # mapping of tenant_id to the set of keys of its entries in
+            # _catalog_cache
+        }
+        self._base_uris = OrderedDict(
+            # mapping of every base URI in either cache, least recently used
+            # first, to a 2-tuple of the sets of its keys in _resource_cache
+            # and in _catalog_cache
+        )
+        if session_store is None:
+            session_store = SessionStore(clock)
+        self.clock = clock
+        self.sessions = session_store
+        self.sessions.add_eviction_observer(self._forget_tenant)
         self.message_store = MessageStore()
         self.contacts_store = ContactsStore()
         self.ironic_node_store = IronicNodeStore()
         self.glance_admin_image_store = GlanceAdminImageStore()
         self.valkyrie_store = ValkyrieStore()
+        self.metrics = RequestMetrics()
         self.domains = list(domains)
 
         for api in apis:
-            this_api_id = ((api.__class__.__name__) + '-' +
-                           random_hex_generator(3))
-            self._uuid_to_api[this_api_id] = api
+            self.add_api(api)
 
     @classmethod
-    def fromPlugins(cls, clock):
+    def fromPlugins(cls, clock, session_store=None):
         """
         Create a :obj:`MimicCore` from all :obj:`IAPIMock` and
         :obj:`IAPIDomainMock` plugins.
         """
         service_catalog_plugins = getPlugins(IAPIMock, plugins)
         domain_plugins = getPlugins(IAPIDomainMock, plugins)
-        return cls(clock, service_catalog_plugins, domain_plugins)
+        return cls(clock, service_catalog_plugins, domain_plugins,
+                   session_store=session_store)
+
+    def add_api(self, api):
+        """
+        Expose another :obj:`IAPIMock` from this MimicCore.
+
+        Any cached service catalogs and resources are discarded, since they no
+        longer reflect the full set of APIs.
+
+        :return: the service ID generated for ``api``.
+        """
+        this_api_id = ((api.__class__.__name__) + '-' +
+                       random_hex_generator(3))
+        self._uuid_to_api[this_api_id] = api
+        self._resource_cache.clear()
+        self._catalog_cache.clear()
+        self._catalog_keys.clear()
+        self._base_uris.clear()
+        return this_api_id
+
+    def _forget_tenant(self, session):
+        """
+        Discard the cached service catalogs for a session's tenant once that
+        session has been discarded.
+        """
+        for key in self._catalog_keys.pop(session.tenant_id, ()):
+            del self._catalog_cache[key]
+            self._base_uris[key[1]][1].discard(key)
+
+    def _keys_for_base_uri(self, base_uri):
+        """
+        Note that ``base_uri`` has just been used, discarding everything
+        cached for the least recently used base URI if there are more than
+        :obj:`MAX_BASE_URIS`.
+
+        :return: the 2-tuple of the sets of keys cached for ``base_uri`` in
+            ``_resource_cache`` and ``_catalog_cache``, to add to.
+        """
+        keys = self._base_uris.pop(base_uri, None)
+        if keys is None:
+            keys = (set(), set())
+            if len(self._base_uris) >= MAX_BASE_URIS:
+                _, (resource_keys, catalog_keys) = self._base_uris.popitem(
+                    last=False)
+                for key in resource_keys:
+                    del self._resource_cache[key]
+                for key in catalog_keys:
+                    del self._catalog_cache[key]
+                    tenant_keys = self._catalog_keys[key[0]]
+                    tenant_keys.discard(key)
+                    if not tenant_keys:
+                        del self._catalog_keys[key[0]]
+        self._base_uris[base_uri] = keys
+        return keys
 
     def service_with_region(self, region_name, service_id, base_uri):
         """
@@ -77,16 +168,28 @@ class MimicCore(object):
         :param str base_uri: the base uri to use instead of the default -
             most likely comes from a request URI
 
+        Resources are cached by service ID, region name and base URI, so the
+        plugin's ``resource_for_region`` is only invoked the first time a given
+        combination is requested, for the :obj:`MAX_BASE_URIS` most recently
+        used base URIs.
+
         :return: A resource.
         :rtype: :obj:`twisted.web.iweb.IResource`
         """
+        key = (service_id, region_name, base_uri)
+        if key in self._resource_cache:
+            self._keys_for_base_uri(base_uri)
+            return self._resource_cache[key]
         if service_id in self._uuid_to_api:
             api = self._uuid_to_api[service_id]
-            return api.resource_for_region(
+            resource = api.resource_for_region(
                 region_name,
                 self.uri_for_service(region_name, service_id, base_uri),
                 self.sessions,
             )
+            self._keys_for_base_uri(base_uri)[0].add(key)
+            self._resource_cache[key] = resource
+            return resource
 
     def uri_for_service(self, region, service_id, base_uri):
         """
@@ -134,3 +237,53 @@ class MimicCore(object):
                         endpoint.region, service_id, base_uri
                     )
                 yield entry
+
+    def _cached_catalog(self, tenant_id, base_uri):
+        """
+        Get (creating it if necessary) the cache entry for the catalog of
+        the given tenant and base URI.
+        """
+        key = (tenant_id, base_uri)
+        catalog_keys = self._keys_for_base_uri(base_uri)[1]
+        if key not in self._catalog_cache:
+            prefix_map = {}
+            entries = list(self.entries_for_tenant(tenant_id, prefix_map,
+                                                   base_uri))
+            rendered = json.dumps(get_service_catalog(entries,
+                                                      prefix_map.get))
+            self._catalog_cache[key] = (entries, prefix_map, rendered)
+            self._catalog_keys.setdefault(tenant_id, set()).add(key)
+            catalog_keys.add(key)
+        return self._catalog_cache[key]
+
+    def catalog_for_tenant(self, tenant_id, base_uri):
+        """
+        Get the catalog entries for a tenant, along with the URI prefix of each
+        of their endpoints, as :obj:`MimicCore.entries_for_tenant` would.
+
+        The result is cached per tenant and base URI, so the entries (and
+        their endpoint IDs) are the same every time until the APIs exposed
+        by this MimicCore change, the tenant's session is discarded, or the
+        base URI is no longer among the :obj:`MAX_BASE_URIS` most recently
+        used.
+
+        :param unicode tenant_id: A fictional tenant ID.
+        :param str base_uri: the base uri to use instead of the default - most
+            likely comes from a request URI
+
+        :return: a 2-tuple of a list of :obj:`mimic.catalog.Entry`, and a
+            mapping of :obj:`mimic.catalog.Endpoint` to URI prefix.
+        """
+        entries, prefix_map, _ = self._cached_catalog(tenant_id, base_uri)
+        return (entries, prefix_map)
+
+    def service_catalog_json(self, tenant_id, base_uri):
+        """
+        Get the JSON-encoded service catalog for a tenant, as returned in the
+        ``serviceCatalog`` key of an authentication response.  This is cached
+        along with :obj:`MimicCore.catalog_for_tenant`.
+
+        :return: the JSON text of the service catalog.
+        :rtype: ``str``
+        """
+        return self._cached_catalog(tenant_id, base_uri)[2]
@@ -0,0 +1,242 @@
+# -*- test-case-name: mimic.test.test_metrics -*-
+"""
+Runtime metrics for Mimic, served in the Prometheus text format.
+
+:obj:`RequestMetrics` counts requests, statuses, latencies and bytes per
+route.  It is updated by :obj:`mimic.resource.MimicRequest` as requests come
+and go, so everything it does per request is a few additions.  Everything
+else (sessions, and the objects each mocked service holds) is only counted
+when the metrics are scraped.
+
+An API mock reports how many objects it holds for a tenant by having an
+``object_counts`` method.  The method takes the data the mock keeps in a
+session (see :obj:`mimic.session.Session.data_for_api`) and returns a
+mapping of kind of object (for example ``"servers"``) to count.
+"""
+
+from __future__ import absolute_import, division, unicode_literals
+
+from bisect import bisect_left
+from collections import defaultdict
+from timeit import default_timer
+
+import attr
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0)
+"""
+The upper bounds, in seconds, of the buckets of every latency histogram.
+"""
+
+
+@attr.s
+class Histogram(object):
+    """
+    A histogram of observations in fixed buckets.
+
+    :ivar buckets: The upper bound of each bucket, in increasing order.
+    :ivar counts: The number of observations in each bucket (those no larger
+        than its bound, and larger than the previous bucket's bound),
+        followed by the number larger than every bound.
+    :ivar total: The sum of every observation.
+    """
+    buckets = attr.ib()
+    counts = attr.ib()
+    total = attr.ib(default=0.0)
+
+    @classmethod
+    def with_buckets(cls, buckets):
+        """
+        Create an empty histogram with the given bucket bounds.
+        """
+        return cls(buckets=buckets, counts=[0] * (len(buckets) + 1))
+
+    def observe(self, value):
+        """
+        Add an observation.
+        """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+    def cumulative_counts(self):
+        """
+        The number of observations no larger than each bound, followed by the
+        total number of observations.
+        """
+        cumulative = []
+        running = 0
+        for count in self.counts:
+            running += count
+            cumulative.append(running)
+        return cumulative
+
+
+@attr.s
+class RouteMetrics(object):
+    """
+    The metrics for one route and request method.
+
+    :ivar statuses: A mapping of response code to number of responses.
+    :ivar latency: A :obj:`Histogram` of response times, in seconds.
+    """
+    statuses = attr.ib(default=attr.Factory(lambda: defaultdict(int)))
+    latency = attr.ib(
+        default=attr.Factory(lambda: Histogram.with_buckets(LATENCY_BUCKETS)))
+
+
+class RequestMetrics(object):
+    """
+    Metrics about the requests Mimic has handled.
+
+    :ivar int in_flight: The number of requests being handled right now.
+    :ivar int bytes_in: The total size of every request body received.
+    :ivar int bytes_out: The total size of every response body sent.
+    """
+
+    def __init__(self, timer=default_timer):
+        """
+        :param timer: A function returning the current time in seconds, used
+            to measure latency.  This is real time, not Mimic's clock.
+        """
+        self._timer = timer
+        self.in_flight = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._routes = {
+            # mapping of (handler name, URL pattern, method) to RouteMetrics
+        }
+
+    def request_started(self, request):
+        """
+        Note that Mimic has started handling ``request``, whose body has been
+        received.
+
+        :return: the time it started, to pass to :obj:`request_finished`.
+        """
+        self.in_flight += 1
+        content = request.content
+        if content is not None:
+            content.seek(0, 2)
+            self.bytes_in += content.tell()
+            content.seek(0)
+        return self._timer()
+
+    def request_finished(self, request, started):
+        """
+        Note that Mimic has finished responding to ``request``, or that the
+        client has gone away.
+        """
+        self.in_flight -= 1
+        self.bytes_out += request.sentLength
+        handler, url = request.mimic_route or ("unmatched", "")
+        key = (handler, url, request.method)
+        route = self._routes.get(key)
+        if route is None:
+            route = self._routes[key] = RouteMetrics()
+        route.statuses[request.code] += 1
+        route.latency.observe(self._timer() - started)
+
+    def routes(self):
+        """
+        The metrics of every route and method which has handled a request, as
+        a sorted list of ``((handler, url, method), RouteMetrics)``.
+        """
+        return sorted(self._routes.items())
+
+
+def _label_value(value):
+    """
+    Escape a label value for the Prometheus text format.
+    """
+    if isinstance(value, bytes):
+        value = value.decode("utf-8", "replace")
+    return (value.replace("\\", "\\\\").replace("\n", "\\n")
+            .replace('"', '\\"'))
+
+
+def _labels(**labels):
+    """
+    Format labels for the Prometheus text format, in name order.
+    """
+    return "{" + ",".join('{0}="{1}"'.format(name, _label_value(value))
+                          for name, value in sorted(labels.items())) + "}"
+
+
+def object_counts(sessions):
+    """
+    Add up the objects that every API mock holds in every session, for the
+    mocks which can count them (see the module docstring).
+
+    :return: a mapping of kind of object to count
+    """
+    counts = defaultdict(int)
+    for session in sessions:
+        for api_mock, data in session.api_data():
+            count = getattr(api_mock, "object_counts", None)
+            if count is None:
+                continue
+            for kind, number in count(data).items():
+                counts[kind] += number
+    return counts
+
+
+def prometheus_text(metrics, sessions):
+    """
+    Render Mimic's metrics in the Prometheus text format.
+
+    :param RequestMetrics metrics: The request metrics to render.
+    :param sessions: The :obj:`mimic.session.SessionStore`, whose sessions
+        are counted, along with the objects held in them.
+
+    :rtype: ``unicode``
+    """
+    lines = []
+
+    def metric(name, kind, description):
+        lines.append("# HELP {0} {1}".format(name, description))
+        lines.append("# TYPE {0} {1}".format(name, kind))
+
+    metric("mimic_http_requests_total", "counter",
+           "Requests handled, by route, method and status code.")
+    for (handler, url, method), route in metrics.routes():
+        for code, count in sorted(route.statuses.items()):
+            lines.append("mimic_http_requests_total{0} {1}".format(
+                _labels(handler=handler, route=url, method=method,
+                        code=str(code)), count))
+
+    metric("mimic_http_request_duration_seconds", "histogram",
+           "Time taken to respond, by route and method.")
+    for (handler, url, method), route in metrics.routes():
+        name = "mimic_http_request_duration_seconds"
+        histogram = route.latency
+        cumulative = histogram.cumulative_counts()
+        bounds = [repr(float(bound)) for bound in histogram.buckets] + ["+Inf"]
+        for bound, count in zip(bounds, cumulative):
+            lines.append("{0}_bucket{1} {2}".format(
+                name, _labels(handler=handler, route=url, method=method,
+                              le=bound), count))
+        labels = _labels(handler=handler, route=url, method=method)
+        lines.append("{0}_sum{1} {2!r}".format(name, labels, histogram.total))
+        lines.append("{0}_count{1} {2}".format(name, labels, cumulative[-1]))
+
+    metric("mimic_http_requests_in_flight", "gauge",
+           "Requests being handled right now.")
+    lines.append("mimic_http_requests_in_flight {0}".format(
+        metrics.in_flight))
+    metric("mimic_http_request_bytes_total", "counter",
+           "Bytes of request bodies received.")
+    lines.append("mimic_http_request_bytes_total {0}".format(metrics.bytes_in))
+    metric("mimic_http_response_bytes_total", "counter",
+           "Bytes of response bodies sent.")
+    lines.append("mimic_http_response_bytes_total {0}".format(
+        metrics.bytes_out))
+
+    metric("mimic_sessions", "gauge", "Sessions held.")
+    lines.append("mimic_sessions {0}".format(len(sessions)))
+    metric("mimic_objects", "gauge",
+           "Objects held by mocked services, by kind.")
+    for kind, count in sorted(object_counts(sessions).items()):
+        lines.append("mimic_objects{0} {1}".format(_labels(kind=kind), count))
+
+    return "\n".join(lines) + "\n"
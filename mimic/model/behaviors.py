@@ -5,17 +5,22 @@ General-purpose utilities for customizing response behavior.
 from __future__ import absolute_import, division, unicode_literals
 
 import json
+import random
 import re
+from bisect import bisect_right
 from itertools import cycle
+from math import isinf, isnan
+from timeit import default_timer
 from uuid import UUID, uuid4
 
 import attr
 
-from six import text_type
+from six import string_types, text_type
 
-from twisted.web.http import CREATED, BAD_REQUEST, NO_CONTENT, NOT_FOUND
+from twisted.internet.defer import Deferred
+from twisted.web.http import CREATED, BAD_REQUEST, NO_CONTENT, NOT_FOUND, OK
 
-from mimic.util.helper import json_from_request
+from mimic.util.helper import json_from_request, seconds_to_timestamp
 from mimic.rest.mimicapp import MimicApp
 
 
@@ -66,12 +71,261 @@ class CriteriaCollection(object):
         return True
 
 
+@attr.s
+class RegexpPredicate(object):
+    """
+    A predicate which matches a regular expression against the start of a
+    string, as :obj:`re.match` does.
+
+    Unlike an arbitrary predicate, a :obj:`BehaviorRegistry` can see the
+    regular expression, and so match it together with all the others for the
+    same attribute.
+
+    :ivar pattern: The regular expression, as a string.
+    """
+    pattern = attr.ib()
+    _match = attr.ib(repr=False)
+
+    def __call__(self, value):
+        """
+        Match the regular expression against ``value``.  Anything but a string
+        does not match.
+        """
+        if not isinstance(value, string_types):
+            return None
+        return self._match(value)
+
+
 def regexp_predicate(value):
     """
     Return a predicate for use with a Criterion which matches a given regular
     expression.
     """
-    return re.compile(value).match
+    return RegexpPredicate(pattern=value, match=re.compile(value).match)
+
+
+_METACHARACTERS = frozenset(".^$*+?{}[]\\|()")
+
+# Patterns which cannot be embedded in a larger regular expression without
+# changing what they match: those with backreferences, named or conditional
+# groups, or global inline flags.
+_UNCOMBINABLE = re.compile(r"\\\d|\(\?P|\(\?\(|\(\?[aiLmsux]+\)")
+
+# Python 2 limits a regular expression to 100 groups.
+_MAX_GROUPS = 99
+
+_MISSING = object()
+
+_MEMO_SIZE = 1024
+
+
+def _anchored_literal(pattern):
+    """
+    If ``pattern`` is a literal string anchored at the end (and optionally at
+    the start), and so only matches that exact string, return the string.
+    Otherwise return ``None``.
+    """
+    if pattern.startswith("^"):
+        pattern = pattern[1:]
+    if not pattern.endswith("$"):
+        return None
+    literal = pattern[:-1]
+    if any(character in _METACHARACTERS for character in literal):
+        return None
+    return literal
+
+
+def _combine(patterns):
+    """
+    Combine regular expressions into as few as possible, each of which
+    matches (as :obj:`re.match` does) any string, while recording in an empty
+    group which of the original expressions match it.
+
+    Every pattern is wrapped in a lookahead, so that they are all matched at
+    the start of the string, and made optional, so that the combined
+    expression always matches.
+
+    :param patterns: a list of regular expressions, as strings.
+    :return: a 2-tuple of a list of ``(match, [(group, pattern)])`` pairs,
+        where ``match`` is the combined expression's ``match`` method and
+        ``group`` is the index of the group which is set if ``pattern``
+        matched, and a list of the patterns which could not be combined.
+    """
+    chunks = []
+    leftover = []
+    sources = []
+    groups = []
+
+    def finish_chunk():
+        if not sources:
+            return
+        try:
+            combined = re.compile("".join(sources))
+        except re.error:
+            leftover.extend(pattern for _, pattern in groups)
+        else:
+            chunks.append((combined.match, list(groups)))
+        del sources[:]
+        del groups[:]
+
+    for pattern in patterns:
+        own_groups = re.compile(pattern).groups
+        if _UNCOMBINABLE.search(pattern) or own_groups >= _MAX_GROUPS:
+            leftover.append(pattern)
+            continue
+        offset = groups[-1][0] if groups else 0
+        if offset + own_groups + 1 > _MAX_GROUPS:
+            finish_chunk()
+            offset = 0
+        sources.append("(?:(?=(?:{0}))())?".format(pattern))
+        groups.append((offset + own_groups + 1, pattern))
+    finish_chunk()
+    return chunks, leftover
+
+
+@attr.s
+class _CompiledCriteria(object):
+    """
+    The criteria of every behavior in a :obj:`BehaviorRegistry`, compiled so
+    that each attribute is checked against all the regular expressions for it
+    at once, rather than once per expression.
+
+    Each regular expression criterion is identified by an
+    ``(attribute name, pattern)`` pair.  Matching the attributes of an event
+    produces the set of those which match, after which checking whether a
+    behavior's regular expression criteria all match is a set operation.
+
+    :ivar attribute_names: The names of every attribute any criterion looks
+        at, sorted, or ``None`` if some criterion does not say which
+        attribute it looks at.
+    :ivar _literals: A mapping of attribute name to a mapping of literal
+        string to the patterns which only match that exact string.
+    :ivar _combined: A mapping of attribute name to the combined regular
+        expressions (see :obj:`_combine`) for the remaining patterns.
+    :ivar _individual: A mapping of attribute name to a list of
+        ``(match, pattern)`` for the patterns which could not be combined.
+    :ivar _behaviors: A list of ``(behavior, behavior_id, required, others)``
+        for each registered behavior, in order, where ``required`` is the set of
+        regular expression criteria it needs to match and ``others`` is a
+        list of any other criteria it needs to evaluate.
+    """
+    attribute_names = attr.ib()
+    _literals = attr.ib()
+    _combined = attr.ib()
+    _individual = attr.ib()
+    _behaviors = attr.ib()
+
+    @classmethod
+    def from_registered_behaviors(cls, registered_behaviors):
+        """
+        Compile the criteria of every ``(behavior, criteria, behavior_id)``
+        in ``registered_behaviors``.
+        """
+        names = set()
+        patterns = {}
+        behaviors = []
+        for behavior, criteria, behavior_id in registered_behaviors:
+            required = set()
+            others = []
+            if isinstance(criteria, CriteriaCollection):
+                for criterion in criteria.criteria:
+                    if (isinstance(criterion, Criterion) and
+                            isinstance(criterion.predicate, RegexpPredicate)):
+                        required.add((criterion.name,
+                                      criterion.predicate.pattern))
+                        patterns.setdefault(criterion.name, set()).add(
+                            criterion.predicate.pattern)
+                    else:
+                        others.append(criterion)
+                    names.add(getattr(criterion, "name", _MISSING))
+            else:
+                others.append(criteria)
+                names.add(_MISSING)
+            behaviors.append((behavior, behavior_id, frozenset(required),
+                              others))
+
+        literals = {}
+        combined = {}
+        individual = {}
+        for name, name_patterns in patterns.items():
+            remaining = []
+            for pattern in sorted(name_patterns):
+                literal = _anchored_literal(pattern)
+                if literal is None:
+                    remaining.append(pattern)
+                else:
+                    literals.setdefault(name, {}).setdefault(
+                        literal, []).append((name, pattern))
+            chunks, leftover = _combine(remaining)
+            if chunks:
+                combined[name] = [
+                    (match, [(group, (name, pattern))
+                             for group, pattern in groups])
+                    for match, groups in chunks]
+            if leftover:
+                individual[name] = [(re.compile(pattern).match,
+                                     (name, pattern))
+                                    for pattern in leftover]
+        return cls(attribute_names=(None if _MISSING in names
+                                    else tuple(sorted(names))),
+                   literals=literals,
+                   combined=combined, individual=individual,
+                   behaviors=behaviors)
+
+    def _matching_patterns(self, attributes):
+        """
+        The set of regular expression criteria which ``attributes`` match.
+        Attributes whose values are not strings, such as a ``tenant_id`` of
+        ``None``, match none of them.
+        """
+        matched = set()
+        for name, literals in self._literals.items():
+            value = attributes.get(name)
+            if isinstance(value, string_types):
+                matched.update(literals.get(value, ()))
+                if value.endswith("\n"):
+                    # "$" also matches just before a trailing newline.
+                    matched.update(literals.get(value[:-1], ()))
+        for name, chunks in self._combined.items():
+            value = attributes.get(name)
+            if isinstance(value, string_types):
+                for match, groups in chunks:
+                    result = match(value)
+                    matched.update(pattern for group, pattern in groups
+                                   if result.group(group) is not None)
+        for name, matches in self._individual.items():
+            value = attributes.get(name)
+            if isinstance(value, string_types):
+                matched.update(pattern for match, pattern in matches
+                               if match(value))
+        return matched
+
+    def behavior_for_attributes(self, attributes):
+        """
+        The first behavior whose criteria all match ``attributes``, as a
+        ``(behavior, behavior_id)`` pair, or ``None`` if there is none.
+        """
+        matched = self._matching_patterns(attributes)
+        for behavior, behavior_id, required, others in self._behaviors:
+            if required <= matched and all(criterion.evaluate(attributes)
+                                           for criterion in others):
+                return behavior, behavior_id
+        return None
+
+    def memo_key(self, attributes):
+        """
+        A key identifying the values of every attribute the criteria look at,
+        or ``None`` if they cannot be used as a key.
+        """
+        if self.attribute_names is None:
+            return None
+        key = tuple(attributes.get(name, _MISSING)
+                    for name in self.attribute_names)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
 
 
 @attr.s(these={"_behaviors": attr.ib(), "_criteria": attr.ib()}, init=False)
@@ -85,7 +339,8 @@ class EventDescription(object):
         criteria match.
 
     All :class:`EventDescription`s come with a sequence behavior (named
-    "sequence") by default.  (:see: :obj:`sequence_docstring` for more
+    "sequence") and a delay behavior (named "delay") by default.  (:see:
+    :obj:`sequence_docstring` and :obj:`delay_docstring` for more
     information)
     """
     def __init__(self):
@@ -96,11 +351,14 @@ class EventDescription(object):
         self._behaviors = {}
         self._criteria = {}
         _sequence_behavior(self)
+        _delay_behavior(self)
 
-    def declare_behavior_creator(self, name):
+    def declare_behavior_creator(self, name, takes_clock=False):
         """
         Decorator which declares that the decorated function is a factory,
         taking parameters (a JSON-serialized object), and returning a behavior.
+        If ``takes_clock`` is true, it also takes the :obj:`IReactorTime` of
+        the registry the behavior is being registered with.
 
         Use like so::
 
@@ -113,6 +371,7 @@ class EventDescription(object):
         """
         def decorator(thunk):
             thunk.behavior_name = name
+            thunk.takes_clock = takes_clock
             self._behaviors[name] = thunk
             return thunk
         return decorator
@@ -144,15 +403,20 @@ class EventDescription(object):
             return thunk
         return decorator
 
-    def create_behavior(self, name, parameters):
+    def create_behavior(self, name, parameters, clock):
         """
         Create behavior identified by the given name, with the given
         parameters.  This is used during the process of registering a behavior.
 
         :param parameters: An object (deserialized from JSON) which serves as
             parameters to the named behavior creator.
+        :param clock: The :obj:`IReactorTime` for behaviors which wait, such
+            as ``delay``, to wait on.
         """
-        return self._behaviors[name](parameters)
+        creator = self._behaviors[name]
+        if creator.takes_clock:
+            return creator(parameters, clock)
+        return creator(parameters)
 
     def create_criteria(self, request_criteria):
         """
@@ -166,39 +430,182 @@ class EventDescription(object):
         return CriteriaCollection(criteria=list(create_criteria()))
 
 
+@attr.s
+class BehaviorStats(object):
+    """
+    How often a behavior has been chosen, and how long it has taken to run.
+
+    :ivar name: The name of the behavior, or ``"default"`` for an event's
+        default behavior.
+    :ivar int hits: How many times the behavior has been chosen.
+    :ivar last_hit: When the behavior was last chosen, in seconds since the
+        epoch by the registry's clock, or ``None`` if it has never been
+        chosen.
+    :ivar float handler_seconds: The total time spent running the behavior.
+    """
+    name = attr.ib()
+    hits = attr.ib(default=0)
+    last_hit = attr.ib(default=None)
+    handler_seconds = attr.ib(default=0.0)
+
+    def to_json(self):
+        """
+        Serialize these statistics to a JSON-compatible object.
+        """
+        return {"name": self.name,
+                "hits": self.hits,
+                "last_hit": (None if self.last_hit is None
+                             else seconds_to_timestamp(self.last_hit)),
+                "handler_seconds": self.handler_seconds}
+
+
 @attr.s
 class BehaviorRegistry(object):
     """
     A registry of behavior.
 
     :ivar EventDescription event: The event this registry is operating for.
+    :ivar clock: The :obj:`IReactorTime` whose time is recorded as each
+        behavior's ``last_hit``, and which ``delay`` behaviors wait on, so
+        that they agree with the rest of mimic's simulated time.
     :ivar registered_behaviors: The set of criteria and behaviors to use for
         this event.  Currently this is just a list of tuples of
-        (behavior, criteria, and uuid).
+        (behavior, criteria, and uuid).  It should only be changed with
+        :obj:`register_from_json` and :obj:`remove_behavior_by_id`, which
+        discard the compiled criteria.
+
+    The criteria are compiled (see :obj:`_CompiledCriteria`) the first time
+    a behavior is looked up after a change, and the behavior chosen for each
+    set of attribute values is remembered until the next change.
+
+    Each lookup is counted, in the :obj:`BehaviorStats` of the behavior
+    chosen, or of the default behavior if none was.  Each behavior is wrapped
+    once, when it is registered, so that running it adds the time it takes
+    to those statistics; the same wrapped behavior is returned by every
+    lookup which chooses it.
+
+    :ivar int lookups: The number of behaviors looked up.
+    :ivar float lookup_seconds: The total time spent choosing behaviors.
+    :ivar default_stats: The :obj:`BehaviorStats` of the default behavior.
+    :ivar _stats: A mapping of behavior ID to the :obj:`BehaviorStats` of
+        each registered behavior.
+    :ivar _timed_default: The event's default behavior, wrapped to time it.
+    :ivar _timer: A function returning the current time in seconds, used to
+        measure how long lookups and behaviors take.  This is real time,
+        whatever the clock.
     """
     event = attr.ib()
+    clock = attr.ib(repr=False)
     registered_behaviors = attr.ib(default=attr.Factory(list))
+    lookups = attr.ib(default=0)
+    lookup_seconds = attr.ib(default=0.0)
+    default_stats = attr.ib(
+        default=attr.Factory(lambda: BehaviorStats(name="default")))
+    _stats = attr.ib(default=attr.Factory(dict), repr=False)
+    _timer = attr.ib(default=default_timer, repr=False)
+    _timed_default = attr.ib(default=None, repr=False)
+    _compiled = attr.ib(default=None, repr=False)
+    _memo = attr.ib(default=attr.Factory(dict), repr=False)
+
+    def _changed(self):
+        """
+        Discard the compiled criteria and remembered lookups.
+        """
+        self._compiled = None
+        self._memo.clear()
 
     def register_from_json(self, json_payload):
         """
         Register a behavior with the given JSON payload from a request.
         """
         behavior_id = uuid4()
+        behavior = self.event.create_behavior(json_payload["name"],
+                                              json_payload["parameters"],
+                                              self.clock)
+        criteria = self.event.create_criteria(json_payload["criteria"])
+        stats = BehaviorStats(name=json_payload["name"])
         self.registered_behaviors.append(
-            (self.event.create_behavior(json_payload["name"],
-                                        json_payload["parameters"]),
-             self.event.create_criteria(json_payload["criteria"]),
-             behavior_id))
+            (self._timed(behavior, stats), criteria, behavior_id))
+        self._stats[behavior_id] = stats
+        self._changed()
         return behavior_id
 
+    def _choose(self, attributes):
+        """
+        Choose the registered behavior for the given set of attributes.
+
+        :return: a ``(behavior, behavior_id)`` pair, or ``None`` if no
+            registered behavior matches.
+        """
+        if not self.registered_behaviors:
+            return None
+        if self._compiled is None:
+            self._compiled = _CompiledCriteria.from_registered_behaviors(
+                self.registered_behaviors)
+        key = self._compiled.memo_key(attributes)
+        if key is not None and key in self._memo:
+            return self._memo[key]
+        chosen = self._compiled.behavior_for_attributes(attributes)
+        if key is not None:
+            if len(self._memo) >= _MEMO_SIZE:
+                self._memo.clear()
+            self._memo[key] = chosen
+        return chosen
+
     def behavior_for_attributes(self, attributes):
         """
         Retrive a previously-registered behavior given the set of attributes.
         """
-        for behavior, criteria, _ in self.registered_behaviors:
-            if criteria.evaluate(attributes):
-                return behavior
-        return self.event.default_behavior
+        start = self._timer()
+        chosen = self._choose(attributes)
+        if chosen is None:
+            if self._timed_default is None:
+                self._timed_default = self._timed(self._run_default,
+                                                  self.default_stats)
+            behavior = self._timed_default
+            stats = self.default_stats
+        else:
+            behavior, behavior_id = chosen
+            stats = self._stats[behavior_id]
+        stats.hits += 1
+        stats.last_hit = self.clock.seconds()
+        self.lookups += 1
+        self.lookup_seconds += self._timer() - start
+        return behavior
+
+    def _run_default(self, *args, **kwargs):
+        """
+        Run the event's default behavior, whatever it is at the time.
+        """
+        return self.event.default_behavior(*args, **kwargs)
+
+    def _timed(self, behavior, stats):
+        """
+        Wrap ``behavior`` so that the time it takes to run is added to
+        ``stats``.
+        """
+        def timed_behavior(*args, **kwargs):
+            start = self._timer()
+            try:
+                return behavior(*args, **kwargs)
+            finally:
+                stats.handler_seconds += self._timer() - start
+        return timed_behavior
+
+    def stats_json(self):
+        """
+        Serialize the statistics of every registered behavior, in order, and
+        of the default behavior, to a JSON-compatible object.
+        """
+        behaviors = []
+        for _, _, behavior_id in self.registered_behaviors:
+            stats_json = self._stats[behavior_id].to_json()
+            stats_json["id"] = text_type(behavior_id)
+            behaviors.append(stats_json)
+        return {"behaviors": behaviors,
+                "default": self.default_stats.to_json(),
+                "lookups": self.lookups,
+                "lookup_seconds": self.lookup_seconds}
 
     def remove_behavior_by_id(self, behavior_id):
         """
@@ -208,6 +615,8 @@ class BehaviorRegistry(object):
             b, c, b_id = behaviors
             if b_id == behavior_id:
                 del self.registered_behaviors[i]
+                del self._stats[b_id]
+                self._changed()
                 return
         raise NoSuchBehaviorError(behavior_id=behavior_id)
 
@@ -217,8 +626,15 @@ class BehaviorRegistryCollection(object):
     """
     A collection of behavior registries that can be retrieved by event
     description.
+
+    Event descriptions are compared by identity: each one is a distinct
+    event.
+
+    :ivar clock: The clock given to each registry; see
+        :obj:`BehaviorRegistry`.
     """
-    _registries = attr.ib(default=attr.Factory(list))
+    clock = attr.ib(repr=False)
+    _registries = attr.ib(default=attr.Factory(dict))
 
     def registry_by_event(self, event_description):
         """
@@ -234,11 +650,10 @@ class BehaviorRegistryCollection(object):
 
         :raises: :class:`ValueError` if the event is not supported
         """
-        for event, registry in self._registries:
-            if event == event_description:
-                return registry
-        registry = BehaviorRegistry(event_description)
-        self._registries.append((event_description, registry))
+        registry = self._registries.get(id(event_description))
+        if registry is None:
+            registry = BehaviorRegistry(event_description, clock=self.clock)
+            self._registries[id(event_description)] = registry
         return registry
 
 
@@ -300,6 +715,45 @@ def make_behavior_api(event_names_and_descriptions):
             request.setResponseCode(CREATED)
             return json.dumps({'id': text_type(behavior_id)})
 
+        @BehaviorAPI.app.route('/{0}'.format(name), methods=['GET'])
+        def behavior_stats(kl_self, request):
+            """
+            Report how often each registered behavior, and the default
+            behavior, has been chosen, and how long they have taken.
+
+            The response looks like::
+
+                {
+                    # registered behaviors, in the order they are tried
+                    "behaviors": [
+                        {
+                            "id": "this-is-a-uuid-here",
+                            "name": "fail",
+                            "hits": 3,
+                            "last_hit": "2015-01-01T00:00:00.000000Z",
+                            "handler_seconds": 0.0012
+                        }
+                    ],
+                    "default": {
+                        "name": "default",
+                        "hits": 10,
+                        "last_hit": "2015-01-01T00:00:00.000000Z",
+                        "handler_seconds": 0.015
+                    },
+                    # how many behaviors have been chosen, and how long
+                    # choosing them took in total
+                    "lookups": 13,
+                    "lookup_seconds": 0.0004
+                }
+
+            ``last_hit`` is ``null`` for behaviors which have never been
+            chosen.  Handler times only cover the part of a behavior which
+            runs before it returns.
+            """
+            reg = kl_self.registry_collection.registry_by_event(event)
+            request.setResponseCode(OK)
+            return json.dumps(reg.stats_json())
+
         @BehaviorAPI.app.route(
             '/{0}/<string:behavior_id>'.format(name),
             methods=['DELETE'])
@@ -325,6 +779,8 @@ def make_behavior_api(event_names_and_descriptions):
                 register_behavior)
         setattr(BehaviorAPI, 'delete_{0}_behavior'.format(event),
                 delete_behavior)
+        setattr(BehaviorAPI, '{0}_behavior_stats'.format(event),
+                behavior_stats)
 
     return BehaviorAPI
 
@@ -376,13 +832,13 @@ def _sequence_behavior(event):
     :param event: an instance of :class:`EventDescription`
     :return: a callable behavior-creator as described above
     """
-    @event.declare_behavior_creator("sequence")
-    def sequence(parameters):
+    @event.declare_behavior_creator("sequence", takes_clock=True)
+    def sequence(parameters, clock):
         behavior_specification = parameters["behaviors"]
         behavior_objects = cycle([
             (
                 event.create_behavior(behavior["name"],
-                                      behavior["parameters"])
+                                      behavior["parameters"], clock)
                 if behavior["name"] != "default"
                 else event.default_behavior
             )
@@ -396,3 +852,130 @@ def _sequence_behavior(event):
 
     sequence.__doc__ = sequence_docstring
     return sequence
+
+
+delay_docstring = """
+    Sometimes a response is slow in coming.
+
+    Takes a specification of another behavior to respond with, as
+    ``behavior``, in the same form as for the ``sequence`` behavior; by
+    default, the default behavior.  That behavior's response is delayed by a
+    number of seconds which is given by one of:
+
+    - ``seconds``: always that many seconds.
+    - ``min`` and ``max``: a number of seconds chosen uniformly between them.
+    - ``percentiles``: a mapping of percentile (0 to 100) to the number of
+      seconds at that percentile.  Delays are chosen from that distribution,
+      interpolating linearly between the percentiles given.  The 0th
+      percentile is 0 seconds unless it is given.
+
+    The delay does not block Mimic: the response is sent when the delay has
+    passed on Mimic's clock, and any number of delayed responses can be
+    waiting at once.
+
+    For example, to respond successfully, half the time within 100
+    milliseconds, but one time in a hundred only after 2 to 5 seconds::
+
+        {
+            "behavior": {"name": "default"},
+            "percentiles": {"50": 0.1, "99": 2, "100": 5}
+        }
+"""
+
+
+def _number(value, name):
+    """
+    Convert a delay parameter to a float.
+
+    :raises ValueError: if it is not a finite number, or a string of one.
+    """
+    try:
+        number = float(value)
+    except TypeError:
+        number = None
+    if number is None or isinf(number) or isnan(number):
+        raise ValueError("{0} must be a finite number".format(name))
+    return number
+
+
+def _delay_sampler(parameters, uniform=random.uniform):
+    """
+    Create a function returning delays, in seconds, distributed as described
+    by the parameters of a ``delay`` behavior (:see: :obj:`delay_docstring`).
+
+    :param uniform: a function taking a lower and an upper bound, and
+        returning a number chosen uniformly between them.
+
+    :raises ValueError: if the parameters do not describe a distribution of
+        non-negative delays.
+    """
+    if not isinstance(parameters, dict):
+        raise ValueError("parameters must be an object")
+    if "seconds" in parameters:
+        seconds = _number(parameters["seconds"], "seconds")
+        if seconds < 0:
+            raise ValueError("seconds must not be negative")
+        return lambda: seconds
+    if "min" in parameters or "max" in parameters:
+        low = _number(parameters["min"], "min")
+        high = _number(parameters["max"], "max")
+        if not 0 <= low <= high:
+            raise ValueError("need 0 <= min <= max")
+        return lambda: uniform(low, high)
+    if not isinstance(parameters["percentiles"], dict):
+        raise ValueError("percentiles must be an object")
+    points = sorted((_number(percentile, "percentile"),
+                     _number(seconds, "seconds"))
+                    for percentile, seconds
+                    in parameters["percentiles"].items())
+    if not points:
+        raise ValueError("no percentiles given")
+    if points[0][0] > 0:
+        points.insert(0, (0.0, 0.0))
+    percentiles = [percentile for percentile, _ in points]
+    delays = [seconds for _, seconds in points]
+    if (percentiles[0] < 0 or percentiles[-1] > 100 or
+            any(a > b for a, b in zip(delays, delays[1:])) or
+            delays[0] < 0):
+        raise ValueError("percentiles must be between 0 and 100, and their "
+                         "delays must not be negative or decreasing")
+
+    def sample():
+        percentile = uniform(0, percentiles[-1])
+        i = bisect_right(percentiles, percentile)
+        if i == len(percentiles):
+            return delays[-1]
+        lower, upper = percentiles[i - 1], percentiles[i]
+        fraction = (percentile - lower) / (upper - lower)
+        return delays[i - 1] + fraction * (delays[i] - delays[i - 1])
+    return sample
+
+
+def _delay_behavior(event):
+    """
+    A convenience function for :class:`EventDescription` that, given an
+    event, produces a generic behavior-creator that delays another behavior,
+    which is named "delay".
+
+    :param event: an instance of :class:`EventDescription`
+    :return: a callable behavior-creator as described above
+    """
+    @event.declare_behavior_creator("delay", takes_clock=True)
+    def delay(parameters, clock):
+        sample = _delay_sampler(parameters)
+        behavior = parameters.get("behavior", {"name": "default"})
+        delayed = (event.create_behavior(behavior["name"],
+                                         behavior["parameters"], clock)
+                   if behavior["name"] != "default" else None)
+
+        def delayed_behavior(*args, **kwargs):
+            wrapped = (event.default_behavior if delayed is None
+                       else delayed)
+            call = clock.callLater(sample(), lambda: d.callback(None))
+            d = Deferred(lambda _: call.cancel())
+            d.addCallback(lambda _: wrapped(*args, **kwargs))
+            return d
+        return delayed_behavior
+
+    delay.__doc__ = delay_docstring
+    return delay
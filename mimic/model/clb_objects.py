@@ -7,15 +7,18 @@ Balancer API docs
 
 from __future__ import absolute_import, division, unicode_literals
 
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque
 from copy import deepcopy
+from itertools import islice
 from random import randrange
+from xml.sax.saxutils import escape, quoteattr
 
 import attr
 
-from six import text_type
+from six import integer_types, text_type
 
 from twisted.internet.interfaces import IReactorTime
-from twisted.python import log
 
 from mimic.canned_responses.loadbalancer import load_balancer_example
 from mimic.model.clb_errors import (
@@ -31,8 +34,79 @@ from mimic.util.helper import (EMPTY_RESPONSE,
                                invalid_resource,
                                not_found_response,
                                one_of_validator,
-                               seconds_to_timestamp,
-                               set_resource_status)
+                               seconds_to_timestamp)
+
+
+DEFAULT_NODE_FEED_SIZE = 100
+"""
+The number of events kept in each node's feed by default.
+"""
+
+
+@attr.s
+class NodeFeed(object):
+    """
+    The most recent events of a node, kept in a ring buffer so that a node
+    whose condition flaps for a long time does not keep every event.
+
+    Each event is a tuple of ``(id, summary, updated)``.  Events are numbered
+    from 1 in the order they happen, so an event's ID serves as a marker when
+    paging through the feed.
+
+    :ivar int next_id: The ID of the next event.
+    """
+    next_id = attr.ib(default=1)
+    _events = attr.ib(
+        default=attr.Factory(lambda: deque(maxlen=DEFAULT_NODE_FEED_SIZE)),
+        repr=False)
+
+    @property
+    def capacity(self):
+        """
+        The most events this feed keeps.
+        """
+        return self._events.maxlen
+
+    def resize(self, capacity):
+        """
+        Keep at most ``capacity`` events from now on, forgetting the oldest
+        events if there are more.
+        """
+        if capacity != self._events.maxlen:
+            self._events = deque(self._events, maxlen=capacity)
+
+    def append(self, summary, updated):
+        """
+        Record an event, forgetting the oldest event if the feed is full.
+        """
+        self._events.append((self.next_id, summary, updated))
+        self.next_id += 1
+
+    def __len__(self):
+        """
+        The number of events kept.
+        """
+        return len(self._events)
+
+    def page(self, marker=None, limit=DEFAULT_NODE_FEED_SIZE):
+        """
+        A page of events, newest first.
+
+        :param marker: The ID of the last event of the previous page, or
+            ``None`` for the first page.
+        :param int limit: The most events on the page.
+
+        :return: a 2-tuple of the events on the page and the marker for the
+            next page, or ``None`` if this is the last one.
+        """
+        older = len(self._events)
+        if marker is not None:
+            oldest_id = self.next_id - len(self._events)
+            older = max(0, min(older, marker - oldest_id))
+        events = list(islice(reversed(self._events),
+                             len(self._events) - older,
+                             len(self._events) - older + limit))
+        return events, (events[-1][0] if older > limit else None)
 
 
 @attr.s
@@ -50,6 +124,7 @@ class Node(object):
     :ivar str condition: One of (ENABLED, DISABLED, DRAINING).  Defaults to
     :ivar str status: "Online"
         ENABLED.
+    :ivar NodeFeed feed_events: The node's recent events.
     """
     address = attr.ib(validator=attr.validators.instance_of(text_type))
     port = attr.ib(validator=attr.validators.instance_of(int))
@@ -63,7 +138,7 @@ class Node(object):
                  default=attr.Factory(lambda: randrange(999999)))
     status = attr.ib(validator=attr.validators.instance_of(text_type),
                      default="ONLINE")
-    feed_events = attr.ib(default=[])
+    feed_events = attr.ib(default=attr.Factory(NodeFeed))
 
     @classmethod
     def from_json(cls, json_blob):
@@ -104,9 +179,31 @@ class CLB(object):
     as an attribute, and provides __getitem__ and __setitem__ to access it.
 
     These should be moved to real attributes as soon as possible.
+
+    :ivar float updated: When the load balancer was last updated, in seconds
+        since the epoch; the JSON holds the same time, formatted.
+    :ivar _transition: The :obj:`IDelayedCall` for the load balancer's next
+        status transition, if one is scheduled.
+    :ivar OrderedDict _nodes_by_id: A mapping of node ID to :obj:`Node`, in
+        the order the nodes were added.
+    :ivar dict _nodes_by_address: A mapping of ``(address, port)`` to
+        :obj:`Node`, so that duplicate nodes are found without comparing
+        every pair.
+    :ivar node_limit: The most nodes this load balancer may have, or
+        ``None`` to use the limit of its :obj:`RegionalCLBCollection`.
+    :ivar _index: The :obj:`LoadBalancerIndex` of the load balancer's
+        collection, if it has one, which is told the addresses of its nodes.
+    :ivar dict _address_counts: A mapping of each node address to the number
+        of nodes with that address.
     """
     _json = attr.ib()
-    nodes = attr.ib(default=attr.Factory(list))
+    updated = attr.ib(default=None)
+    node_limit = attr.ib(default=None)
+    _index = attr.ib(default=None, repr=False)
+    _transition = attr.ib(default=None, repr=False)
+    _nodes_by_id = attr.ib(default=attr.Factory(OrderedDict), repr=False)
+    _nodes_by_address = attr.ib(default=attr.Factory(dict), repr=False)
+    _address_counts = attr.ib(default=attr.Factory(dict), repr=False)
 
     def __getitem__(self, key):
         """
@@ -129,6 +226,104 @@ class CLB(object):
         """
         self._json.update(new_json_dict)
 
+    @property
+    def nodes(self):
+        """
+        The nodes on the load balancer, in the order they were added.
+        """
+        return list(self._nodes_by_id.values())
+
+    def node_count(self):
+        """
+        The number of nodes on the load balancer.
+        """
+        return len(self._nodes_by_id)
+
+    def node_by_id(self, node_id):
+        """
+        The node with the given ID, or ``None`` if there is none.
+        """
+        return self._nodes_by_id.get(node_id)
+
+    def node_at(self, address, port):
+        """
+        The node with the given address and port, or ``None`` if there is
+        none.
+        """
+        return self._nodes_by_address.get((address, port))
+
+    def node_addresses(self):
+        """
+        The distinct addresses of the nodes on the load balancer.
+        """
+        return list(self._address_counts)
+
+    def add_nodes(self, nodes):
+        """
+        Add nodes to the load balancer.  A node whose ID is already taken is
+        given a new one.
+        """
+        for node in nodes:
+            while node.id in self._nodes_by_id:
+                node.id = randrange(999999)
+            self._nodes_by_id[node.id] = node
+            self._nodes_by_address[node.address, node.port] = node
+            count = self._address_counts.get(node.address, 0)
+            self._address_counts[node.address] = count + 1
+            if count == 0 and self._index is not None:
+                self._index.add(("nodeaddress", node.address),
+                                self._json["id"])
+
+    def replace_node(self, node):
+        """
+        Replace the node with the same ID (and address and port) as ``node``
+        with ``node``, keeping its place.
+        """
+        self._nodes_by_id[node.id] = node
+        self._nodes_by_address[node.address, node.port] = node
+
+    def remove_node(self, node_id):
+        """
+        Remove the node with the given ID.
+
+        :return: the removed :obj:`Node`, or ``None`` if there was none.
+        """
+        node = self._nodes_by_id.pop(node_id, None)
+        if node is not None:
+            key = (node.address, node.port)
+            if self._nodes_by_address.get(key) is node:
+                del self._nodes_by_address[key]
+            self._address_counts[node.address] -= 1
+            if self._address_counts[node.address] == 0:
+                del self._address_counts[node.address]
+                if self._index is not None:
+                    self._index.discard(("nodeaddress", node.address),
+                                        self._json["id"])
+        return node
+
+    def touch(self, seconds):
+        """
+        Set the time the load balancer was last updated.
+        """
+        self.updated = seconds
+        self._json["updated"] = {"time": seconds_to_timestamp(seconds)}
+
+    def schedule_transition(self, clock, delay, transition):
+        """
+        Replace any scheduled status transition with a call to
+        ``transition`` in ``delay`` seconds.
+        """
+        self.cancel_transition()
+        self._transition = clock.callLater(delay, transition)
+
+    def cancel_transition(self):
+        """
+        Cancel the scheduled status transition, if there is one.
+        """
+        if self._transition is not None and self._transition.active():
+            self._transition.cancel()
+        self._transition = None
+
     def short_json(self):
         """
         :return: a short JSON dict representation of this object to be used
@@ -138,7 +333,7 @@ class CLB(object):
         entries = ('name', 'protocol', 'id', 'port', 'algorithm', 'status',
                    'timeout', 'created', 'virtualIps', 'updated')
         result = {entry: self._json[entry] for entry in entries}
-        result['nodeCount'] = len(self.nodes)
+        result['nodeCount'] = self.node_count()
         return result
 
     def full_json(self):
@@ -148,7 +343,7 @@ class CLB(object):
         a "nodeCount" attribute.
         """
         result = deepcopy(self._json)
-        if len(self.nodes) > 0:
+        if self._nodes_by_id:
             result["nodes"] = [node.as_json() for node in self.nodes]
         return result
 
@@ -179,38 +374,127 @@ class BadValueError(Exception):
     value = attr.ib()
     accepted_values = attr.ib()
     code = attr.ib(validator=attr.validators.instance_of(int), default=400)
+    attribute = attr.ib(default="status")
 
     def to_json(self):
         """
         :return: a JSON dict representation of this error.
         """
-        return {'message': ('Unsupported status {0} not one of {1}'.format(
-                            self.value, self.accepted_values)),
+        return {'message': ('Unsupported {0} {1} not one of {2}'.format(
+                            self.attribute, self.value,
+                            self.accepted_values)),
                 'code': self.code}
 
 
-def node_feed_xml(events):
+def node_feed_xml(events, next_marker=None, limit=DEFAULT_NODE_FEED_SIZE):
     """
-    Return feed of node events
+    Generate a page of a feed of node events, as Atom, a piece at a time.
+
+    :param events: the ``(id, summary, updated)`` events on the page, as
+        returned by :obj:`NodeFeed.page`.
+    :param next_marker: the marker for the next page, if there is one, which
+        is linked to relative to the feed.
+    :param int limit: the number of events per page.
     """
-    feed = '<feed xmlns="http://www.w3.org/2005/Atom">{entries}</feed>'
+    yield '<feed xmlns="http://www.w3.org/2005/Atom">'
+    if next_marker is not None:
+        yield '<link rel="next" href={0}/>'.format(quoteattr(
+            "?marker={0}&limit={1}".format(next_marker, limit)))
     entry = ('<entry><summary>{summary}</summary>'
              '<updated>{updated}</updated></entry>')
-    entries = [entry.format(summary=summary, updated=updated)
-               for summary, updated in events]
-    return feed.format(entries=''.join(entries))
+    for _, summary, updated in events:
+        yield entry.format(summary=escape(summary), updated=updated)
+    yield '</feed>'
+
+
+def _check_positive(attribute, value):
+    """
+    Raise :obj:`BadValueError` unless ``value`` is a positive integer, as
+    node limits and feed sizes must be.
+    """
+    if (isinstance(value, bool) or not isinstance(value, integer_types) or
+            value < 1):
+        raise BadValueError(value=value, accepted_values="positive integers",
+                            attribute=attribute)
+
+
+def _node_limit_exceeded(limit):
+    """
+    The response when adding nodes would exceed the node limit.
+    """
+    return invalid_resource(
+        "Nodes must not exceed {0} per load balancer.".format(limit),
+        413), 413
+
+
+def _duplicate_nodes():
+    """
+    The response when nodes duplicate each other, or existing nodes.
+    """
+    return invalid_resource(
+        "Duplicate nodes detected. One or more nodes "
+        "already configured on load balancer.", 413), 413
+
+
+@attr.s
+class LoadBalancerIndex(object):
+    """
+    Load balancer IDs in ascending order, grouped by keys such as
+    ``("status", "ACTIVE")`` or ``("nodeaddress", "10.0.0.1")``, so that a
+    page of the load balancers with a given key can be found without looking
+    at any others.
+
+    :ivar dict _ids: A mapping of each key to a sorted list of IDs.
+    """
+    _ids = attr.ib(default=attr.Factory(dict))
+
+    def add(self, key, lb_id):
+        """
+        Add a load balancer ID under ``key``.
+        """
+        ids = self._ids.setdefault(key, [])
+        i = bisect_left(ids, lb_id)
+        if i == len(ids) or ids[i] != lb_id:
+            ids.insert(i, lb_id)
+
+    def discard(self, key, lb_id):
+        """
+        Remove a load balancer ID from under ``key``, if it is there.
+        """
+        ids = self._ids.get(key, [])
+        i = bisect_left(ids, lb_id)
+        if i < len(ids) and ids[i] == lb_id:
+            del ids[i]
+            if not ids:
+                del self._ids[key]
+
+    def ids(self, key, marker=None):
+        """
+        The load balancer IDs under ``key``, in ascending order, after
+        ``marker`` if it is given.
+        """
+        ids = self._ids.get(key, [])
+        if marker is None:
+            return iter(ids)
+        return islice(ids, bisect_right(ids, marker), None)
 
 
 @attr.s
 class RegionalCLBCollection(object):
     """
     A collection of CloudLoadBalancers, in a given region, for a given tenant.
+
+    :ivar LoadBalancerIndex _index: The load balancers' IDs, all under the
+        key ``None``, and by status and node address.
     """
     clock = attr.ib(validator=attr.validators.provides(IReactorTime))
     node_limit = attr.ib(default=25,
                          validator=attr.validators.instance_of(int))
+    node_feed_size = attr.ib(default=DEFAULT_NODE_FEED_SIZE,
+                             validator=attr.validators.instance_of(int))
     lbs = attr.ib(default=attr.Factory(dict))
     meta = attr.ib(default=attr.Factory(dict))
+    _index = attr.ib(default=attr.Factory(LoadBalancerIndex), repr=False)
 
     def lb_in_region(self, clb_id):
         """
@@ -228,6 +512,8 @@ class RegionalCLBCollection(object):
         :param string lb_id: Unique ID for this load balancer.
         """
         status = "ACTIVE"
+        if lb_id in self.lbs:
+            self._remove(lb_id)
 
         # Loadbalancers metadata is a list object, creating a metadata store
         # so we dont have to deal with the list
@@ -236,77 +522,116 @@ class RegionalCLBCollection(object):
             for each in lb_info["metadata"]:
                 meta.update({each["key"]: each["value"]})
         self.meta[lb_id] = meta
-        log.msg(self.meta)
 
         if "lb_building" in self.meta[lb_id]:
             status = "BUILD"
 
-        current_timestring = seconds_to_timestamp(self.clock.seconds())
+        current_timestamp = self.clock.seconds()
+        current_timestring = seconds_to_timestamp(current_timestamp)
         self.lbs[lb_id] = CLB(load_balancer_example(lb_info, lb_id, status,
                                                     current_timestring),
-                              nodes=[Node.from_json(blob)
-                                     for blob in lb_info.get("nodes", [])])
+                              updated=current_timestamp, index=self._index)
+        self._index.add(None, lb_id)
+        self.lbs[lb_id].add_nodes([Node.from_json(blob)
+                                   for blob in lb_info.get("nodes", [])])
+        self._set_status(lb_id, status)
 
         return {'loadBalancer': self.lbs[lb_id].full_json()}, 202
 
-    def _verify_and_update_lb_state(self, lb_id, set_state=True,
-                                    current_timestamp=None):
+    def _set_status(self, lb_id, status, touch=False):
+        """
+        Put a load balancer into ``status``, and schedule the transition out
+        of it, if that status has one.  Based on the metadata on the lb:
+
+        - ``BUILD`` becomes ``ACTIVE`` after ``lb_building`` seconds
+          (default 10).
+        - ``PENDING-UPDATE`` becomes ``ACTIVE`` after ``lb_pending_update``
+          seconds, if that is set.
+        - ``PENDING-DELETE`` becomes ``DELETED`` after ``lb_pending_delete``
+          seconds (default 10).
+        - ``DELETED`` load balancers are forgotten after an hour.
+
+        Each delay is counted from the last time the load balancer was
+        updated, so reads never need to check whether a transition is due.
+
+        :param bool touch: Whether to set the time the load balancer was last
+            updated to now.
+        """
+        lb = self.lbs[lb_id]
+        lb.cancel_transition()
+        self._index.discard(("status", lb["status"]), lb_id)
+        self._index.add(("status", status), lb_id)
+        lb["status"] = status
+        if touch:
+            lb.touch(self.clock.seconds())
+        meta = self.meta[lb_id]
+        if status == "BUILD":
+            meta["lb_building"] = meta.get("lb_building") or 10
+            self._schedule(lb_id, meta["lb_building"],
+                           lambda: self._set_status(lb_id, "ACTIVE"))
+        elif status == "PENDING-UPDATE" and "lb_pending_update" in meta:
+            self._schedule(lb_id, meta["lb_pending_update"],
+                           lambda: self._set_status(lb_id, "ACTIVE"))
+        elif status == "PENDING-DELETE":
+            meta["lb_pending_delete"] = meta.get("lb_pending_delete") or 10
+            self._schedule(lb_id, meta["lb_pending_delete"],
+                           lambda: self._set_status(lb_id, "DELETED",
+                                                    touch=True))
+        elif status == "DELETED":
+            # see del_load_balancer below for an explanation of this state
+            # change.
+            self._schedule(lb_id, 3600, lambda: self._remove(lb_id))
+
+    def _schedule(self, lb_id, seconds, transition):
+        """
+        Call ``transition`` once ``seconds`` (truncated to a whole number)
+        have passed since the load balancer was last updated; right away, if
+        they already have.
+        """
+        lb = self.lbs[lb_id]
+        delay = lb.updated + int(seconds) - self.clock.seconds()
+        if delay <= 0:
+            transition()
+        else:
+            lb.schedule_transition(self.clock, delay, transition)
+
+    def _remove(self, lb_id):
+        """
+        Forget a load balancer, and cancel its pending status transition.
         """
-        Based on the current state, the metadata on the lb and the time since the LB has
-        been in that state, set the appropriate state in self.lbs
+        lb = self.lbs.pop(lb_id)
+        lb.cancel_transition()
+        self.meta.pop(lb_id, None)
+        self._index.discard(None, lb_id)
+        self._index.discard(("status", lb["status"]), lb_id)
+        for address in lb.node_addresses():
+            self._index.discard(("nodeaddress", address), lb_id)
+
+    def _lb_changed(self, lb_id):
+        """
+        Note that an ``ACTIVE`` load balancer has been changed: it has just
+        been updated, and based on its metadata it goes into
+        ``PENDING-UPDATE``, ``PENDING-DELETE`` or ``ERROR``.
         Note: Reconsider if update metadata is implemented
         """
-        current_timestring = seconds_to_timestamp(current_timestamp)
-        if self.lbs[lb_id]["status"] == "BUILD":
-            self.meta[lb_id]["lb_building"] = self.meta[lb_id]["lb_building"] or 10
-            self.lbs[lb_id]["status"] = set_resource_status(
-                self.lbs[lb_id]["updated"]["time"],
-                self.meta[lb_id]["lb_building"],
-                current_timestamp=current_timestamp
-            ) or "BUILD"
-
-        elif self.lbs[lb_id]["status"] == "ACTIVE" and set_state:
-            if "lb_pending_update" in self.meta[lb_id]:
-                self.lbs[lb_id]["status"] = "PENDING-UPDATE"
-                log.msg(self.lbs[lb_id]["status"])
-            if "lb_pending_delete" in self.meta[lb_id]:
-                self.lbs[lb_id]["status"] = "PENDING-DELETE"
-            if "lb_error_state" in self.meta[lb_id]:
-                self.lbs[lb_id]["status"] = "ERROR"
-            self.lbs[lb_id]["updated"]["time"] = current_timestring
-
-        elif self.lbs[lb_id]["status"] == "PENDING-UPDATE":
-            if "lb_pending_update" in self.meta[lb_id]:
-                self.lbs[lb_id]["status"] = set_resource_status(
-                    self.lbs[lb_id]["updated"]["time"],
-                    self.meta[lb_id]["lb_pending_update"],
-                    current_timestamp=current_timestamp
-                ) or "PENDING-UPDATE"
-
-        elif self.lbs[lb_id]["status"] == "PENDING-DELETE":
-            self.meta[lb_id]["lb_pending_delete"] = self.meta[lb_id]["lb_pending_delete"] or 10
-            self.lbs[lb_id]["status"] = set_resource_status(
-                self.lbs[lb_id]["updated"]["time"],
-                self.meta[lb_id]["lb_pending_delete"], "DELETED",
-                current_timestamp=current_timestamp
-            ) or "PENDING-DELETE"
-            self.lbs[lb_id]["updated"]["time"] = current_timestring
-
-        elif self.lbs[lb_id]["status"] == "DELETED":
-            # see del_load_balancer above for an explanation of this state change.
-            self.lbs[lb_id]["status"] = set_resource_status(
-                self.lbs[lb_id]["updated"]["time"], 3600, "DELETING-NOW",
-                current_timestamp=current_timestamp
-            ) or "DELETED"
-            if self.lbs[lb_id]["status"] == "DELETING-NOW":
-                del self.lbs[lb_id]
+        if self.lbs[lb_id]["status"] != "ACTIVE":
+            return
+        meta = self.meta[lb_id]
+        status = "ACTIVE"
+        if "lb_error_state" in meta:
+            status = "ERROR"
+        elif "lb_pending_delete" in meta:
+            status = "PENDING-DELETE"
+        elif "lb_pending_update" in meta:
+            status = "PENDING-UPDATE"
+        self._set_status(lb_id, status, touch=True)
 
     def set_attributes(self, lb_id, kvpairs):
         """
         Sets zero or more attributes on the load balancer object.
-        Currently supported attributes include: status.
+        Currently supported attributes include: status, node_limit.
         """
-        supported_keys = ["status"]
+        supported_keys = ["status", "node_limit"]
         badKeys = []
         for k in kvpairs:
             if k not in supported_keys:
@@ -323,8 +648,35 @@ class RegionalCLBCollection(object):
                 raise BadValueError(
                     value=s, accepted_values=supported_statuses
                 )
+        if "node_limit" in kvpairs:
+            _check_positive("node_limit", kvpairs["node_limit"])
+
+        if "status" in kvpairs:
+            self._set_status(lb_id, kvpairs["status"])
+        if "node_limit" in kvpairs:
+            self.lbs[lb_id].node_limit = kvpairs["node_limit"]
+
+    def set_default_attributes(self, kvpairs):
+        """
+        Sets zero or more attributes on this collection, which apply to each
+        of its load balancers unless set on the load balancer itself.
+        Currently supported attributes include: node_limit, node_feed_size.
+        """
+        supported_keys = ["node_limit", "node_feed_size"]
+        badKeys = [k for k in kvpairs if k not in supported_keys]
+        if badKeys:
+            raise BadKeysError(keys=badKeys)
+        for k in kvpairs:
+            _check_positive(k, kvpairs[k])
+        for k in kvpairs:
+            setattr(self, k, kvpairs[k])
 
-        self.lbs[lb_id].update(kvpairs)
+    def _node_limit(self, lb_id):
+        """
+        The most nodes a load balancer may have.
+        """
+        limit = self.lbs[lb_id].node_limit
+        return self.node_limit if limit is None else limit
 
     def get_load_balancers(self, lb_id):
         """
@@ -332,8 +684,6 @@ class RegionalCLBCollection(object):
         code 200. If no load balancers are found returns 404.
         """
         if lb_id in self.lbs:
-            self._verify_and_update_lb_state(lb_id, False, self.clock.seconds())
-            log.msg(self.lbs[lb_id]["status"])
             return {'loadBalancer': self.lbs[lb_id].full_json()}, 200
         return not_found_response("loadbalancer"), 404
 
@@ -342,52 +692,73 @@ class RegionalCLBCollection(object):
         Returns the node on the load balancer
         """
         if lb_id in self.lbs:
-            self._verify_and_update_lb_state(lb_id, False, self.clock.seconds())
-
             if self.lbs[lb_id]["status"] == "DELETED":
                 return (
                     invalid_resource(
                         "The loadbalancer is marked as deleted.", 410),
                     410)
 
-            for each in self.lbs[lb_id].nodes:
-                if node_id == each.id:
-                    return {"node": each.as_json()}, 200
+            node = self.lbs[lb_id].node_by_id(node_id)
+            if node is not None:
+                return {"node": node.as_json()}, 200
 
             return not_found_response("node"), 404
 
         return not_found_response("loadbalancer"), 404
 
-    def get_node_feed(self, lb_id, node_id):
+    def get_node_feed(self, lb_id, node_id, marker=None,
+                      limit=DEFAULT_NODE_FEED_SIZE):
         """
-        Return load balancer's node's atom feed
+        Return a page of load balancer's node's atom feed, newest event first,
+        as an iterable of pieces of XML.
+
+        :param marker: the ID of the last event of the previous page, or
+            ``None`` for the first page.
+        :param int limit: the most events on the page.
         """
         if lb_id not in self.lbs:
             return not_found_xml("Load balancer")
 
-        self._verify_and_update_lb_state(lb_id, False, self.clock.seconds())
-
         if self.lbs[lb_id]["status"] == "DELETED":
             return lb_deleted_xml()
 
-        for node in self.lbs[lb_id].nodes:
-            if node_id == node.id:
-                return node_feed_xml(node.feed_events), 200
+        node = self.lbs[lb_id].node_by_id(node_id)
+        if node is not None:
+            node.feed_events.resize(self.node_feed_size)
+            events, next_marker = node.feed_events.page(marker, limit)
+            return node_feed_xml(events, next_marker, limit), 200
 
         return not_found_xml("Node")
 
-    def list_load_balancers(self):
+    def list_load_balancers(self, marker=None, limit=None, status=None,
+                            nodeaddress=None):
         """
         Returns the list of load balancers with the given tenant id with response
-        code 200. If no load balancers are found returns empty list.
+        code 200, in order of ID. If no load balancers are found returns empty
+        list.
+
+        :param marker: the ID of the last load balancer on the previous page,
+            or ``None`` for the first page.
+        :param limit: the most load balancers to list, or ``None`` for all of
+            them.
+        :param status: if given, only list load balancers in this status.
+        :param nodeaddress: if given, only list load balancers with a node
+            with this address.
 
         :return: A 2-tuple, containing the HTTP response and code, in that order.
         """
-        for lb_id in self.lbs:
-            self._verify_and_update_lb_state(lb_id, False, self.clock.seconds())
-            log.msg(self.lbs[lb_id]["status"])
+        if nodeaddress is not None:
+            ids = self._index.ids(("nodeaddress", nodeaddress), marker)
+            if status is not None:
+                ids = (lb_id for lb_id in ids
+                       if self.lbs[lb_id]["status"] == status)
+        elif status is not None:
+            ids = self._index.ids(("status", status), marker)
+        else:
+            ids = self._index.ids(None, marker)
         return (
-            {'loadBalancers': [lb.short_json() for lb in self.lbs.values()]},
+            {'loadBalancers': [self.lbs[lb_id].short_json()
+                               for lb_id in islice(ids, limit)]},
             200)
 
     def list_nodes(self, lb_id):
@@ -395,10 +766,6 @@ class RegionalCLBCollection(object):
         Returns the list of nodes remaining on the load balancer
         """
         if lb_id in self.lbs:
-            self._verify_and_update_lb_state(lb_id, False, self.clock.seconds())
-            if lb_id not in self.lbs:
-                return not_found_response("loadbalancer"), 404
-
             if self.lbs[lb_id]["status"] == "DELETED":
                 return invalid_resource("The loadbalancer is marked as deleted.", 410), 410
 
@@ -413,31 +780,20 @@ class RegionalCLBCollection(object):
         """
         Deletes a node by ID.
         """
-        if self.lbs[lb_id].nodes:
-            previous_size = len(self.lbs[lb_id].nodes)
-            self.lbs[lb_id].nodes[:] = [node
-                                        for node in self.lbs[lb_id].nodes
-                                        if node.id != node_id]
-            return len(self.lbs[lb_id].nodes) < previous_size
-        return False
+        return self.lbs[lb_id].remove_node(node_id) is not None
 
     def delete_node(self, lb_id, node_id):
         """
         Determines whether the node to be deleted exists in the session store,
         deletes the node, and returns the response code.
         """
-        current_timestamp = self.clock.seconds()
         if lb_id in self.lbs:
-
-            self._verify_and_update_lb_state(lb_id, False, current_timestamp)
-
             if self.lbs[lb_id]["status"] != "ACTIVE":
                 # Error message verified as of 2015-04-22
                 return considered_immutable_error(
                     self.lbs[lb_id]["status"], lb_id)
 
-            self._verify_and_update_lb_state(
-                lb_id, current_timestamp=current_timestamp)
+            self._lb_changed(lb_id)
 
             if self._delete_node(lb_id, node_id):
                 return None, 202
@@ -459,9 +815,6 @@ class RegionalCLBCollection(object):
         if lb_id not in self.lbs:
             return not_found_response("loadbalancer"), 404
 
-        current_timestamp = self.clock.seconds()
-        self._verify_and_update_lb_state(lb_id, False, current_timestamp)
-
         if self.lbs[lb_id]["status"] != "ACTIVE":
             # Error message verified as of 2015-04-22
             resp = {"message": "LoadBalancer is not ACTIVE",
@@ -470,8 +823,9 @@ class RegionalCLBCollection(object):
 
         # We need to verify all the deletions up front, and only allow it through
         # if all of them are valid.
-        all_ids = [node.id for node in self.lbs[lb_id].nodes]
-        non_nodes = set(node_ids).difference(all_ids)
+        lb = self.lbs[lb_id]
+        non_nodes = set(node_id for node_id in node_ids
+                        if lb.node_by_id(node_id) is None)
         if non_nodes:
             nodes = ','.join(map(str, sorted(non_nodes)))
             resp = {
@@ -485,13 +839,12 @@ class RegionalCLBCollection(object):
                 "details": "The object is not valid"}
             return resp, 400
 
-        for node_id in node_ids:
+        for node_id in set(node_ids):
             # It should not be possible for this to fail, since we've already
             # checked that they all exist.
             assert self._delete_node(lb_id, node_id) is True
 
-        self._verify_and_update_lb_state(
-            lb_id, current_timestamp=current_timestamp)
+        self._lb_changed(lb_id)
         return EMPTY_RESPONSE, 202
 
     def add_node(self, node_list, lb_id):
@@ -507,35 +860,27 @@ class RegionalCLBCollection(object):
         :return: a `tuple` of (json response as a dict, http status code)
         """
         if lb_id in self.lbs:
-            current_timestamp = self.clock.seconds()
-            self._verify_and_update_lb_state(lb_id, False, current_timestamp)
-
             if self.lbs[lb_id]["status"] != "ACTIVE":
                 return considered_immutable_error(
                     self.lbs[lb_id]["status"], lb_id)
 
+            lb = self.lbs[lb_id]
             nodes = [Node.from_json(blob) for blob in node_list]
 
-            for existing_node in self.lbs[lb_id].nodes:
-                for new_node in nodes:
-                    if existing_node.same_as(new_node):
-                        resource = invalid_resource(
-                            "Duplicate nodes detected. One or more nodes "
-                            "already configured on load balancer.", 413)
-                        return (resource, 413)
+            new_addresses = set((node.address, node.port) for node in nodes)
+            if (len(new_addresses) < len(nodes) or
+                    any(lb.node_at(address, port) is not None
+                        for (address, port) in new_addresses)):
+                return _duplicate_nodes()
 
             # If there were no duplicates
-            new_nodeCount = len(self.lbs[lb_id].nodes) + len(nodes)
-            if new_nodeCount <= self.node_limit:
-                self.lbs[lb_id].nodes = self.lbs[lb_id].nodes + nodes
+            new_nodeCount = lb.node_count() + len(nodes)
+            if new_nodeCount <= self._node_limit(lb_id):
+                lb.add_nodes(nodes)
             else:
-                resource = invalid_resource(
-                    "Nodes must not exceed {0} "
-                    "per load balancer.".format(self.node_limit), 413)
-                return (resource, 413)
+                return _node_limit_exceeded(self._node_limit(lb_id))
 
-            self._verify_and_update_lb_state(
-                lb_id, current_timestamp=current_timestamp)
+            self._lb_changed(lb_id)
             return {"nodes": [node.as_json() for node in nodes]}, 202
 
         return not_found_response("loadbalancer"), 404
@@ -556,9 +901,6 @@ class RegionalCLBCollection(object):
 
         :return: a `tuple` of (json response as a dict, http status code)
         """
-        feed_summary = (
-            "Node successfully updated with address: '{address}', port: '{port}', "
-            "weight: '{weight}', condition: '{condition}'")
         # first, store whether address and port were provided - if they were
         # that's a validation error not a schema error
         things_wrong = {k: True for k in ("address", "port", "id")
@@ -579,26 +921,95 @@ class RegionalCLBCollection(object):
 
         # Now, finally, check if the LB exists and node exists
         if lb_id in self.lbs:
-            self._verify_and_update_lb_state(lb_id, False, self.clock.seconds())
-
             if self.lbs[lb_id]["status"] != "ACTIVE":
                 return considered_immutable_error(
                     self.lbs[lb_id]["status"], lb_id)
 
-            for i, node in enumerate(self.lbs[lb_id].nodes):
-                if node.id == node_id:
-                    params = attr.asdict(node)
-                    params.update(node_updates)
-                    self.lbs[lb_id].nodes[i] = Node(**params)
-                    self.lbs[lb_id].nodes[i].feed_events.append(
-                        (feed_summary.format(**params),
-                         seconds_to_timestamp(self.clock.seconds())))
-                    return ("", 202)
+            node = self.lbs[lb_id].node_by_id(node_id)
+            if node is not None:
+                self.lbs[lb_id].replace_node(
+                    self._updated_node(node, node_updates))
+                return ("", 202)
 
             return node_not_found()
 
         return loadbalancer_not_found()
 
+    def _updated_node(self, node, node_updates):
+        """
+        A copy of ``node`` with the given updates to its weight, condition
+        or type, recording the update in its feed.
+        """
+        feed_summary = (
+            "Node successfully updated with address: '{address}', port: '{port}', "
+            "weight: '{weight}', condition: '{condition}'")
+        params = attr.asdict(node, recurse=False)
+        params.update(node_updates)
+        node = Node(**params)
+        node.feed_events.resize(self.node_feed_size)
+        node.feed_events.append(feed_summary.format(**params),
+                                seconds_to_timestamp(self.clock.seconds()))
+        return node
+
+    def apply_nodes(self, lb_id, node_list, replace=False):
+        """
+        Apply a whole set of nodes to a load balancer in one pass, for the
+        control API.  Each node is matched to an existing node by address and
+        port: existing nodes are given the ``weight``, ``condition`` and
+        ``type`` specified for them (keeping their IDs), and the rest are
+        added.  If ``replace`` is true, existing nodes which are not in the
+        set are removed.
+
+        Nothing is changed unless the whole set is valid and, once applied,
+        within the load balancer's node limit.  Unlike the regular API, the
+        load balancer may be in any status but ``DELETED``, and applying the
+        nodes does not change it.
+
+        :param list node_list: a `list` of `dict` containing specification
+            for nodes
+        :param bool replace: Whether to remove the nodes not in
+            ``node_list``.
+
+        :return: a `tuple` of (json response as a dict, http status code)
+        """
+        if lb_id not in self.lbs:
+            return loadbalancer_not_found()
+        lb = self.lbs[lb_id]
+        if lb["status"] == "DELETED":
+            return (invalid_resource(
+                "The loadbalancer is marked as deleted.", 410), 410)
+
+        try:
+            nodes = [Node.from_json(dict(blob)) for blob in node_list]
+        except (TypeError, ValueError, KeyError):
+            return invalid_json_schema()
+        if not all(1 <= node.weight <= 100 for node in nodes):
+            return updating_node_validation_error(weight=True)
+        addresses = set((node.address, node.port) for node in nodes)
+        if len(addresses) < len(nodes):
+            return _duplicate_nodes()
+
+        added = [node for node in nodes
+                 if lb.node_at(node.address, node.port) is None]
+        node_count = len(nodes) if replace else lb.node_count() + len(added)
+        if node_count > self._node_limit(lb_id):
+            return _node_limit_exceeded(self._node_limit(lb_id))
+
+        if replace:
+            for node in lb.nodes:
+                if (node.address, node.port) not in addresses:
+                    lb.remove_node(node.id)
+        for blob, node in zip(node_list, nodes):
+            existing = lb.node_at(node.address, node.port)
+            if existing is None:
+                continue
+            updates = {k: blob[k] for k in ("weight", "condition", "type")
+                       if k in blob and blob[k] != getattr(existing, k)}
+            if updates:
+                lb.replace_node(self._updated_node(existing, updates))
+        lb.add_nodes(added)
+        return {"nodes": [node.as_json() for node in lb.nodes]}, 200
+
     def del_load_balancer(self, lb_id):
         """
         Returns response for a load balancer
@@ -608,28 +1019,24 @@ class RegionalCLBCollection(object):
         status until a nightly job(maybe?)
         """
         if lb_id in self.lbs:
-            current_timestamp = self.clock.seconds()
-
             if self.lbs[lb_id]["status"] == "PENDING-DELETE":
                 msg = ("Must provide valid load balancers: {0} are immutable and "
                        "could not be processed.".format(lb_id))
                 # Dont doubt this to be 422, it is 400!
                 return invalid_resource(msg, 400), 400
 
-            self._verify_and_update_lb_state(lb_id, True, current_timestamp)
+            self._lb_changed(lb_id)
 
             if any([self.lbs[lb_id]["status"] == "ACTIVE",
                     self.lbs[lb_id]["status"] == "ERROR",
                     self.lbs[lb_id]["status"] == "PENDING-UPDATE"]):
-                del self.lbs[lb_id]
+                self._remove(lb_id)
                 return EMPTY_RESPONSE, 202
 
             if self.lbs[lb_id]["status"] == "PENDING-DELETE":
                 return EMPTY_RESPONSE, 202
 
             if self.lbs[lb_id]["status"] == "DELETED":
-                self._verify_and_update_lb_state(
-                    lb_id, current_timestamp=current_timestamp)
                 msg = "Must provide valid load balancers: {0} could not be found.".format(lb_id)
                 # Dont doubt this to be 422, it is 400!
                 return invalid_resource(msg, 400), 400
@@ -11,70 +11,141 @@ from json import dumps
 from mimic.model.flavors import (
     RackspaceStandardFlavor, RackspaceComputeFlavor, RackspaceMemoryFlavor,
     RackspaceOnMetalFlavor, RackspaceIOFlavor, RackspaceGeneralFlavor,
-    RackspacePerformance1Flavor, RackspacePerformance2Flavor)
+    RackspacePerformance1Flavor, RackspacePerformance2Flavor,
+    flavor_links_json)
 
 from mimic.model.nova_objects import not_found
 
 
+_LINKS_PLACEHOLDER = "mimic-flavor-links"
+
+
+def _render_around_links(json_object):
+    """
+    Encode a JSON-serializable object, whose ``"links"`` are
+    ``_LINKS_PLACEHOLDER``, as the text before and the text after the links.
+    """
+    json_object["links"] = _LINKS_PLACEHOLDER
+    before, after = dumps(json_object).split(dumps(_LINKS_PLACEHOLDER))
+    return before, after
+
+
+@attr.s
+class FlavorCatalog(object):
+    """
+    The flavors offered by every region, shared by every tenant.
+
+    The flavors themselves never change, so they are created once, and their
+    JSON is encoded once; only the links, which depend on the tenant and the
+    URL Mimic was accessed by, are encoded for each response.
+
+    :ivar tuple flavors: Every :obj:`Flavor`, in order.  Their ``tenant_id``
+        is ``None``.
+    :ivar tuple _without_onmetal: ``flavors``, less the OnMetal flavors.
+    """
+    flavors = attr.ib()
+    _without_onmetal = attr.ib(repr=False)
+    _by_id = attr.ib(repr=False)
+    _brief = attr.ib(repr=False)
+    _detailed = attr.ib(repr=False)
+
+    @classmethod
+    def from_flavor_classes(cls, flavor_classes):
+        """
+        Create a catalog of every flavor of each of the given :obj:`Flavor`
+        subclasses.
+        """
+        flavors = tuple(
+            flavor_class(flavor_id=flavor_spec['id'], tenant_id=None,
+                         name=flavor_name, ram=flavor_spec['ram'],
+                         vcpus=flavor_spec['vcpus'],
+                         rxtx=flavor_spec['rxtx_factor'],
+                         disk=flavor_spec['disk'])
+            for flavor_class in flavor_classes
+            for flavor_name, flavor_spec in iteritems(flavor_class.flavors))
+
+        def no_links(path):
+            return None
+
+        return cls(
+            flavors=flavors,
+            without_onmetal=tuple(
+                flavor for flavor in flavors
+                if not isinstance(flavor, RackspaceOnMetalFlavor)),
+            by_id=dict((flavor.flavor_id, flavor) for flavor in flavors),
+            brief=dict(
+                (flavor.flavor_id,
+                 _render_around_links(flavor.brief_json(no_links)))
+                for flavor in flavors),
+            detailed=dict(
+                (flavor.flavor_id,
+                 _render_around_links(flavor.detailed_json(no_links)))
+                for flavor in flavors))
+
+    def flavor_by_id(self, flavor_id):
+        """
+        Retrieve a :obj:`Flavor` object by its ID.
+        """
+        return self._by_id.get(flavor_id)
+
+    def flavors_for_region(self, region_name):
+        """
+        The flavors offered in the given region; OnMetal flavors are only
+        offered in IAD.
+        """
+        if region_name == "IAD":
+            return self.flavors
+        return self._without_onmetal
+
+    def render(self, flavor, include_details, tenant_id, absolutize_url):
+        """
+        Encode the JSON for a flavor, as seen by the given tenant.
+
+        :return: the JSON text of either :obj:`Flavor.detailed_json` or
+            :obj:`Flavor.brief_json`.
+        """
+        before, after = (self._detailed if include_details
+                         else self._brief)[flavor.flavor_id]
+        return "".join([
+            before,
+            dumps(flavor_links_json(tenant_id, flavor.flavor_id,
+                                    absolutize_url)),
+            after])
+
+
+FLAVOR_CATALOG = FlavorCatalog.from_flavor_classes([
+    RackspaceStandardFlavor, RackspaceComputeFlavor,
+    RackspacePerformance1Flavor, RackspaceOnMetalFlavor,
+    RackspacePerformance2Flavor, RackspaceMemoryFlavor,
+    RackspaceIOFlavor, RackspaceGeneralFlavor])
+
+
 @attr.s
 class RegionalFlavorCollection(object):
     """
-    A collection of flavors, in a given region, for a given tenant.
+    The flavors in a given region, as seen by a given tenant.
+
+    :ivar catalog: The :obj:`FlavorCatalog` the flavors come from.
     """
     tenant_id = attr.ib()
     region_name = attr.ib()
     clock = attr.ib()
-    flavors_store = attr.ib(default=attr.Factory(list))
+    catalog = attr.ib(default=FLAVOR_CATALOG)
 
     def flavor_by_id(self, flavor_id):
         """
         Retrieve a :obj:`Flavor` object by its ID.
         """
-        self._create_flavors_list()
-        for flavor in self.flavors_store:
-            if flavor.flavor_id == flavor_id:
-                return flavor
-
-    def _create_flavors_list(self):
-        """
-        Generates the data for each flavor in each flavor class
-        """
-        rackspace_flavors = [RackspaceStandardFlavor, RackspaceComputeFlavor,
-                             RackspacePerformance1Flavor, RackspaceOnMetalFlavor,
-                             RackspacePerformance2Flavor, RackspaceMemoryFlavor,
-                             RackspaceIOFlavor, RackspaceGeneralFlavor]
-
-        if len(self.flavors_store) < 1:
-            for flavor_class in rackspace_flavors:
-                for flavor, flavor_spec in iteritems(flavor_class.flavors):
-                    flavor_name = flavor
-                    flavor_id = flavor_spec['id']
-                    ram = flavor_spec['ram']
-                    vcpus = flavor_spec['vcpus']
-                    network = flavor_spec['rxtx_factor']
-                    disk = flavor_spec['disk']
-                    tenant_id = self.tenant_id
-                    flavor = flavor_class(flavor_id=flavor_id, tenant_id=tenant_id,
-                                          name=flavor_name, ram=ram, vcpus=vcpus,
-                                          rxtx=network, disk=disk)
-                    self.flavors_store.append(flavor)
+        return self.catalog.flavor_by_id(flavor_id)
 
     def list_flavors(self, include_details, absolutize_url):
         """
         Return a list of flavors with details.
         """
-        self._create_flavors_list()
-        flavors = []
-        for flavor in self.flavors_store:
-            if self.region_name != "IAD" and isinstance(flavor, RackspaceOnMetalFlavor):
-                continue
-            if include_details:
-                flavors.append(flavor.detailed_json(absolutize_url))
-            else:
-                flavors.append(flavor.brief_json(absolutize_url))
-        result = {"flavors": flavors}
-
-        return dumps(result)
+        return '{{"flavors": [{0}]}}'.format(", ".join(
+            self.catalog.render(flavor, include_details, self.tenant_id,
+                                absolutize_url)
+            for flavor in self.catalog.flavors_for_region(self.region_name)))
 
     def get_flavor(self, http_get_request, flavor_id, absolutize_url):
         """
@@ -86,7 +157,8 @@ class RegionalFlavorCollection(object):
         if flavor is None:
             return dumps(not_found("The resource could not be found.",
                                    http_get_request))
-        return dumps({"flavor": flavor.detailed_json(absolutize_url)})
+        return '{{"flavor": {0}}}'.format(self.catalog.render(
+            flavor, True, self.tenant_id, absolutize_url))
 
 
 @attr.s
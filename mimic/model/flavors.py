@@ -7,6 +7,25 @@ from __future__ import absolute_import, division, unicode_literals
 import attr
 
 
+def flavor_links_json(tenant_id, flavor_id, absolutize_url):
+    """
+    Create a JSON-serializable data structure describing the links to a
+    flavor, as seen by a particular tenant.
+    """
+    return [
+        {
+            "href": absolutize_url("v2/{0}/flavors/{1}"
+                                   .format(tenant_id, flavor_id)),
+            "rel": "self"
+        },
+        {
+            "href": absolutize_url("{0}/flavors/{1}"
+                                   .format(tenant_id, flavor_id)),
+            "rel": "bookmark"
+        }
+    ]
+
+
 @attr.s
 class Flavor(object):
     """
@@ -30,18 +49,8 @@ class Flavor(object):
         Create a JSON-serializable data structure describing the links to this
         flavor.
         """
-        return [
-            {
-                "href": absolutize_url("v2/{0}/flavors/{1}"
-                                       .format(self.tenant_id, self.flavor_id)),
-                "rel": "self"
-            },
-            {
-                "href": absolutize_url("{0}/flavors/{1}"
-                                       .format(self.tenant_id, self.flavor_id)),
-                "rel": "bookmark"
-            }
-        ]
+        return flavor_links_json(self.tenant_id, self.flavor_id,
+                                 absolutize_url)
 
     def brief_json(self, absolutize_url):
         """
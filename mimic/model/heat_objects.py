@@ -207,9 +207,9 @@ class RegionalStackCollection(object):
     """
     tenant_id = attr.ib()
     region_name = attr.ib()
+    behavior_registry_collection = attr.ib()
     stacks = attr.ib(default=attr.Factory(list))
-    behavior_registry_collection = attr.ib(default=attr.Factory(
-        lambda: BehaviorRegistryCollection()))
+    clock = attr.ib(default=None)
 
     def stack_by_id(self, stack_id):
         """
@@ -309,6 +309,7 @@ class GlobalStackCollections(object):
     A set of :obj:`RegionalStackCollection` objects owned by a tenant.
     """
     tenant_id = attr.ib()
+    clock = attr.ib()
     regional_collections = attr.ib(default=attr.Factory(dict))
 
     def collection_for_region(self, region_name):
@@ -317,7 +318,11 @@ class GlobalStackCollections(object):
         """
         if region_name not in self.regional_collections:
             self.regional_collections[region_name] = (
-                RegionalStackCollection(tenant_id=self.tenant_id,
-                                        region_name=region_name)
+                RegionalStackCollection(
+                    tenant_id=self.tenant_id,
+                    region_name=region_name,
+                    behavior_registry_collection=BehaviorRegistryCollection(
+                        clock=self.clock),
+                    clock=self.clock)
             )
         return self.regional_collections[region_name]
@@ -26,15 +26,16 @@ class RegionalNovaImageCollection(object):
         """
         Return a list of images.
         """
-        images_store = self.image_store.create_image_store(self.tenant_id)
         images = []
-        for image in images_store:
+        for image in self.image_store.image_list:
             if self.region_name != "IAD" and isinstance(image, OnMetalImage):
                 continue
             if include_details:
-                images.append(image.detailed_json(absolutize_url))
+                images.append(image.detailed_json(absolutize_url,
+                                                  self.tenant_id))
             else:
-                images.append(image.brief_json(absolutize_url))
+                images.append(image.brief_json(absolutize_url,
+                                               self.tenant_id))
         result = {"images": images}
         return dumps(result)
 
@@ -46,11 +47,11 @@ class RegionalNovaImageCollection(object):
         if image_id in get_presets['servers']['invalid_image_ref'] or image_id.endswith('Z'):
             return dumps(not_found("The resource could not be found.",
                                    http_get_request))
-        self.image_store.create_image_store(self.tenant_id)
         image = self.image_store.get_image_by_id(image_id)
         if image is None:
             return dumps(not_found('Image not found.', http_get_request))
-        return dumps({"image": image.detailed_json(absolutize_url)})
+        return dumps({"image": image.detailed_json(absolutize_url,
+                                                   self.tenant_id)})
 
 
 @attr.s
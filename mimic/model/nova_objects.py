@@ -5,14 +5,20 @@ Model objects for the Nova mimic.
 from __future__ import absolute_import, division, unicode_literals
 
 import re
+import string
 import uuid
 import attr
+from bisect import bisect_left
+from collections import deque, OrderedDict
+from heapq import heappop, heappush
+from itertools import count, islice
 from random import randrange
 from json import loads, dumps
 from six.moves.urllib.parse import urlencode
 
 from six import string_types
 from six import text_type
+from six.moves import range
 
 from mimic.util.helper import (
     seconds_to_timestamp,
@@ -24,7 +30,9 @@ from mimic.model.behaviors import (
     BehaviorRegistryCollection, EventDescription, Criterion, regexp_predicate
 )
 from mimic.util.helper import json_from_request
-from twisted.web.http import ACCEPTED, BAD_REQUEST, FORBIDDEN, NOT_FOUND, CONFLICT
+from mimic.canned_responses.nova import get_limit
+from twisted.web.http import (
+    ACCEPTED, BAD_REQUEST, FORBIDDEN, NOT_FOUND, CONFLICT, INTERNAL_SERVER_ERROR)
 from mimic.model.rackspace_images import RackspaceSavedImage
 
 
@@ -44,6 +52,15 @@ class BadRequestError(Exception):
     nova_message = attr.ib()
 
 
+@attr.s
+class AddressPoolExhaustedError(Exception):
+    """
+    Error to be raised when there are no more addresses left to give a new
+    server.
+    """
+    nova_message = attr.ib()
+
+
 def _nova_error_message(msg_type, message, status_code, request):
     """
     Set the response code on the request, and return a JSON blob representing
@@ -117,6 +134,40 @@ def conflicting(message, request):
     return _nova_error_message("conflictingRequest", message, CONFLICT, request)
 
 
+def compute_fault(message, request):
+    """
+    Return a 500 error body associated with a Nova compute fault.
+
+    :param str message: The message to include in the error body.
+    :param request: The request on which to set the response code.
+
+    :return: dictionary representing the error body.
+    """
+    return _nova_error_message("computeFault", message,
+                               INTERNAL_SERVER_ERROR, request)
+
+
+def _server_links_json(tenant_id, server_id, absolutize_url):
+    """
+    Create a JSON-serializable data structure describing the links to a
+    server.
+
+    :param callable absolutize_url: see :obj:`default_create_behavior`.
+    """
+    return [
+        {
+            "href": absolutize_url("v2/{0}/servers/{1}"
+                                   .format(tenant_id, server_id)),
+            "rel": "self"
+        },
+        {
+            "href": absolutize_url("{0}/servers/{1}"
+                                   .format(tenant_id, server_id)),
+            "rel": "bookmark"
+        }
+    ]
+
+
 @attr.s
 class Server(object):
     """
@@ -140,6 +191,7 @@ class Server(object):
     status = attr.ib()
     update_time = attr.ib()
     max_metadata_items = attr.ib(validator=attr.validators.instance_of(int), default=40)
+    _rendered = attr.ib(default=None, repr=False, cmp=False)
 
     static_defaults = {
         "OS-EXT-STS:power_state": 1,
@@ -168,20 +220,8 @@ class Server(object):
 
         :param callable absolutize_url: see :obj:`default_create_behavior`.
         """
-        tenant_id = self.collection.tenant_id
-        server_id = self.server_id
-        return [
-            {
-                "href": absolutize_url("v2/{0}/servers/{1}"
-                                       .format(tenant_id, server_id)),
-                "rel": "self"
-            },
-            {
-                "href": absolutize_url("{0}/servers/{1}"
-                                       .format(tenant_id, server_id)),
-                "rel": "bookmark"
-            }
-        ]
+        return _server_links_json(self.collection.tenant_id, self.server_id,
+                                  absolutize_url)
 
     def brief_json(self, absolutize_url):
         """
@@ -234,6 +274,45 @@ class Server(object):
         })
         return template
 
+    def _rendered_for(self, absolutize_url):
+        """
+        Get the cache of this server's encoded JSON for the given
+        ``absolutize_url``.  Only the cache for the most recently used
+        ``absolutize_url`` is kept, and it is discarded whenever the server
+        changes; see :obj:`forget_rendered_json`.
+        """
+        if self._rendered is None or self._rendered[0] != absolutize_url:
+            self._rendered = (absolutize_url, {})
+        return self._rendered[1]
+
+    def brief_json_text(self, absolutize_url):
+        """
+        :obj:`brief_json`, encoded as JSON text.  The text is cached until the
+        server changes.
+        """
+        rendered = self._rendered_for(absolutize_url)
+        if "brief" not in rendered:
+            rendered["brief"] = dumps(self.brief_json(absolutize_url))
+        return rendered["brief"]
+
+    def detail_json_text(self, absolutize_url):
+        """
+        :obj:`detail_json`, encoded as JSON text.  The text is cached until
+        the server changes.
+        """
+        rendered = self._rendered_for(absolutize_url)
+        if "detail" not in rendered:
+            rendered["detail"] = dumps(self.detail_json(absolutize_url))
+        return rendered["detail"]
+
+    def forget_rendered_json(self):
+        """
+        Discard any cached JSON text for this server.  This must be called
+        whenever any of the server's state is changed other than through its
+        own methods.
+        """
+        self._rendered = None
+
     def creation_response_json(self, absolutize_url):
         """
         A JSON-serializable object returned for the initial creation of this
@@ -253,7 +332,7 @@ class Server(object):
         Replace all metadata with given metadata
         """
         self.metadata = metadata
-        self.update_time = self.collection.clock.seconds()
+        self._updated()
 
     def set_metadata_item(self, key, value):
         """
@@ -273,7 +352,7 @@ class Server(object):
                 "Invalid metadata: The input is not a string or unicode"))
 
         self.metadata[key] = value
-        self.update_time = self.collection.clock.seconds()
+        self._updated()
 
     def update_status(self, status):
         """
@@ -281,7 +360,16 @@ class Server(object):
         of the server
         """
         self.status = status
+        self._updated()
+
+    def _updated(self):
+        """
+        Set the `update_time` of the server to now, and let its collection know
+        it has changed.
+        """
         self.update_time = self.collection.clock.seconds()
+        self.forget_rendered_json()
+        self.collection.server_updated(self)
 
     @classmethod
     def validate_metadata(cls, metadata, max_metadata_items=40):
@@ -308,6 +396,30 @@ class Server(object):
         """
         Create a :obj:`Server` from a JSON-serializable object that would be in
         the body of a create server request.
+
+        If the request asks for several servers with ``min_count`` and
+        ``max_count``, they are all created, and the first one is returned;
+        see :obj:`batch_from_creation_request_json`.
+        """
+        return cls.batch_from_creation_request_json(
+            collection, creation_json, ipsegment, max_metadata_items)[0]
+
+    @classmethod
+    def batch_from_creation_request_json(cls, collection, creation_json,
+                                         ipsegment=lambda: randrange(255),
+                                         max_metadata_items=40):
+        """
+        Create every :obj:`Server` requested by a JSON-serializable object that
+        would be in the body of a create server request.
+
+        As many servers as there are addresses for are created, up to the
+        request's ``max_count``, as long as that is at least its
+        ``min_count``; both default to 1.  When more than one server is
+        created, each one's name has its (1-based) index in the batch
+        appended, as in ``"name-1"``.
+
+        :return: the new servers, in order.
+        :rtype: ``list`` of :obj:`Server`
         """
         now = collection.clock.seconds()
         server_json = creation_json['server']
@@ -319,37 +431,149 @@ class Server(object):
         metadata = server_json.get("metadata") or {}
         cls.validate_metadata(metadata, max_metadata_items)
 
-        while True:
-            private_ip = IPv4Address(
-                address="10.180.{0}.{1}".format(ipsegment(), ipsegment()))
-            if private_ip not in [addr for server in collection.servers
-                                  for addr in server.private_ips]:
-                break
+        min_count, max_count = _creation_counts(server_json)
+        addresses = collection.allocate_address_batch(
+            ipsegment, min_count, max_count)
 
-        self = cls(
-            collection=collection,
-            server_name=server_json['name'],
-            server_id=('test-server{0}-id-{0}'
-                       .format(str(randrange(9999999999)))),
-            metadata=metadata,
-            creation_time=now,
-            update_time=now,
-            private_ips=[private_ip],
-            public_ips=[
-                IPv4Address(address="198.101.241.{0}".format(ipsegment())),
-                IPv6Address(address="2001:4800:780e:0510:d87b:9cbc:ff04:513a")
-            ],
-            key_name=None if 'key_name' not in server_json else server_json['key_name'],
-            creation_request_json=creation_json,
-            flavor_ref=server_json['flavorRef'],
-            image_ref=server_json['imageRef'] or '',
-            disk_config=disk_config,
-            status="ACTIVE",
-            admin_password=random_string(12),
-            max_metadata_items=max_metadata_items
-        )
-        collection.servers.append(self)
-        return self
+        name = server_json['name']
+        if len(addresses) > 1:
+            names = ["{0}-{1}".format(name, index)
+                     for index in range(1, len(addresses) + 1)]
+        else:
+            names = [name]
+
+        servers = []
+        for server_name, (private_ip, public_ipv4, public_ipv6) in zip(
+                names, addresses):
+            server = cls(
+                collection=collection,
+                server_name=server_name,
+                server_id=('test-server{0}-id-{0}'
+                           .format(str(randrange(9999999999)))),
+                metadata=dict(metadata),
+                creation_time=now,
+                update_time=now,
+                private_ips=[IPv4Address(address=private_ip)],
+                public_ips=[
+                    IPv4Address(address=public_ipv4),
+                    IPv6Address(address=public_ipv6)
+                ],
+                key_name=None if 'key_name' not in server_json else server_json['key_name'],
+                creation_request_json=creation_json,
+                flavor_ref=server_json['flavorRef'],
+                image_ref=server_json['imageRef'] or '',
+                disk_config=disk_config,
+                status="ACTIVE",
+                admin_password=random_string(12),
+                max_metadata_items=max_metadata_items
+            )
+            collection.add_server(server)
+            servers.append(server)
+        return servers
+
+
+def _creation_counts(server_json):
+    """
+    Get the minimum and maximum number of servers requested by the
+    ``"server"`` object of a create server request.
+
+    :return: a 2-tuple of ``min_count`` and ``max_count``.
+    :raise: :obj:`BadRequestError` if they are not valid, or
+        :obj:`LimitError` if ``max_count`` is more than the most servers a
+        tenant may have (see :obj:`mimic.canned_responses.nova.get_limit`).
+    """
+    try:
+        min_count = int(server_json.get("min_count", 1))
+        max_count = int(server_json.get("max_count", min_count))
+    except (TypeError, ValueError):
+        raise BadRequestError(nova_message=(
+            "min_count and max_count must be integers"))
+    if min_count < 1:
+        raise BadRequestError(nova_message="min_count must be >= 1")
+    if max_count < min_count:
+        raise BadRequestError(nova_message="min_count must be <= max_count")
+    quota = get_limit()["limits"]["absolute"]["maxTotalInstances"]
+    if max_count > quota:
+        raise LimitError(nova_message=(
+            "Quota exceeded for instances: Requested {0}, but the quota is "
+            "{1} instances".format(max_count, quota)))
+    return min_count, max_count
+
+
+def _wants_reservation_id(server_json):
+    """
+    Whether the ``"server"`` object of a create server request asks for a
+    reservation ID to be returned instead of the server.
+    """
+    value = server_json.get("return_reservation_id", False)
+    if isinstance(value, string_types):
+        return value.lower() in ("true", "1", "yes")
+    return bool(value)
+
+
+@attr.s
+class ServerTombstone(object):
+    """
+    All that is kept of a deleted :obj:`Server`: just enough to report its
+    deletion when listing the servers changed since a given time.
+    """
+    tenant_id = attr.ib()
+    server_id = attr.ib()
+    server_name = attr.ib()
+    status = attr.ib()
+    update_time = attr.ib()
+
+    @classmethod
+    def from_server(cls, server):
+        """
+        Create a :obj:`ServerTombstone` for a deleted :obj:`Server`.
+        """
+        return cls(tenant_id=server.collection.tenant_id,
+                   server_id=server.server_id,
+                   server_name=server.server_name,
+                   status=server.status,
+                   update_time=server.update_time)
+
+    def brief_json(self, absolutize_url):
+        """
+        Brief JSON-serializable version of the deleted server, for the
+        non-details list servers request.
+        """
+        return {
+            'name': self.server_name,
+            'links': _server_links_json(self.tenant_id, self.server_id,
+                                        absolutize_url),
+            'id': self.server_id
+        }
+
+    def detail_json(self, absolutize_url):
+        """
+        JSON-serializable version of the deleted server, for the list-details
+        request.  Only the attributes which are kept for a deleted server are
+        included.
+        """
+        return {
+            "id": self.server_id,
+            "name": self.server_name,
+            "links": _server_links_json(self.tenant_id, self.server_id,
+                                        absolutize_url),
+            "OS-EXT-STS:vm_state": self.status,
+            "status": self.status,
+            "tenant_id": self.tenant_id,
+            "updated": seconds_to_timestamp(self.update_time)
+        }
+
+    def brief_json_text(self, absolutize_url):
+        """
+        :obj:`brief_json`, encoded as JSON text.
+        """
+        return dumps(self.brief_json(absolutize_url))
+
+    def detail_json_text(self, absolutize_url):
+        """
+        :obj:`detail_json`, encoded as JSON text.
+        """
+        return dumps(self.detail_json(absolutize_url))
 
 
 @attr.s
@@ -380,6 +604,131 @@ class IPv6Address(object):
         return {"addr": self.address, "version": 6}
 
 
+@attr.s
+class AddressPool(object):
+    """
+    A pool of addresses which can be handed out to servers, one at a time,
+    and given back when the servers are deleted.
+
+    Each address in the pool is identified by an offset, an integer in
+    ``range(size)``.  Only the addresses currently in use are stored, so
+    even an enormous pool costs nothing until it is used.  Allocating and
+    releasing an address are both amortized ``O(1)``: an allocation tries
+    any preferred offsets it is given, then reuses the longest-released
+    address, then moves on to an offset that has never been handed out, and
+    only fails when every address is in use.
+
+    :ivar unicode name: A human-readable description of the addresses in
+        this pool, for error messages.
+    :ivar callable address_for_offset: A 1-argument callable which formats an
+        offset into an address.
+    :ivar int size: The number of addresses in the pool.
+    :ivar int first: The offset of the first never-used address to hand out.
+        Offsets after it are handed out in order, wrapping around at
+        ``size``.
+    """
+    name = attr.ib()
+    address_for_offset = attr.ib()
+    size = attr.ib()
+    first = attr.ib(default=0)
+    _in_use = attr.ib(default=attr.Factory(dict), repr=False)
+    _released = attr.ib(default=attr.Factory(deque), repr=False)
+    _scanned = attr.ib(default=0, repr=False)
+
+    def _take(self, offset):
+        """
+        Mark the address at ``offset`` as in use, if it isn't already.
+
+        :return: the address, or ``None`` if it was already in use.
+        """
+        address = self.address_for_offset(offset)
+        if address in self._in_use:
+            return None
+        self._in_use[address] = offset
+        return address
+
+    def allocate(self, preferred=()):
+        """
+        Hand out an address which is not currently in use.
+
+        :param preferred: An iterable of offsets to try before any others;
+            offsets outside the pool are ignored.
+
+        :return: the address
+        :rtype: unicode
+
+        :raise: :obj:`AddressPoolExhaustedError` if every address in the pool
+            is in use.
+        """
+        for offset in preferred:
+            if 0 <= offset < self.size:
+                address = self._take(offset)
+                if address is not None:
+                    return address
+        while self._released:
+            address = self._take(self._released.popleft())
+            if address is not None:
+                return address
+        while self._scanned < self.size:
+            offset = (self.first + self._scanned) % self.size
+            self._scanned += 1
+            address = self._take(offset)
+            if address is not None:
+                return address
+        raise AddressPoolExhaustedError(nova_message=(
+            "No more {0} addresses are available".format(self.name)))
+
+    def release(self, address):
+        """
+        Return an address handed out by :obj:`allocate` to the pool.  Releasing
+        an address which is not in use does nothing.
+        """
+        offset = self._in_use.pop(address, None)
+        if offset is not None:
+            self._released.append(offset)
+
+    def __len__(self):
+        """
+        The number of addresses currently in use.
+        """
+        return len(self._in_use)
+
+
+def _private_ipv4_pool():
+    """
+    Create the pool of private IPv4 addresses, ``10.180.0.0/16``, for a
+    region.
+    """
+    return AddressPool(
+        name="private IPv4", size=2 ** 16,
+        address_for_offset=lambda offset: "10.180.{0}.{1}".format(
+            offset >> 8, offset & 0xff))
+
+
+def _public_ipv4_pool():
+    """
+    Create the pool of public IPv4 addresses, ``198.101.0.0/16``, for a
+    region.  Addresses start at ``198.101.241.0``.
+    """
+    return AddressPool(
+        name="public IPv4", size=2 ** 16, first=241 << 8,
+        address_for_offset=lambda offset: "198.101.{0}.{1}".format(
+            offset >> 8, offset & 0xff))
+
+
+def _public_ipv6_pool():
+    """
+    Create the pool of public IPv6 addresses, ``2001:4800:780e:510::/64``, for
+    a region.  Addresses start at ``2001:4800:780e:0510:d87b:9cbc:ff04:513a``.
+    """
+    return AddressPool(
+        name="public IPv6", size=2 ** 64, first=0xd87b9cbcff04513a,
+        address_for_offset=lambda offset: (
+            "2001:4800:780e:0510:{0:04x}:{1:04x}:{2:04x}:{3:04x}".format(
+                (offset >> 48) & 0xffff, (offset >> 32) & 0xffff,
+                (offset >> 16) & 0xffff, offset & 0xffff)))
+
+
 server_creation = EventDescription()
 
 
@@ -436,16 +785,25 @@ def default_create_behavior(collection, http, json, absolutize_url,
         hostname and therefore a different URI.
 
     :param ipsegment: A hook provided for IP generation so the IP addresses in
-        tests are deterministic; normally a random number between 0 and 255.
+        tests are deterministic; normally a random number between 0 and 254.
+        Addresses built from it are only used if they are not already in
+        use; see :obj:`RegionalServerCollection.allocate_addresses`.
     :param callable hook: a 1-argument callable which, if specified, will be
         invoked with the :obj:`Server` object after creating it, but before
         generating the response.  This allows for invoking the default behavior
-        with a small tweak to alter the server's state in some way.
+        with a small tweak to alter the server's state in some way.  If
+        several servers are created at once, it is invoked with each of them.
     """
-    new_server = Server.from_creation_request_json(collection, json, ipsegment)
+    new_servers = Server.batch_from_creation_request_json(
+        collection, json, ipsegment)
     if hook is not None:
-        hook(new_server)
-    response = new_server.creation_response_json(absolutize_url)
+        for new_server in new_servers:
+            hook(new_server)
+    if _wants_reservation_id(json['server']):
+        response = {"reservation_id": "r-" + random_string(
+            8, string.ascii_lowercase + string.digits)}
+    else:
+        response = new_servers[0].creation_response_json(absolutize_url)
     http.setResponseCode(ACCEPTED)
     return dumps(response)
 
@@ -516,7 +874,7 @@ def _get_failure_behavior(parameters, create=False):
 
     def _fail(collection, http, json, absolutize_url):
         if create:
-            Server.from_creation_request_json(
+            Server.batch_from_creation_request_json(
                 collection, json, lambda: randrange(255))
 
         http.setResponseCode(status_code)
@@ -603,10 +961,8 @@ def create_building_behavior(parameters):
     @default_with_hook
     def set_building(server):
         server.update_status(u"BUILD")
-        server.collection.clock.callLater(
-            duration,
-            server.update_status,
-            u"ACTIVE")
+        server.collection.lifecycle.schedule(
+            server, duration, u"ACTIVE")
     return set_building
 
 
@@ -642,10 +998,8 @@ def active_then_error(parameters):
     @default_with_hook
     def fail_later(server):
         server.update_status(u"ACTIVE")
-        server.collection.clock.callLater(
-            duration,
-            server.update_status,
-            u"ERROR")
+        server.collection.lifecycle.schedule(
+            server, duration, u"ERROR")
     return fail_later
 
 
@@ -665,25 +1019,387 @@ def metadata_to_creation_behavior(metadata):
     return None
 
 
+@attr.s
+class LifecycleScheduler(object):
+    """
+    The pending status transitions of every server in a region, such as a
+    server finishing its build or reboot.
+
+    All the transitions are kept in a single heap, with one pending call on
+    the clock for the earliest of them, rather than one call per
+    transition.  Every transition due by the time that call runs is applied
+    in the same pass.
+
+    :ivar clock: The :obj:`IReactorTime` provider on which transitions are
+        scheduled.
+    :ivar dict _pending: A mapping of server ID to a mapping of sequence number
+        to status, for every transition which has not yet happened or been
+        cancelled.  Heap entries not found here are stale, and skipped.
+    """
+    clock = attr.ib()
+    _heap = attr.ib(default=attr.Factory(list), repr=False)
+    _pending = attr.ib(default=attr.Factory(dict), repr=False)
+    _counter = attr.ib(default=attr.Factory(count), repr=False)
+    _call = attr.ib(default=None, repr=False)
+
+    def schedule(self, server, delay, status):
+        """
+        Change the status of ``server`` to ``status`` in ``delay`` seconds.
+        """
+        when = self.clock.seconds() + delay
+        sequence = next(self._counter)
+        self._pending.setdefault(server.server_id, {})[sequence] = status
+        heappush(self._heap, (when, sequence, server))
+        if self._call is not None and self._call.active():
+            if self._call.getTime() <= when:
+                return
+            self._call.cancel()
+        self._call = self.clock.callLater(delay, self._run)
+
+    def cancel(self, server):
+        """
+        Cancel every pending transition of ``server``.
+        """
+        self._pending.pop(server.server_id, None)
+
+    def _is_live(self, entry):
+        """
+        Whether a heap entry is for a transition which is still pending.
+        """
+        _, sequence, server = entry
+        return sequence in self._pending.get(server.server_id, ())
+
+    def _run(self):
+        """
+        Apply every transition which is now due, in order, then wait for the
+        next one.
+        """
+        self._call = None
+        now = self.clock.seconds()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            entry = heappop(self._heap)
+            if self._is_live(entry):
+                _, sequence, server = entry
+                transitions = self._pending[server.server_id]
+                due.append((server, transitions.pop(sequence)))
+                if not transitions:
+                    del self._pending[server.server_id]
+        for server, status in due:
+            server.update_status(status)
+        while self._heap and not self._is_live(self._heap[0]):
+            heappop(self._heap)
+        if self._heap and self._call is None:
+            self._call = self.clock.callLater(
+                max(self._heap[0][0] - now, 0), self._run)
+
+    def pending_counts(self):
+        """
+        Count the pending transitions.
+
+        :return: a mapping of status to the number of pending transitions
+            to it.
+        :rtype: ``dict``
+        """
+        counts = {}
+        for transitions in self._pending.values():
+            for status in transitions.values():
+                counts[status] = counts.get(status, 0) + 1
+        return counts
+
+
 @attr.s
 class RegionalServerCollection(object):
     """
     A collection of servers, in a given region, for a given tenant.
+
+    :ivar list servers: Every server in this collection, in creation order.
+        Servers deleted through :obj:`request_delete` are kept, so that
+        listing the servers changed since a given time can report the
+        deletion.  If ``tombstone_retention`` is set, a deleted server is
+        replaced by a :obj:`ServerTombstone`, which is kept for that many
+        seconds.
+    :ivar tombstone_retention: How many seconds to keep each
+        :obj:`ServerTombstone` for, or ``None`` to keep deleted servers
+        forever, in full.  Expired tombstones are discarded in batches, no
+        more often than once every quarter of this time.  Change it with
+        :obj:`set_tombstone_retention`.
+    :ivar dict _servers_by_id: A mapping of server ID to :obj:`Server`, so
+        that servers can be looked up without scanning ``servers``.  Deleted
+        servers are dropped from it.  Servers should be added with
+        :obj:`add_server` so that this is kept up to date.
+    :ivar list _sequences: The ascending sequence number of each server in
+        ``servers``, so that a server's position can be found by bisection.
+    :ivar dict _sequence_for_id: A mapping of server ID to sequence number,
+        for every server in ``servers``.
+    :ivar OrderedDict _recently_updated: A mapping of server ID to
+        :obj:`Server` for every server in ``servers``, least recently updated
+        first.  Since the clock only moves forward, this is also in order of
+        ``update_time``, so the servers changed since a given time are found
+        without looking at any of the others.
     """
     tenant_id = attr.ib()
     region_name = attr.ib()
     clock = attr.ib()
+    behavior_registry_collection = attr.ib()
     servers = attr.ib(default=attr.Factory(list))
-    behavior_registry_collection = attr.ib(default=attr.Factory(
-        lambda: BehaviorRegistryCollection()))
+    tombstone_retention = attr.ib(default=None)
+    _servers_by_id = attr.ib(default=attr.Factory(dict), repr=False)
+    _sequences = attr.ib(default=attr.Factory(list), repr=False)
+    _sequence_for_id = attr.ib(default=attr.Factory(dict), repr=False)
+    _sequence_counter = attr.ib(default=attr.Factory(count), repr=False)
+    _recently_updated = attr.ib(default=attr.Factory(OrderedDict),
+                                repr=False)
+    _lifecycle = attr.ib(default=None, repr=False)
+    _tombstones = attr.ib(default=attr.Factory(deque), repr=False)
+    _compaction_call = attr.ib(default=None, repr=False)
+    _last_compaction = attr.ib(default=None, repr=False)
+    private_ipv4_pool = attr.ib(default=attr.Factory(_private_ipv4_pool),
+                                repr=False)
+    public_ipv4_pool = attr.ib(default=attr.Factory(_public_ipv4_pool),
+                               repr=False)
+    public_ipv6_pool = attr.ib(default=attr.Factory(_public_ipv6_pool),
+                               repr=False)
+
+    @property
+    def lifecycle(self):
+        """
+        The :obj:`LifecycleScheduler` for the servers in this collection.
+        """
+        if self._lifecycle is None:
+            self._lifecycle = LifecycleScheduler(clock=self.clock)
+        return self._lifecycle
+
+    def allocate_addresses(self, ipsegment):
+        """
+        Allocate a private IPv4 address, a public IPv4 address and a public
+        IPv6 address for a new server.
+
+        :param ipsegment: see :obj:`default_create_behavior`.  Addresses made
+            up of its segments are preferred, if they are free.
+
+        :return: a 3-tuple of the private IPv4, public IPv4 and public IPv6
+            addresses.
+
+        :raise: :obj:`AddressPoolExhaustedError` if any of the pools has run
+            out of addresses, in which case no addresses are allocated.
+        """
+        attempts = 10
+        private_ip = self.private_ipv4_pool.allocate(
+            ((ipsegment() << 8) + ipsegment() for _ in range(attempts)))
+        try:
+            public_ipv4 = self.public_ipv4_pool.allocate(
+                ((241 << 8) + ipsegment() for _ in range(attempts)))
+            try:
+                public_ipv6 = self.public_ipv6_pool.allocate()
+            except AddressPoolExhaustedError:
+                self.public_ipv4_pool.release(public_ipv4)
+                raise
+        except AddressPoolExhaustedError:
+            self.private_ipv4_pool.release(private_ip)
+            raise
+        return private_ip, public_ipv4, public_ipv6
+
+    def allocate_address_batch(self, ipsegment, min_count, max_count):
+        """
+        Allocate addresses for up to ``max_count`` new servers at once, as
+        for :obj:`allocate_addresses`.
+
+        :return: a list of between ``min_count`` and ``max_count`` 3-tuples of
+            the private IPv4, public IPv4 and public IPv6 addresses.
+
+        :raise: :obj:`AddressPoolExhaustedError` if there are not enough
+            addresses left for ``min_count`` servers, in which case no
+            addresses are allocated.
+        """
+        batch = []
+        try:
+            while len(batch) < max_count:
+                batch.append(self.allocate_addresses(ipsegment))
+        except AddressPoolExhaustedError:
+            if len(batch) >= min_count:
+                return batch
+            for private_ip, public_ipv4, public_ipv6 in batch:
+                self.private_ipv4_pool.release(private_ip)
+                self.public_ipv4_pool.release(public_ipv4)
+                self.public_ipv6_pool.release(public_ipv6)
+            raise
+        return batch
+
+    def release_addresses(self, server):
+        """
+        Return the addresses of a deleted server to their pools.
+        """
+        for address in server.private_ips:
+            self.private_ipv4_pool.release(address.address)
+        for address in server.public_ips:
+            if isinstance(address, IPv6Address):
+                self.public_ipv6_pool.release(address.address)
+            else:
+                self.public_ipv4_pool.release(address.address)
+
+    def add_server(self, server):
+        """
+        Add a newly created :obj:`Server` to this collection.
+        """
+        sequence = next(self._sequence_counter)
+        self.servers.append(server)
+        self._sequences.append(sequence)
+        self._sequence_for_id[server.server_id] = sequence
+        self._servers_by_id[server.server_id] = server
+        self.server_updated(server)
+
+    def server_updated(self, server):
+        """
+        Note that the `update_time` of a server in this collection has just
+        changed.
+        """
+        if self._servers_by_id.get(server.server_id) is not server:
+            # Deleted already; only its tombstone is still listed.
+            return
+        self._recently_updated.pop(server.server_id, None)
+        self._recently_updated[server.server_id] = server
+
+    def _bury(self, server):
+        """
+        Note that a server has been deleted.  If ``tombstone_retention`` is
+        set, replace it with a :obj:`ServerTombstone`, and arrange for the
+        tombstone to be discarded once ``tombstone_retention`` has passed;
+        otherwise keep the server as it is.
+        """
+        self.lifecycle.cancel(server)
+        del self._servers_by_id[server.server_id]
+        if self.tombstone_retention is None:
+            return
+        self._tombstones.append(self._entomb(server))
+        self._schedule_compaction()
+
+    def _entomb(self, server):
+        """
+        Replace a deleted server with a :obj:`ServerTombstone` in ``servers``
+        and the indexes, and return the tombstone.
+        """
+        tombstone = ServerTombstone.from_server(server)
+        self.servers[self._position(server.server_id)] = tombstone
+        self._recently_updated.pop(server.server_id)
+        self._recently_updated[server.server_id] = tombstone
+        return tombstone
+
+    def set_tombstone_retention(self, seconds):
+        """
+        Change ``tombstone_retention``.  Servers deleted from now on are
+        compacted into tombstones and discarded after ``seconds``, or kept
+        forever, in full, if it is ``None``.
+
+        Servers deleted earlier are treated the same way: once a retention is
+        set, every deleted server which was kept in full is compacted into a
+        tombstone, and every tombstone is discarded once the new retention
+        has passed since its deletion.  If it is ``None``, existing
+        tombstones are kept forever.
+        """
+        self.tombstone_retention = seconds
+        if self._compaction_call is not None:
+            self._compaction_call.cancel()
+            self._compaction_call = None
+        self._tombstones.clear()
+        if seconds is None:
+            return
+        # Deleted servers are found in order of deletion, as the tombstones
+        # must be.
+        for server in list(self._recently_updated.values()):
+            if server.server_id in self._servers_by_id:
+                continue
+            if not isinstance(server, ServerTombstone):
+                server = self._entomb(server)
+            self._tombstones.append(server)
+        self._schedule_compaction()
+
+    def _schedule_compaction(self):
+        """
+        Make sure a compaction is scheduled for when the oldest tombstone
+        expires, but no sooner than a quarter of ``tombstone_retention`` after
+        the last compaction.
+        """
+        if not self._tombstones or self._compaction_call is not None:
+            return
+        when = self._tombstones[0].update_time + self.tombstone_retention
+        if self._last_compaction is not None:
+            when = max(when, self._last_compaction +
+                       self.tombstone_retention / 4)
+        self._compaction_call = self.clock.callLater(
+            max(when - self.clock.seconds(), 0), self._compact)
+
+    def _compact(self):
+        """
+        Discard every tombstone which has outlived ``tombstone_retention``,
+        rebuilding the server indexes once for the whole batch.
+        """
+        self._compaction_call = None
+        now = self._last_compaction = self.clock.seconds()
+        expired = set()
+        while (self._tombstones and
+               self._tombstones[0].update_time + self.tombstone_retention
+               <= now):
+            expired.add(self._tombstones.popleft().server_id)
+        if expired:
+            kept = [(sequence, server)
+                    for sequence, server in zip(self._sequences, self.servers)
+                    if server.server_id not in expired]
+            self._sequences[:] = [sequence for sequence, _ in kept]
+            self.servers[:] = [server for _, server in kept]
+            for server_id in expired:
+                del self._sequence_for_id[server_id]
+                del self._recently_updated[server_id]
+        self._schedule_compaction()
+
+    def _position(self, server_id):
+        """
+        Find the index in ``servers`` of the server with the given ID, whether
+        or not it has been deleted.
+
+        :return: the index, or ``None`` if there is no such server.
+        """
+        sequence = self._sequence_for_id.get(server_id)
+        if sequence is None:
+            return None
+        return bisect_left(self._sequences, sequence)
+
+    def _servers_from(self, position):
+        """
+        Generate the servers in ``servers`` from the given index onwards.
+        """
+        for index in range(position, len(self.servers)):
+            yield self.servers[index]
+
+    def _servers_changed_since(self, since):
+        """
+        Find every server updated at or after the given time.
+
+        :param float since: The time, in seconds.
+        :return: the servers, in the order they appear in ``servers``.
+        """
+        changed = []
+        for server_id in reversed(self._recently_updated):
+            server = self._recently_updated[server_id]
+            if server.update_time < since:
+                break
+            changed.append(server)
+        changed.sort(key=lambda server: self._sequence_for_id[server.server_id])
+        return changed
+
+    def server_count(self):
+        """
+        The number of servers in this collection which have not been deleted.
+        """
+        return len(self._servers_by_id)
 
     def server_by_id(self, server_id):
         """
         Retrieve a :obj:`Server` object by its ID.
         """
-        for server in self.servers:
-            if server.server_id == server_id and server.status != u"DELETED":
-                return server
+        server = self._servers_by_id.get(server_id)
+        if server is not None and server.status != u"DELETED":
+            return server
 
     def request_creation(self, creation_http_request, creation_json,
                          absolutize_url):
@@ -715,7 +1431,8 @@ class RegionalServerCollection(object):
         if server is None:
             return dumps(not_found("Instance could not be found",
                                    http_get_request))
-        return dumps({"server": server.detail_json(absolutize_url)})
+        return '{{"server": {0}}}'.format(
+            server.detail_json_text(absolutize_url))
 
     def request_ips(self, http_get_ips_request, server_id):
         """
@@ -744,34 +1461,41 @@ class RegionalServerCollection(object):
 
         Pagination behavior verified against Rackspace Nova as of 2015-04-29.
         """
-        to_be_listed = self.servers
-
         if changes_since is not None:
             since = timestamp_to_seconds(changes_since)
-            to_be_listed = [s for s in to_be_listed if s.update_time >= since]
+            to_be_listed = self._servers_changed_since(since)
+        else:
+            to_be_listed = None
 
         # marker can be passed without limit, in which case the whole server
         # list, after the server that matches the marker, is returned
+        position = 0
         if marker is not None:
-            last_seen = [i for i, server in enumerate(to_be_listed)
-                         if server.server_id == marker]
-            if not last_seen:
+            position = self._position(marker)
+            if position is not None and changes_since is not None:
+                if self.servers[position].update_time < since:
+                    position = None
+            if position is None:
                 # Error response and body verified against Rackspace Nova as
                 # of 2015-04-29
                 return dumps(bad_request(
                     "marker [{0}] not found".format(marker),
                     http_get_request))
-            else:
-                last_seen = last_seen[0]
-                to_be_listed = to_be_listed[last_seen + 1:]
+            position += 1
+
+        if to_be_listed is None:
+            to_be_listed = (server for server in self._servers_from(position)
+                            if server.status != u"DELETED")
+        elif marker is not None:
+            after = self._sequences[position - 1]
+            to_be_listed = (
+                server for server in to_be_listed
+                if self._sequence_for_id[server.server_id] > after)
 
         # A valid marker is an ID in the entire server list.  It does not
         # have to be for a server that matches the given name.
-        to_be_listed = [server for server in to_be_listed
-                        if name in server.server_name]
-
-        if changes_since is None:
-            to_be_listed = [s for s in to_be_listed if s.status != u"DELETED"]
+        to_be_listed = (server for server in to_be_listed
+                        if name in server.server_name)
 
         if limit is not None:
             try:
@@ -783,15 +1507,16 @@ class RegionalServerCollection(object):
                 return dumps(bad_request("limit param must be positive",
                                          http_get_request))
 
-            to_be_listed = to_be_listed[:limit]
+        # Only the requested page is ever built.
+        to_be_listed = list(islice(to_be_listed, limit))
 
-        result = {
-            "servers": [
-                server.brief_json(absolutize_url) if not include_details
-                else server.detail_json(absolutize_url)
-                for server in to_be_listed
-            ]
-        }
+        # Each server's JSON is cached, so the response is spliced together
+        # from the encoded servers rather than encoded as a whole.
+        servers = ", ".join(
+            server.brief_json_text(absolutize_url) if not include_details
+            else server.detail_json_text(absolutize_url)
+            for server in to_be_listed)
+        links = ""
 
         # A server links blob is included only if limit is passed.  If
         # only the marker was provided, no server links blob is included.
@@ -807,12 +1532,12 @@ class RegionalServerCollection(object):
                 self.tenant_id,
                 "/detail" if include_details else "",
                 urlencode(query_params))
-            result["servers_links"] = [{
+            links = ', "servers_links": {0}'.format(dumps([{
                 "href": absolutize_url(path),
                 "rel": "next"
-            }]
+            }]))
 
-        return dumps(result)
+        return '{{"servers": [{0}]{1}}}'.format(servers, links)
 
     def request_delete(self, http_delete_request, server_id):
         """
@@ -830,10 +1555,13 @@ class RegionalServerCollection(object):
             if srvfail['times']:
                 srvfail['times'] -= 1
                 server.metadata['delete_server_failure'] = dumps(srvfail)
+                server.forget_rendered_json()
                 http_delete_request.setResponseCode(500)
                 return b''
         http_delete_request.setResponseCode(204)
         server.update_status(u"DELETED")
+        self.release_addresses(server)
+        self._bury(server)
         return b''
 
     def request_action(self, http_action_request, server_id, absolutize_url,
@@ -845,6 +1573,21 @@ class RegionalServerCollection(object):
         if server is None:
             return dumps(not_found("Instance " + server_id + " could not be found",
                                    http_action_request))
+        try:
+            return self._perform_action(
+                http_action_request, server, server_id, absolutize_url,
+                regional_image_collection, image_store)
+        finally:
+            # Actions change the server's state directly.
+            server.forget_rendered_json()
+
+    def _perform_action(self, http_action_request, server, server_id,
+                        absolutize_url, regional_image_collection,
+                        image_store):
+        """
+        Perform the requested action on the given server; see
+        :obj:`request_action`.
+        """
         action_json = json_from_request(http_action_request)
         if 'resize' in action_json:
             flavor = action_json['resize'].get('flavorRef')
@@ -903,18 +1646,14 @@ class RegionalServerCollection(object):
             if reboot_type == 'HARD':
                 server.status = 'HARD_REBOOT'
                 http_action_request.setResponseCode(202)
-                server.collection.clock.callLater(
-                    6.0,
-                    server.update_status,
-                    u"ACTIVE")
+                server.collection.lifecycle.schedule(
+                    server, 6.0, u"ACTIVE")
                 return b''
             elif reboot_type == 'SOFT':
                 server.status = 'REBOOT'
                 http_action_request.setResponseCode(202)
-                server.collection.clock.callLater(
-                    3.0,
-                    server.update_status,
-                    u"ACTIVE")
+                server.collection.lifecycle.schedule(
+                    server, 3.0, u"ACTIVE")
                 return b''
             else:
                 return dumps(bad_request("Argument 'type' for reboot is not HARD or SOFT",
@@ -941,10 +1680,8 @@ class RegionalServerCollection(object):
                 server.image_ref = image_ref
                 server.status = 'REBUILD'
                 http_action_request.setResponseCode(202)
-                server.collection.clock.callLater(
-                    5.0,
-                    server.update_status,
-                    u"ACTIVE")
+                server.collection.lifecycle.schedule(
+                    server, 5.0, u"ACTIVE")
                 server_details = server.detail_json(absolutize_url)
                 server_details['adminPass'] = 'password'
                 return dumps({"server": server_details})
@@ -999,6 +1736,7 @@ class GlobalServerCollections(object):
     tenant_id = attr.ib()
     clock = attr.ib()
     regional_collections = attr.ib(default=attr.Factory(dict))
+    tombstone_retention = attr.ib(default=None)
 
     def collection_for_region(self, region_name):
         """
@@ -1007,8 +1745,12 @@ class GlobalServerCollections(object):
         """
         if region_name not in self.regional_collections:
             self.regional_collections[region_name] = (
-                RegionalServerCollection(tenant_id=self.tenant_id,
-                                         region_name=region_name,
-                                         clock=self.clock)
+                RegionalServerCollection(
+                    tenant_id=self.tenant_id,
+                    region_name=region_name,
+                    clock=self.clock,
+                    behavior_registry_collection=BehaviorRegistryCollection(
+                        clock=self.clock),
+                    tombstone_retention=self.tombstone_retention)
             )
         return self.regional_collections[region_name]
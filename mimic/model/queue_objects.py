@@ -63,6 +63,13 @@ class Queue(object):
         self._messages[:] = [message for message in self._messages
                              if not message.is_expired_at(current_time)]
 
+    def message_count(self, current_time):
+        """
+        The number of messages in this queue which have not expired.
+        """
+        return sum(1 for message in self._messages
+                   if not message.is_expired_at(current_time))
+
     def brief_json(self):
         """
         A brief representation of this queue that can be serialized
@@ -142,6 +149,14 @@ class QueueCollection(object):
                            if queue.name != queue_name]
         return None, 204
 
+    def message_count(self):
+        """
+        The number of messages in all the queues in the collection which have
+        not expired.
+        """
+        current_time = self._current_time()
+        return sum(queue.message_count(current_time) for queue in self._queues)
+
     def list_messages_for_queue(self, queue_name, client_id, echo):
         """
         Lists all messages in the named queue.
@@ -19,53 +19,106 @@ from mimic.model.rackspace_images import (RackspaceWindowsImage,
 from mimic.model.rackspace_images import create_rackspace_images
 
 
+@attr.s
+class RackspaceImageCatalog(object):
+    """
+    The base images which Rackspace offers to every tenant.  The images never
+    change once the catalog has been created, so a single catalog is shared
+    by every tenant's :obj:`RackspaceImageStore`.
+
+    :ivar tuple images: Every image, in order.  Their ``tenant_id`` is
+        ``None``; the tenant viewing them must be passed when rendering their
+        JSON.
+    """
+    images = attr.ib()
+    _by_id = attr.ib(repr=False)
+
+    @classmethod
+    def from_image_classes(cls, image_classes):
+        """
+        Create a catalog of every image of each of the given image classes,
+        followed by the images from :obj:`create_rackspace_images`.
+        """
+        images = []
+        for image_class in image_classes:
+            for image_name, image_spec in iteritems(image_class.images):
+                image = image_class(image_id=image_spec['id'], tenant_id=None,
+                                    image_size=image_spec['OS-EXT-IMG-SIZE:size'],
+                                    name=image_name, minRam=image_spec['minRam'],
+                                    minDisk=image_spec['minDisk'])
+                if 'com.rackspace__1__ui_default_show' in image_spec:
+                    image.set_is_default()
+                images.append(image)
+        images.extend(create_rackspace_images(None))
+        return cls(images=tuple(images),
+                   by_id=dict((image.image_id, image) for image in images))
+
+    def image_by_id(self, image_id):
+        """
+        Get an image by its id
+        """
+        return self._by_id.get(image_id)
+
+
+BASE_IMAGE_CATALOG = RackspaceImageCatalog.from_image_classes([
+    RackspaceWindowsImage, RackspaceCentOSPVImage,
+    RackspaceCentOSPVHMImage, RackspaceCoreOSImage, RackspaceDebianImage,
+    RackspaceFedoraImage, RackspaceFreeBSDImage, RackspaceGentooImage,
+    RackspaceOpenSUSEImage, RackspaceRedHatPVImage, RackspaceRedHatPVHMImage,
+    RackspaceUbuntuPVImage, RackspaceUbuntuPVHMImage, RackspaceVyattaImage,
+    RackspaceScientificImage, RackspaceOnMetalCentOSImage,
+    RackspaceOnMetalCoreOSImage, RackspaceOnMetalDebianImage,
+    RackspaceOnMetalFedoraImage, RackspaceOnMetalUbuntuImage])
+
+
 @attr.s
 class RackspaceImageStore(object):
     """
     A store for images to share between nova_api and glance_api
-    :var image_list: list of Rackspace images
+
+    Each tenant's store is a view of the shared :obj:`RackspaceImageCatalog`
+    of base images; only the images the tenant adds itself, such as images
+    saved from its servers, are stored per tenant.  Until the tenant adds an
+    image, its store holds nothing of its own.
+
+    :ivar base: The :obj:`RackspaceImageCatalog` of base images.
+    :ivar _added: A list of the images added to this store, or ``None`` if
+        there are none yet.
+    :ivar _added_by_id: A mapping of image ID to image for the images in
+        ``_added``, or ``None`` if there are none yet.
     """
-    image_list = attr.ib(default=attr.Factory(list))
+    base = attr.ib(default=BASE_IMAGE_CATALOG)
+    _added = attr.ib(default=None, repr=False)
+    _added_by_id = attr.ib(default=None, repr=False)
+
+    @property
+    def image_list(self):
+        """
+        A list of every image in this store: the base images, then the added
+        ones.
+        """
+        return list(self.base.images) + (self._added or [])
 
     def create_image_store(self, tenant_id):
         """
-        Generates the data for each image in each image class
+        Get a list of every image in this store.
         """
-        image_classes = [RackspaceWindowsImage, RackspaceCentOSPVImage,
-                         RackspaceCentOSPVHMImage, RackspaceCoreOSImage, RackspaceDebianImage,
-                         RackspaceFedoraImage, RackspaceFreeBSDImage, RackspaceGentooImage,
-                         RackspaceOpenSUSEImage, RackspaceRedHatPVImage, RackspaceRedHatPVHMImage,
-                         RackspaceUbuntuPVImage, RackspaceUbuntuPVHMImage, RackspaceVyattaImage,
-                         RackspaceScientificImage, RackspaceOnMetalCentOSImage,
-                         RackspaceOnMetalCoreOSImage, RackspaceOnMetalDebianImage,
-                         RackspaceOnMetalFedoraImage, RackspaceOnMetalUbuntuImage]
-        if len(self.image_list) < 1:
-            for image_class in image_classes:
-                for image, image_spec in iteritems(image_class.images):
-                    image_name = image
-                    image_id = image_spec['id']
-                    minRam = image_spec['minRam']
-                    minDisk = image_spec['minDisk']
-                    image_size = image_spec['OS-EXT-IMG-SIZE:size']
-                    image = image_class(image_id=image_id, tenant_id=tenant_id,
-                                        image_size=image_size, name=image_name, minRam=minRam,
-                                        minDisk=minDisk)
-                    if 'com.rackspace__1__ui_default_show' in image_spec:
-                        image.set_is_default()
-                    self.image_list.append(image)
-            self.image_list.extend(create_rackspace_images(tenant_id))
         return self.image_list
 
     def get_image_by_id(self, image_id):
         """
         Get an image by its id
         """
-        for image in self.image_list:
-            if image_id == image.image_id:
-                return image
+        if self._added_by_id is not None and image_id in self._added_by_id:
+            return self._added_by_id[image_id]
+        return self.base.image_by_id(image_id)
 
     def add_image_to_store(self, image):
         """
         Add a new image to the list of images
         """
-        self.image_list.append(image)
+        if self._added is None:
+            self._added = []
+            self._added_by_id = {}
+        self._added.append(image)
+        self._added_by_id[image.image_id] = image
@@ -68,20 +68,25 @@ class Image(object):
         """
         self.is_default = True
 
-    def links_json(self, absolutize_url):
+    def links_json(self, absolutize_url, tenant_id=None):
         """
         Create a JSON-serializable data structure describing the links to this
         image.
+
+        :param tenant_id: The tenant viewing the image, if the image is not
+            specific to one tenant.
         """
+        if tenant_id is None:
+            tenant_id = self.tenant_id
         return [
             {
                 "href": absolutize_url("v2/{0}/images/{1}"
-                                       .format(self.tenant_id, self.image_id)),
+                                       .format(tenant_id, self.image_id)),
                 "rel": "self"
             },
             {
                 "href": absolutize_url("{0}/images/{1}"
-                                       .format(self.tenant_id, self.image_id)),
+                                       .format(tenant_id, self.image_id)),
                 "rel": "bookmark"
             },
             {
@@ -92,7 +97,7 @@ class Image(object):
             }
         ]
 
-    def brief_json(self, absolutize_url):
+    def brief_json(self, absolutize_url, tenant_id=None):
         """
         Brief JSON-serializable version of this flavor, for the non-details
         list flavors request.
@@ -100,7 +105,7 @@ class Image(object):
         template = {}
         template.update({
             "id": self.image_id,
-            "links": self.links_json(absolutize_url),
+            "links": self.links_json(absolutize_url, tenant_id),
             "name": self.name
         })
         return template
@@ -119,7 +124,7 @@ class Image(object):
             "auto_disk_config": self.auto_disk_config
         }
 
-    def detailed_json(self, absolutize_url):
+    def detailed_json(self, absolutize_url, tenant_id=None):
         """
         Long-form JSON-serializable object representation of this flavor, as
         returned by either a GET on this individual flavor or a member in the
@@ -128,7 +133,7 @@ class Image(object):
         template = {}
         template.update({
             "id": self.image_id,
-            "links": self.links_json(absolutize_url),
+            "links": self.links_json(absolutize_url, tenant_id),
             "name": self.name,
             "minRam": self.minRam,
             "minDisk": self.minDisk,
@@ -178,6 +183,17 @@ class RackspaceSavedImage(object):
             "auto_disk_config": self.disk_config
         }
 
+    def brief_json(self, absolutize_url, tenant_id=None):
+        """
+        Brief JSON-serializable version of this image, for the non-details
+        list images request.
+        """
+        return {
+            "id": self.image_id,
+            "links": self.links_json(absolutize_url, tenant_id),
+            "name": self.name
+        }
+
     def server_json(self):
         """
         Create a JSON-serializable data structure describing ``server`` info for a saved image
@@ -187,20 +203,25 @@ class RackspaceSavedImage(object):
             "links": self.links
         }
 
-    def links_json(self, absolutize_url):
+    def links_json(self, absolutize_url, tenant_id=None):
         """
         Create a JSON-serializable data structure describing the links to this
         image.
+
+        :param tenant_id: The tenant viewing the image, if the image is not
+            specific to one tenant.
         """
+        if tenant_id is None:
+            tenant_id = self.tenant_id
         return [
             {
                 "href": absolutize_url("v2/{0}/images/{1}"
-                                       .format(self.tenant_id, self.image_id)),
+                                       .format(tenant_id, self.image_id)),
                 "rel": "self"
             },
             {
                 "href": absolutize_url("{0}/images/{1}"
-                                       .format(self.tenant_id, self.image_id)),
+                                       .format(tenant_id, self.image_id)),
                 "rel": "bookmark"
             },
             {
@@ -211,7 +232,7 @@ class RackspaceSavedImage(object):
             }
         ]
 
-    def detailed_json(self, absolutize_url):
+    def detailed_json(self, absolutize_url, tenant_id=None):
         """
         Long-form JSON-serializable object representation of this flavor, as
         returned by either a GET on this individual flavor or a member in the
@@ -221,7 +242,7 @@ class RackspaceSavedImage(object):
         template.update({
             "id": self.image_id,
             "status": "ACTIVE",
-            "links": self.links_json(absolutize_url),
+            "links": self.links_json(absolutize_url, tenant_id),
             "name": self.name,
             "minRam": self.minRam,
             "minDisk": self.minDisk,
@@ -692,20 +713,25 @@ class OnMetalImage(object):
         """
         self.is_default = True
 
-    def links_json(self, absolutize_url):
+    def links_json(self, absolutize_url, tenant_id=None):
         """
         Create a JSON-serializable data structure describing the links to this
         image.
+
+        :param tenant_id: The tenant viewing the image, if the image is not
+            specific to one tenant.
         """
+        if tenant_id is None:
+            tenant_id = self.tenant_id
         return [
             {
                 "href": absolutize_url("v2/{0}/images/{1}"
-                                       .format(self.tenant_id, self.image_id)),
+                                       .format(tenant_id, self.image_id)),
                 "rel": "self"
             },
             {
                 "href": absolutize_url("{0}/images/{1}"
-                                       .format(self.tenant_id, self.image_id)),
+                                       .format(tenant_id, self.image_id)),
                 "rel": "bookmark"
             },
             {
@@ -716,18 +742,18 @@ class OnMetalImage(object):
             }
         ]
 
-    def brief_json(self, absolutize_url):
+    def brief_json(self, absolutize_url, tenant_id=None):
         """
         Brief JSON-serializable version of this flavor, for the non-details
         list flavors request.
         """
         return {
             "id": self.image_id,
-            "links": self.links_json(absolutize_url),
+            "links": self.links_json(absolutize_url, tenant_id),
             "name": self.name
         }
 
-    def detailed_json(self, absolutize_url):
+    def detailed_json(self, absolutize_url, tenant_id=None):
         """
         Long-form JSON-serializable object representation of this flavor, as
         returned by either a GET on this individual flavor or a member in the
@@ -736,7 +762,7 @@ class OnMetalImage(object):
         template = {}
         template.update({
             "id": self.image_id,
-            "links": self.links_json(absolutize_url),
+            "links": self.links_json(absolutize_url, tenant_id),
             "name": self.name,
             "minRam": self.minRam,
             "minDisk": self.minDisk,
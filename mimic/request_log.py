@@ -0,0 +1,330 @@
+# -*- test-case-name: mimic.test.test_request_log -*-
+"""
+Logging of the requests Mimic receives and the responses it sends, for
+``--verbose`` mode.
+
+Logging a request should cost as little as possible while it is being
+handled, so that turning logging on does not change the timing it is
+supposed to record.  So :obj:`mimic.resource.MimicLoggingRequest` only
+keeps the raw headers and at most :obj:`RequestLog.body_limit` bytes of each
+body in an :obj:`Exchange`, and only for the requests a :obj:`RequestLog`
+samples.  Turning an exchange into text is left to a sink:
+
+- :obj:`LoggerSink` logs each request and response with
+  :obj:`twisted.logger`, as Mimic always has.
+- :obj:`FileSink` appends each exchange to a file as a line of JSON, on a
+  thread of its own, so that the reactor never encodes or writes anything.
+"""
+
+from __future__ import absolute_import, division, unicode_literals
+
+import io
+import json
+import random
+import time
+from threading import Thread
+from timeit import default_timer
+
+import attr
+
+from six.moves import queue
+
+from twisted.application.service import Service
+from twisted.logger import Logger
+
+
+_logger = Logger("mimic")
+log = _logger.info
+
+
+DEFAULT_BODY_LIMIT = 64 * 1024
+"""
+The number of bytes of each request and response body logged by default.
+"""
+
+
+def _text(data):
+    """
+    Decode bytes received or sent as UTF-8, replacing anything which is not.
+    """
+    return data.decode("utf-8", "replace")
+
+
+def _decoded_headers(raw_headers):
+    """
+    Decode raw headers, as returned by
+    :obj:`twisted.web.http_headers.Headers.getAllRawHeaders`, into a mapping
+    of name to list of values.
+    """
+    return {_text(name): [_text(value) for value in values]
+            for (name, values) in raw_headers}
+
+
+@attr.s
+class Body(object):
+    """
+    The logged part of a request or response body.
+
+    :ivar list chunks: The logged bytes of the body, in the pieces they were
+        received or written in.
+    :ivar int length: The length of the whole body.
+    :ivar limit: The most bytes of the body to log, or ``None`` for no limit.
+    """
+    limit = attr.ib()
+    chunks = attr.ib(default=attr.Factory(list))
+    length = attr.ib(default=0)
+
+    def add(self, data):
+        """
+        Note that ``data`` is the next part of the body, keeping as much of it
+        as the limit allows.
+        """
+        if self.limit is None:
+            self.chunks.append(data)
+        elif self.length < self.limit:
+            self.chunks.append(data[:self.limit - self.length])
+        self.length += len(data)
+
+    def text(self):
+        """
+        The logged part of the body as text, noting how many bytes were left
+        out.
+        """
+        data = b"".join(self.chunks)
+        text = data.decode("utf-8", "replace")
+        if len(data) < self.length:
+            text += "... [{0} more bytes]".format(self.length - len(data))
+        return text
+
+    def to_json(self):
+        """
+        Describe the logged part of the body, serializably.
+        """
+        return {"body": self.text(), "length": self.length,
+                "truncated": sum(map(len, self.chunks)) < self.length}
+
+
+@attr.s
+class Exchange(object):
+    """
+    A request and its response, as logged.
+
+    Everything is kept as it was received or sent, and only decoded by the
+    methods which format it, so that a sink may format it outside of the
+    reactor thread.  Nothing changes once the response has been sent.
+
+    :ivar float timestamp: When the request was received, in seconds since
+        the epoch.
+    :ivar float duration: How many seconds it took to respond, once the
+        response has been sent.
+    :ivar float started: When the request was received, by the timer of the
+        :obj:`RequestLog` which logged it.
+    """
+    method = attr.ib()
+    uri = attr.ib()
+    request_headers = attr.ib()
+    request_body = attr.ib()
+    response_body = attr.ib()
+    timestamp = attr.ib()
+    code = attr.ib(default=None)
+    response_headers = attr.ib(default=None)
+    duration = attr.ib(default=None)
+    started = attr.ib(default=None, repr=False)
+
+    def request_text(self):
+        """
+        Describe the request as text.
+        """
+        return ("Received request: {0} {1}\nHeaders: {2}\n{3}".format(
+            _text(self.method), _text(self.uri),
+            json.dumps(_decoded_headers(self.request_headers)),
+            _body_text(self.request_body)))
+
+    def response_text(self):
+        """
+        Describe the response as text.
+        """
+        return ("Responding with {0} for: {1} {2}\nHeaders: {3}\n{4}".format(
+            self.code, _text(self.method), _text(self.uri),
+            json.dumps(_decoded_headers(self.response_headers)),
+            _body_text(self.response_body)))
+
+    def to_json(self):
+        """
+        Describe the request and response, serializably.
+        """
+        request = self.request_body.to_json()
+        request["headers"] = _decoded_headers(self.request_headers)
+        response = self.response_body.to_json()
+        response["headers"] = _decoded_headers(self.response_headers)
+        return {"timestamp": self.timestamp,
+                "duration": self.duration,
+                "method": _text(self.method),
+                "uri": _text(self.uri),
+                "code": self.code,
+                "request": request,
+                "response": response}
+
+
+def _body_text(body):
+    """
+    Format a :obj:`Body` for a log message, surrounded by blank lines, or as
+    nothing if it is empty.
+    """
+    return "\n" + body.text() + "\n" if body.length else ""
+
+
+class LoggerSink(object):
+    """
+    Log each request when it is received and each response when it is sent,
+    with :obj:`twisted.logger`.
+    """
+
+    def request_received(self, exchange):
+        """
+        Log a request.
+        """
+        log("{text}", text=exchange.request_text())
+
+    def response_sent(self, exchange):
+        """
+        Log a response to a request.
+        """
+        log("{text}", text=exchange.response_text())
+
+
+_STOP = object()
+
+
+class FileSink(Service, object):
+    """
+    Append each exchange to a file as a line of JSON, once its response has
+    been sent.
+
+    Exchanges are queued for a thread which encodes and writes them, flushing
+    the file whenever it has caught up.  An exchange which cannot be written
+    is logged and skipped.  The thread runs while the service is running, and
+    stopping the service waits for it to write everything queued.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: The path of the file to append to.
+        """
+        self._path = path
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def request_received(self, exchange):
+        """
+        Do nothing: the request is written along with its response.
+        """
+
+    def response_sent(self, exchange):
+        """
+        Queue an exchange to be written.
+        """
+        self._queue.put(exchange)
+
+    def _write(self):
+        """
+        Write queued exchanges until told to stop.
+        """
+        with io.open(self._path, "ab") as f:
+            while True:
+                exchange = self._queue.get()
+                while exchange is not _STOP:
+                    try:
+                        line = json.dumps(exchange.to_json()).encode("utf-8")
+                    except Exception:
+                        _logger.failure("Could not log {exchange!r}",
+                                        exchange=exchange)
+                    else:
+                        f.write(line + b"\n")
+                    try:
+                        exchange = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                f.flush()
+                if exchange is _STOP:
+                    return
+
+    def startService(self):
+        """
+        Start writing.
+        """
+        super(FileSink, self).startService()
+        self._thread = Thread(target=self._write, name="mimic-request-log")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stopService(self):
+        """
+        Write everything queued, then stop.
+        """
+        super(FileSink, self).stopService()
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+
+
+@attr.s
+class RequestLog(object):
+    """
+    Which requests to log, how much of them, and where to.
+
+    :ivar sink: The :obj:`LoggerSink` or :obj:`FileSink` which formats and
+        records each exchange.
+    :ivar body_limit: The most bytes of each request and response body to
+        log, or ``None`` to log them in full.
+    :ivar float sample_rate: The fraction of requests to log, chosen at
+        random.
+    """
+    sink = attr.ib(default=attr.Factory(LoggerSink))
+    body_limit = attr.ib(default=DEFAULT_BODY_LIMIT)
+    sample_rate = attr.ib(default=1.0)
+    _random = attr.ib(default=random.random, repr=False)
+    _timer = attr.ib(default=default_timer, repr=False)
+
+    def request_received(self, request):
+        """
+        Start logging ``request``, whose body has been received, if it is
+        sampled.
+
+        :return: the :obj:`Exchange` to pass to :obj:`response_written` and
+            :obj:`response_sent`, or ``None`` if the request is not logged.
+        """
+        if self.sample_rate < 1 and self._random() >= self.sample_rate:
+            return None
+        request_body = Body(self.body_limit)
+        content = request.content
+        if content is not None:
+            request_body.chunks.append(
+                content.read() if self.body_limit is None
+                else content.read(self.body_limit))
+            content.seek(0, 2)
+            request_body.length = content.tell()
+            content.seek(0)
+        exchange = Exchange(
+            method=request.method, uri=request.uri,
+            request_headers=list(request.requestHeaders.getAllRawHeaders()),
+            request_body=request_body, response_body=Body(self.body_limit),
+            timestamp=time.time(), started=self._timer())
+        self.sink.request_received(exchange)
+        return exchange
+
+    def response_written(self, exchange, data):
+        """
+        Note that ``data`` has been written in response to the request.
+        """
+        exchange.response_body.add(data)
+
+    def response_sent(self, exchange, request):
+        """
+        Note that the response to ``request`` has been sent in full.
+        """
+        exchange.code = request.code
+        exchange.response_headers = list(
+            request.responseHeaders.getAllRawHeaders())
+        exchange.duration = self._timer() - exchange.started
+        self.sink.response_sent(exchange)
@@ -6,13 +6,12 @@ from __future__ import unicode_literals
 
 import json
 
-from io import BytesIO
-
 from twisted.web.resource import NoResource
 from twisted.web.server import Request, Site
-from twisted.logger import Logger
 
 from mimic.canned_responses.mimic_presets import get_presets
+from mimic.metrics import prometheus_text
+from mimic.request_log import RequestLog
 from mimic.model.behaviors import BehaviorRegistryCollection
 from mimic.rest.mimicapp import MimicApp
 from mimic.rest.auth_api import (
@@ -25,8 +24,7 @@ from mimic.rest import (fastly_api, mailgun_api, customer_api,
                         ironic_api, glance_api, valkyrie_api)
 from mimic.util.helper import json_from_request
 from mimic.util.helper import seconds_to_timestamp
-
-log = Logger("mimic").info
+from mimic.util.static import STATIC_BODIES
 
 
 class MimicRoot(object):
@@ -45,7 +43,20 @@ class MimicRoot(object):
         """
         self.core = core
         self.clock = clock
-        self.identity_behavior_registry = BehaviorRegistryCollection()
+        self.identity_behavior_registry = BehaviorRegistryCollection(
+            clock=core.clock)
+        self._auth_resource = AuthApi(
+            core, self.identity_behavior_registry).app.resource()
+        self._noit_resource = NoitApi(core, clock).app.resource()
+        self._mailgun_resource = mailgun_api.MailGunApi(core).app.resource()
+        self._fastly_resource = fastly_api.FastlyApi(core).app.resource()
+        self._customer_resource = (
+            customer_api.CustomerApi(core).app.resource())
+        self._ironic_resource = ironic_api.IronicApi(core).app.resource()
+        self._valkyrie_resource = (
+            valkyrie_api.ValkyrieApi(core).app.resource())
+        self._glance_admin_resource = (
+            glance_api.GlanceAdminApi(core).app.resource())
 
     @app.route("/", methods=["GET"])
     def help(self, request):
@@ -61,8 +72,7 @@ class MimicRoot(object):
         """
         Get the identity ...
         """
-        return AuthApi(self.core,
-                       self.identity_behavior_registry).app.resource()
+        return self._auth_resource
 
     @app.route("/noit", branch=True)
     def get_noit_api(self, request):
@@ -70,7 +80,7 @@ class MimicRoot(object):
         Mock Noit api here ... until mimic allows services outside of the
         service catalog.
         """
-        return NoitApi(self.core, self.clock).app.resource()
+        return self._noit_resource
 
     @app.route("/sendgrid/mail.send.json", methods=['POST'])
     def send_grid_api(self, request):
@@ -85,35 +95,35 @@ class MimicRoot(object):
         """
         Mock Mail Gun API.
         """
-        return mailgun_api.MailGunApi(self.core).app.resource()
+        return self._mailgun_resource
 
     @app.route("/fastly", branch=True)
     def get_fastly_api(self, request):
         """
         Get the Fastly API ...
         """
-        return fastly_api.FastlyApi(self.core).app.resource()
+        return self._fastly_resource
 
     @app.route("/v1/customer_accounts/CLOUD", branch=True)
     def get_customer_api(self, request):
         """
         Adds support for the Customer API
         """
-        return customer_api.CustomerApi(self.core).app.resource()
+        return self._customer_resource
 
     @app.route("/ironic/v1", branch=True)
     def ironic_api(self, request):
         """
         Mock Ironic API.
         """
-        return ironic_api.IronicApi(self.core).app.resource()
+        return self._ironic_resource
 
     @app.route("/valkyrie/v2.0", branch=True)
     def valkyrie_api(self, request):
         """
         Mock Valkyrie API.
         """
-        return valkyrie_api.ValkyrieApi(self.core).app.resource()
+        return self._valkyrie_resource
 
     @app.route('/mimic/v1.0/presets', methods=['GET'])
     def get_mimic_presets(self, request):
@@ -121,7 +131,8 @@ class MimicRoot(object):
         Return the preset values for mimic
         """
         request.setResponseCode(200)
-        return json.dumps(get_presets)
+        return STATIC_BODIES.render_json(request, "mimic_presets",
+                                         lambda: get_presets)
 
     @app.route("/mimic/v1.1/tick", methods=['POST'])
     def advance_time(self, request):
@@ -137,6 +148,17 @@ class MimicRoot(object):
             "now": seconds_to_timestamp(self.clock.seconds())
         })
 
+    @app.route("/mimic/v1.1/metrics", methods=['GET'])
+    def get_metrics(self, request):
+        """
+        Return Mimic's request metrics, and counts of the sessions and
+        objects it holds, in the Prometheus text format.
+        """
+        request.setResponseCode(200)
+        request.setHeader(b"content-type", b"text/plain; version=0.0.4")
+        return prometheus_text(self.core.metrics,
+                               self.core.sessions).encode("utf-8")
+
     @app.route("/mimic/v1.1/IdentityControlAPI/behaviors", branch=True)
     def handle_identity_behaviors(self, request):
         """
@@ -191,78 +213,88 @@ class MimicRoot(object):
         """
         Mock for the glance admin api
         """
-        return glance_api.GlanceAdminApi(self.core).app.resource()
+        return self._glance_admin_resource
 
 
 class MimicRequest(Request, object):
     """
     Mimic requests by default are of content type application/json.
+
+    If the site has metrics (see :obj:`get_site`), the request is counted in
+    them once it has finished.
+
+    :ivar mimic_route: The route which handled the request, set by
+        :obj:`mimic.rest.mimicapp.MimicApp`, or ``None`` if no route did.
     """
     defaultContentType = b"application/json"
+    mimic_route = None
+
+    def process(self):
+        """
+        Start counting the request in the site's metrics, if it has any,
+        before calling the superclass's :obj:`process`.
+        """
+        metrics = getattr(getattr(self.channel, "site", None), "metrics",
+                          None)
+        if metrics is not None:
+            started = metrics.request_started(self)
+            self.notifyFinish().addBoth(
+                lambda _: metrics.request_finished(self, started))
+        return super(MimicRequest, self).process()
 
 
 class MimicLoggingRequest(MimicRequest, object):
     """
     Mimic request that by default logs all incoming requests and outgoing
-    responses.
+    responses, as the site's :obj:`mimic.request_log.RequestLog` says.
     """
-
-    def __init__(self, *args, **kwargs):
-        """
-        Same as the superclass's :obj:`__init__` except it also creates a
-        buffer to store the response for logging.
-        """
-        super(MimicLoggingRequest, self).__init__(*args, **kwargs)
-        self.response_body_for_logging = BytesIO()
+    _exchange = None
 
     def process(self):
         """
-        Log the incoming response before calling the superclass's
-        :obj:`process`.
-        """
-        content = self.content.read()
-        self.content.seek(0)
-        log("Received request: {method} {url}\n"
-            "Headers: {headers}\n"
-            "{body}",
-            method=self.method.decode("utf-8"), url=self.uri.decode("utf-8"),
-            headers=json.dumps(
-                {k.decode("utf-8"): [vv.decode("utf-8") for vv in v]
-                 for (k, v) in self.requestHeaders.getAllRawHeaders()}
-            ),
-            body=("\n" + content.decode("utf-8") + "\n" if content else ""))
+        Start logging the request, if it is sampled, before calling the
+        superclass's :obj:`process`.
+        """
+        request_log = getattr(getattr(self.channel, "site", None),
+                              "request_log", None) or RequestLog()
+        self._request_log = request_log
+        self._exchange = request_log.request_received(self)
         return super(MimicLoggingRequest, self).process()
 
     def write(self, data):
         """
-        Collect the response data before calling the superclass's :obj:`write`.
+        Log the response data before calling the superclass's :obj:`write`.
         """
-        self.response_body_for_logging.write(data)
+        if self._exchange is not None:
+            self._request_log.response_written(self._exchange, data)
         return super(MimicLoggingRequest, self).write(data)
 
     def finish(self):
         """
         Before finishing the request, log the response.
         """
-        content = self.response_body_for_logging.getvalue()
-        log("Responding with {code} for: {method} {url}\n"
-            "Headers: {headers}\n"
-            "{body}",
-            method=self.method.decode("utf-8"), url=self.uri.decode("utf-8"),
-            code=self.code,
-            headers=json.dumps(
-                {k.decode("utf-8"): [vv.decode("utf-8") for vv in v]
-                 for (k, v) in self.responseHeaders.getAllRawHeaders()}),
-            body=("\n" + content.decode("utf-8") + "\n" if content else ""))
+        if self._exchange is not None:
+            self._request_log.response_sent(self._exchange, self)
         return super(MimicLoggingRequest, self).finish()
 
 
-def get_site(resource, logging=False):
+def get_site(resource, logging=False, metrics=None, request_log=None):
     """
     :param resource: A :class:`twisted.web.resource.Resource` object.
+    :param logging: Whether to log every request and response.
+    :param metrics: The :obj:`mimic.metrics.RequestMetrics` to count every
+        request in, if any.
+    :param request_log: The :obj:`mimic.request_log.RequestLog` saying how
+        to log requests and responses.  Giving one turns on ``logging``; by
+        default, they are logged with :obj:`twisted.logger`.
     :return: a :class:`Site` that can be run
     """
+    if logging and request_log is None:
+        request_log = RequestLog()
     site = Site(resource)
     site.displayTracebacks = False
-    site.requestFactory = MimicLoggingRequest if logging else MimicRequest
+    site.requestFactory = (MimicLoggingRequest if request_log is not None
+                           else MimicRequest)
+    site.request_log = request_log
+    site.metrics = metrics
     return site
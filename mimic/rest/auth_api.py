@@ -109,24 +109,19 @@ def default_authentication_behavior(core, http_request, credentials):
             }})
 
         http_request.setResponseCode(200)
-        prefix_map = {
-            # map of entry to URI prefix for that entry
-        }
-
-        def lookup(entry):
-            return prefix_map[entry]
-        result = get_token(
+        access = get_token(
             session.tenant_id,
-            entry_generator=lambda tenant_id:
-            list(core.entries_for_tenant(
-                 session.tenant_id, prefix_map,
-                 base_uri_from_request(http_request))),
-            prefix_for_endpoint=lookup,
             response_token=session.token,
             response_user_id=session.user_id,
             response_user_name=session.username,
-        )
-        return json.dumps(result)
+        )["access"]
+        # The service catalog is the bulk of the response and is the same for
+        # every authentication by this tenant, so splice in the pre-encoded
+        # copy rather than serializing it again.
+        service_catalog = core.service_catalog_json(
+            session.tenant_id, base_uri_from_request(http_request))
+        return '{{"access": {{"serviceCatalog": {0}, {1}}}'.format(
+            service_catalog, json.dumps(access)[1:])
 
 
 @authentication.declare_behavior_creator("fail")
@@ -559,13 +554,12 @@ class AuthApi(object):
         """
         # FIXME: TEST
         request.setResponseCode(200)
-        prefix_map = {}
         session = self.core.sessions.session_for_token(token_id)
+        entries, prefix_map = self.core.catalog_for_tenant(
+            session.tenant_id, base_uri_from_request(request))
         return json.dumps(get_endpoints(
             session.tenant_id,
-            entry_generator=lambda tenant_id: list(
-                self.core.entries_for_tenant(tenant_id, prefix_map,
-                                             base_uri_from_request(request))),
+            entry_generator=lambda tenant_id: entries,
             prefix_for_endpoint=prefix_map.get)
         )
 
@@ -15,6 +15,7 @@ from mimic.rest.mimicapp import MimicApp
 from mimic.catalog import Entry
 from mimic.catalog import Endpoint
 from mimic.imimic import IAPIMock
+from mimic.util.static import STATIC_BODIES
 
 
 @implementer(IAPIMock, IPlugin)
@@ -74,7 +75,7 @@ class GlanceMock(object):
         for shared versus unshared images in the response
         """
         request.setResponseCode(200)
-        return json.dumps(get_images())
+        return STATIC_BODIES.render_json(request, "glance_images", get_images)
 
 
 class GlanceAdminApi(object):
@@ -128,4 +129,5 @@ class GlanceAdminApi(object):
         """
         Returns the glance image schema.
         """
-        return json.dumps(get_image_schema())
+        return STATIC_BODIES.render_json(request, "glance_image_schema",
+                                         get_image_schema)
@@ -67,6 +67,7 @@ class HeatApi(object):
         session = session_store.session_for_tenant_id(tenant_id)
         return session.data_for_api(self, lambda: GlobalStackCollections(
             tenant_id=tenant_id,
+            clock=session_store.clock,
         ))
 
 
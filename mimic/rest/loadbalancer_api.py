@@ -23,9 +23,31 @@ from random import randrange
 
 from mimic.util.helper import invalid_resource, json_dump
 from mimic.util.helper import json_from_request
+from mimic.util.stream import stream
 import attr
 
 
+def _paging_args(request):
+    """
+    Get the ``marker`` and ``limit`` query parameters of a request for a
+    page of a list, if they are given.
+
+    :return: a `dict` of the parameters given, as integers.
+    :raises: :class:`ValueError` if they are not integers, or the limit is
+        not positive.
+    """
+    paging = {}
+    for name in ["marker", "limit"]:
+        if name.encode("ascii") in request.args:
+            try:
+                paging[name] = int(request.args[name.encode("ascii")][0])
+            except ValueError:
+                raise ValueError("{0} must be an integer".format(name))
+    if paging.get("limit", 1) < 1:
+        raise ValueError("limit must be positive")
+    return paging
+
+
 @implementer(IAPIMock, IPlugin)
 class LoadBalancerApi(object):
     """
@@ -59,6 +81,15 @@ class LoadBalancerApi(object):
                                        region)
         return lb_region.app.resource()
 
+    def object_counts(self, data):
+        """
+        Count the load balancers in a tenant's :obj:`GlobalCLBCollections`,
+        for :obj:`mimic.metrics`.
+        """
+        return {"load_balancers": sum(
+            len(collection.lbs)
+            for collection in data.regional_collections.values())}
+
     def _get_session(self, session_store, tenant_id):
         """
         Retrieve or create a new LoadBalancer session from a given tenant identifier
@@ -164,6 +195,67 @@ class LoadBalancerControlRegion(object):
             request.setResponseCode(204)
             return b''
 
+    @app.route('/v2/<string:tenant_id>/loadbalancer/attributes',
+               methods=['PATCH'])
+    def set_default_attributes(self, request, tenant_id):
+        """
+        Alters the supported attributes of all the tenant's CLBs in this
+        region, which do not have them set themselves: ``node_limit``, the
+        most nodes each CLB may have, and ``node_feed_size``, the most events
+        kept in each node's feed.
+        """
+        try:
+            content = json_from_request(request)
+        except ValueError:
+            request.setResponseCode(400)
+            return json.dumps(invalid_resource("Invalid JSON request body"))
+
+        try:
+            self._collection_from_tenant(tenant_id).set_default_attributes(
+                content)
+        except (BadKeysError, BadValueError) as err:
+            request.setResponseCode(err.code)
+            return json.dumps(err.to_json())
+        else:
+            request.setResponseCode(204)
+            return b''
+
+    def _apply_nodes(self, request, tenant_id, clb_id, replace):
+        """
+        Apply the set of nodes in the request body to a CLB.
+        """
+        try:
+            content = json_from_request(request)
+            assert (isinstance(content, dict) and
+                    isinstance(content.get("nodes"), list))
+        except (ValueError, AssertionError):
+            body, code = invalid_json_schema()
+        else:
+            body, code = self._collection_from_tenant(tenant_id).apply_nodes(
+                clb_id, content["nodes"], replace=replace)
+        request.setResponseCode(code)
+        return json.dumps(body)
+
+    @app.route('/v2/<string:tenant_id>/loadbalancer/<int:clb_id>/nodes',
+               methods=['PUT'])
+    def replace_nodes(self, request, tenant_id, clb_id):
+        """
+        Replaces all the nodes of a CLB with the given set of nodes, in one
+        pass: nodes with the address and port of an existing node update its
+        weight, condition and type, the rest are added, and existing nodes
+        not in the set are removed.  Returns all the CLB's nodes.
+        """
+        return self._apply_nodes(request, tenant_id, clb_id, replace=True)
+
+    @app.route('/v2/<string:tenant_id>/loadbalancer/<int:clb_id>/nodes',
+               methods=['PATCH'])
+    def upsert_nodes(self, request, tenant_id, clb_id):
+        """
+        Like :obj:`replace_nodes`, but keeps the existing nodes which are not
+        in the given set.
+        """
+        return self._apply_nodes(request, tenant_id, clb_id, replace=False)
+
 
 class LoadBalancerRegion(object):
     """
@@ -228,8 +320,21 @@ class LoadBalancerRegion(object):
     def list_load_balancers(self, request, tenant_id):
         """
         Returns a list of all load balancers created using mimic with response code 200
+
+        The list is paged through with the ``marker`` and ``limit`` query
+        parameters, and filtered with the ``status`` and ``nodeaddress``
+        ones.
         """
-        response_data = self.session(tenant_id).list_load_balancers()
+        try:
+            query = _paging_args(request)
+        except ValueError as e:
+            request.setResponseCode(400)
+            return json.dumps(invalid_resource(str(e)))
+        for name in ["status", "nodeaddress"]:
+            if name.encode("ascii") in request.args:
+                query[name] = request.args[name.encode("ascii")][0].decode(
+                    "utf-8")
+        response_data = self.session(tenant_id).list_load_balancers(**query)
         request.setResponseCode(response_data[1])
         return json.dumps(response_data[0])
 
@@ -273,12 +378,23 @@ class LoadBalancerRegion(object):
                methods=['GET'])
     def get_node_feed(self, request, tenant_id, lb_id, node_id):
         """
-        Returns a 200 response code and node's feed on the load balancer
+        Returns a 200 response code and a page of node's feed on the load
+        balancer, newest event first.  The page starts after the event given
+        by the ``marker`` query parameter, if any, and has at most ``limit``
+        events.
         """
-        body, code = self.session(tenant_id).get_node_feed(lb_id, node_id)
+        try:
+            paging = _paging_args(request)
+        except ValueError as e:
+            request.setResponseCode(400)
+            return json.dumps(invalid_resource(str(e)))
+        body, code = self.session(tenant_id).get_node_feed(
+            lb_id, node_id, **paging)
         request.setResponseCode(code)
         request.setHeader(b"Content-Type", b"application/atom+xml")
-        return body
+        if code != 200:
+            return body
+        return stream(request, body)
 
     @app.route(
         '/v2/<string:tenant_id>/loadbalancers/<int:lb_id>/nodes/<int:node_id>',
@@ -26,6 +26,7 @@ from mimic.imimic import IAPIMock
 from mimic.canned_responses.maas_json_home import json_home
 from mimic.canned_responses.maas_monitoring_zones import monitoring_zones
 from mimic.canned_responses.maas_alarm_examples import alarm_examples
+from mimic.canned_responses.maas_notification_types import notification_types
 from mimic.model.maas_errors import ObjectDoesNotExist, ParentDoesNotExist
 from mimic.model.maas_objects import (Agent,
                                       Alarm,
@@ -38,6 +39,7 @@ from mimic.model.maas_objects import (Agent,
                                       Suppression)
 from mimic.util.helper import json_from_request
 from mimic.util.helper import Matcher, random_hex_generator, random_hipsum
+from mimic.util.static import STATIC_BODIES
 
 
 MISSING_REQUIRED_ARGUMENT_REGEX = re.compile(
@@ -72,6 +74,14 @@ class MaasApi(object):
             )
         ]
 
+    def object_counts(self, data):
+        """
+        Count the entities in a tenant's :obj:`MCache` for every region, for
+        :obj:`mimic.metrics`.
+        """
+        return {"maas_entities": sum(len(mcache.entities)
+                                     for mcache in data.values())}
+
     def resource_for_region(self, region, uri_prefix, session_store):
         """
         Get an : obj: `twisted.web.iweb.IResource` for the given URI prefix;
@@ -105,24 +115,6 @@ class MCache(object):
                                label=u'Technical Contacts - Email',
                                created_at=current_time_milliseconds,
                                updated_at=current_time_milliseconds))])
-        self.notificationtypes_list = [{'id': 'webhook', 'fields': [{'name': 'url',
-                                                                     'optional': False,
-                                                                     'description': 'An HTTP or \
-                                                                      HTTPS URL to POST to'}]},
-                                       {'id': 'email', 'fields': [{'name': 'address',
-                                                                   'optional': False,
-                                                                   'description': 'Email \
-                                                                    address to send notifications to'}]},
-                                       {'id': 'pagerduty', 'fields': [{'name': 'service_key',
-                                                                       'optional': False,
-                                                                       'description': 'The PagerDuty \
-                                                                        service key to use.'}]},
-                                       {'id': 'sms', 'fields': [{'name': 'phone_number',
-                                                                 'optional': False,
-                                                                 'description': 'Phone number to send \
-                                                                  the notification to, \
-                                                                  with leading + and country \
-                                                                  code (E.164 format)'}]}]
         self.suppressions = collections.OrderedDict()
         self.audits_list = []
         self.maas_store = MaasStore(clock)
@@ -130,6 +122,18 @@ class MCache(object):
         self.test_alarm_errors = {}
 
 
+def _canned_list_json(values):
+    """
+    The JSON for a single page listing all of ``values``.
+    """
+    return {'values': values,
+            'metadata': {'count': len(values),
+                         'limit': 100,
+                         'marker': None,
+                         'next_marker': None,
+                         'next_href': None}}
+
+
 def _only_keys(dict_ins, keys):
     """
     Filters out unwanted keys of a dict.
@@ -1098,7 +1102,8 @@ class MaasMock(object):
         request.setResponseCode(200)
         mockapi_id = re.findall('/mimicking/(.+?)/', request.path.decode("utf-8"))[0]
         url = base_uri_from_request(request).rstrip('/') + '/mimicking/' + mockapi_id + '/ORD/v1.0'
-        return json.dumps(json_home(url))
+        return STATIC_BODIES.render_json(request, ("maas_json_home", url),
+                                         lambda: json_home(url))
 
     @app.route('/v1.0/<string:tenant_id>/views/agent_host_info', methods=['GET'])
     def view_agent_host_info(self, request, tenant_id):
@@ -1487,32 +1492,20 @@ class MaasMock(object):
         """
         Lists the monitoring zones
         """
-        mzs = monitoring_zones()
-        metadata = {
-            'count': len(mzs),
-            'limit': 100,
-            'marker': None,
-            'next_marker': None,
-            'next_href': None
-        }
         request.setResponseCode(200)
-        return json.dumps({'values': mzs, 'metadata': metadata})
+        return STATIC_BODIES.render_json(
+            request, "maas_monitoring_zones",
+            lambda: _canned_list_json(monitoring_zones()))
 
     @app.route('/v1.0/<string:tenant_id>/alarm_examples', methods=['GET'])
     def list_alarm_examples(self, request, tenant_id):
         """
         Lists all of the alarm examples.
         """
-        axs = alarm_examples()
-        metadata = {
-            'count': len(axs),
-            'limit': 100,
-            'marker': None,
-            'next_marker': None,
-            'next_href': None
-        }
         request.setResponseCode(200)
-        return json.dumps({'values': axs, 'metadata': metadata})
+        return STATIC_BODIES.render_json(
+            request, "maas_alarm_examples",
+            lambda: _canned_list_json(alarm_examples()))
 
     @app.route('/v1.0/<string:tenant_id>/views/alarmCountsPerNp', methods=['GET'])
     def alarm_counts_per_np(self, request, tenant_id):
@@ -1560,14 +1553,10 @@ class MaasMock(object):
         """
         Get the types of notifications supported: pageduty,email,sms, etc
         """
-        ntlist = self._entity_cache_for_tenant(tenant_id).notificationtypes_list
-        metadata = {'count': len(ntlist),
-                    'limit': 100,
-                    'marker': None,
-                    'next_marker': None,
-                    'next_href': None}
         request.setResponseCode(200)
-        return json.dumps({'values': ntlist, 'metadata': metadata})
+        return STATIC_BODIES.render_json(
+            request, "maas_notification_types",
+            lambda: _canned_list_json(notification_types()))
 
     @app.route('/v1.0/<string:tenant_id>/views/metric_list', methods=['GET'])
     def views_metric_list(self, request, tenant_id):
@@ -7,13 +7,47 @@ from __future__ import absolute_import, division, unicode_literals
 from klein import Klein
 
 
+def _handler_name(handler):
+    """
+    A short name for a route handler, for labelling metrics: the last part of
+    its module's name and its own name.
+    """
+    return "{0}.{1}".format(handler.__module__.rsplit(".", 1)[-1],
+                            handler.__name__)
+
+
 class MimicApp(Klein):
     """
     Base app that extends Klein to override route.
+
+    Each request records the route which handled it, as a 2-tuple of the
+    handler's name and the route's URL pattern, in its ``mimic_route``
+    attribute.  When routes are nested, the innermost one wins.
     """
-    def route(self, *args, **kwargs):
+    def route(self, url, *args, **kwargs):
         """
         Default strict_slashes to False
         """
         kwargs['strict_slashes'] = False
-        return super(MimicApp, self).route(*args, **kwargs)
+        endpoint = kwargs.get('endpoint')
+        branch = kwargs.get('branch', False)
+        register = super(MimicApp, self).route(url, *args, **kwargs)
+
+        def register_and_label(handler):
+            result = register(handler)
+            name = endpoint or handler.__name__
+            label = (_handler_name(handler), url)
+            self.endpoints[name].mimic_route = label
+            if branch:
+                self.endpoints[name + "_branch"].mimic_route = label
+            return result
+        return register_and_label
+
+    def execute_endpoint(self, endpoint, request, *args, **kwargs):
+        """
+        Record the route on the request before handling it.
+        """
+        request.mimic_route = getattr(self.endpoints[endpoint], "mimic_route",
+                                      None)
+        return super(MimicApp, self).execute_endpoint(
+            endpoint, request, *args, **kwargs)
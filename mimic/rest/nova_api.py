@@ -9,10 +9,11 @@ from uuid import uuid4
 import json
 
 import attr
-from six import text_type
+from six import integer_types, text_type
 
 from zope.interface import implementer
 
+from twisted.internet.defer import Deferred
 from twisted.plugin import IPlugin
 from twisted.web.http import CREATED, BAD_REQUEST
 
@@ -24,8 +25,9 @@ from mimic.catalog import Endpoint
 from mimic.imimic import IAPIMock
 from mimic.model.behaviors import make_behavior_api
 from mimic.model.nova_objects import (
-    BadRequestError, GlobalServerCollections, LimitError, Server,
-    bad_request, forbidden, not_found, server_creation)
+    AddressPoolExhaustedError, BadRequestError, GlobalServerCollections,
+    LimitError, Server, bad_request, compute_fault, forbidden, not_found,
+    server_creation)
 from mimic.model.flavor_collections import GlobalFlavorCollection
 from mimic.model.nova_image_collection import GlobalNovaImageCollection
 from mimic.model.rackspace_image_store import RackspaceImageStore
@@ -38,11 +40,16 @@ class NovaApi(object):
     Rest endpoints for mocked Nova Api.
     """
 
-    def __init__(self, regions=["ORD", "DFW", "IAD"]):
+    def __init__(self, regions=["ORD", "DFW", "IAD"], tombstone_retention=None):
         """
         Create a NovaApi with an empty region cache, no servers or tenants yet.
+
+        :param tombstone_retention: How many seconds deleted servers are
+            reported by ``changes-since`` listings for, or ``None`` to report
+            them forever.
         """
         self._regions = regions
+        self._tombstone_retention = tombstone_retention
 
     def catalog_entries(self, tenant_id):
         """
@@ -67,6 +74,15 @@ class NovaApi(object):
         return (NovaRegion(self, uri_prefix, session_store, region)
                 .app.resource())
 
+    def object_counts(self, data):
+        """
+        Count the servers in a tenant's :obj:`GlobalServerCollections`, for
+        :obj:`mimic.metrics`.
+        """
+        return {"servers": sum(
+            collection.server_count()
+            for collection in data.regional_collections.values())}
+
     def _get_session(self, session_store, tenant_id):
         """
         Retrieve or create a new Nova session from a given tenant identifier
@@ -81,7 +97,8 @@ class NovaApi(object):
             session_store.session_for_tenant_id(tenant_id)
             .data_for_api(self, lambda: GlobalServerCollections(
                 tenant_id=tenant_id,
-                clock=session_store.clock
+                clock=session_store.clock,
+                tombstone_retention=self._tombstone_retention
             ))
         )
 
@@ -167,10 +184,22 @@ class NovaControlApiRegion(object):
 
         As more attributes are added, they should be additional top-level keys
         where "status" goes in this request.
+
+        ``"tombstone_retention"`` sets how many seconds deleted servers are
+        reported by ``changes-since`` listings for, or with ``null``, that
+        they are reported forever; see
+        :obj:`RegionalServerCollection.set_tombstone_retention`.
         """
         region_collection = self._collection_from_tenant(tenant_id)
         attributes_description = json_from_request(request)
-        statuses_description = attributes_description["status"]
+        retention = attributes_description.get("tombstone_retention")
+        if retention is not None and (
+                isinstance(retention, bool) or
+                not isinstance(retention, (integer_types, float)) or
+                retention < 0):
+            request.setResponseCode(BAD_REQUEST)
+            return b''
+        statuses_description = attributes_description.get("status", {})
         servers = [region_collection.server_by_id(server_id)
                    for server_id in statuses_description]
         if None in servers:
@@ -178,9 +207,33 @@ class NovaControlApiRegion(object):
             return b''
         for server in servers:
             server.update_status(statuses_description[server.server_id])
+        if "tombstone_retention" in attributes_description:
+            region_collection.set_tombstone_retention(retention)
         request.setResponseCode(CREATED)
         return b''
 
+    @app.route("/v2/<string:tenant_id>/lifecycle", methods=['GET'])
+    def get_lifecycle(self, request, tenant_id):
+        """
+        Report how many status transitions (for example, servers finishing
+        their build or reboot) are pending for the tenant's servers in this
+        region.
+
+        The response looks like this::
+
+            {
+                "pending_transitions": {
+                    "total": 3,
+                    "by_status": {"ACTIVE": 2, "ERROR": 1}
+                }
+            }
+        """
+        counts = self._collection_from_tenant(tenant_id).lifecycle.pending_counts()
+        return json.dumps({"pending_transitions": {
+            "total": sum(counts.values()),
+            "by_status": counts
+        }})
+
     def _collection_from_tenant(self, tenant_id):
         """
         Retrieve the server collection for this region for the given tenant.
@@ -268,14 +321,28 @@ class NovaRegion(object):
             return json.dumps(
                 bad_request("Invalid JSON request body", request))
 
+        def creation_error(e):
+            if isinstance(e, BadRequestError):
+                return json.dumps(bad_request(e.nova_message, request))
+            if isinstance(e, LimitError):
+                return json.dumps(forbidden(e.nova_message, request))
+            return json.dumps(compute_fault(e.nova_message, request))
+
+        creation_errors = (BadRequestError, LimitError,
+                           AddressPoolExhaustedError)
         try:
             creation = (self._region_collection_for_tenant(tenant_id)
                         .request_creation(request, content, self.url))
-        except BadRequestError as e:
-            return json.dumps(bad_request(e.nova_message, request))
-        except LimitError as e:
-            return json.dumps(forbidden(e.nova_message, request))
+        except creation_errors as e:
+            return creation_error(e)
+
+        def creation_failed(failure):
+            failure.trap(*creation_errors)
+            return creation_error(failure.value)
 
+        if isinstance(creation, Deferred):
+            # A delayed creation behavior only fails once the delay is over.
+            creation.addErrback(creation_failed)
         return creation
 
     @app.route('/v2/<string:tenant_id>/servers/<string:server_id>', methods=['GET'])
@@ -48,6 +48,14 @@ class QueueApi(object):
         """
         return (QueueApiRoutes(self, uri_prefix, session_store, region).app.resource())
 
+    def object_counts(self, data):
+        """
+        Count the messages in a tenant's queues, in every region, for
+        :obj:`mimic.metrics`.
+        """
+        return {"queue_messages": sum(collection.message_count()
+                                      for collection in data.values())}
+
     def catalog_entries(self, tenant_id):
         """
         List catalog entries for the Nova API.
@@ -6,6 +6,9 @@ Implementation of simple in-memory session storage and generation for Mimic.
 
 from __future__ import absolute_import, division, unicode_literals
 
+from collections import OrderedDict
+from heapq import heappop, heappush
+from itertools import count
 from six import text_type
 from uuid import uuid4
 from datetime import datetime, timedelta
@@ -49,6 +52,32 @@ class Session(object):
             self._api_objects[api_mock] = data_factory()
         return self._api_objects[api_mock]
 
+    def release_api_data(self):
+        """
+        Drop all the application data associated with this session, so that
+        it can be garbage collected once the session has been discarded.
+        """
+        self._api_objects.clear()
+
+    def api_data(self):
+        """
+        The application data held for each API.
+
+        :return: a list of 2-tuples of API mock and the data held for it.
+        """
+        return list(self._api_objects.items())
+
+
+_EPOCH = datetime.utcfromtimestamp(0)
+
+
+def _seconds_from_datetime(when):
+    """
+    Convert a naive UTC :obj:`datetime` into seconds since the epoch, the
+    units used by :obj:`IReactorTime.seconds`.
+    """
+    return (when - _EPOCH).total_seconds()
+
 
 @attr.s
 class NonMatchingTenantError(Exception):
@@ -67,14 +96,26 @@ class SessionStore(object):
     are created on demand, since all authentication succeeds by default within
     Mimic.
 
+    By default sessions are kept forever.  A store may optionally be bounded,
+    either by discarding sessions once their ``expires`` time has passed
+    according to ``clock``, or by discarding the least recently used
+    session once more than ``max_sessions`` exist, or both.  Discarded
+    sessions release all the per-API data created for them.
+
     :ivar IReactorTime clock: The clock used to track session expiration.
+    :ivar bool expire_sessions: Whether sessions are discarded when they
+        expire.
+    :ivar max_sessions: The maximum number of sessions to keep, or ``None``
+        for no limit.
     """
 
-    def __init__(self, clock):
+    def __init__(self, clock, expire_sessions=False, max_sessions=None):
         """
         Create a session store with the given IReactorTime provider.
         """
         self.clock = clock
+        self.expire_sessions = expire_sessions
+        self.max_sessions = max_sessions
         self._token_to_session = {
             # mapping of token (unicode) to session (Session)
         }
@@ -88,6 +129,137 @@ class SessionStore(object):
             # mapping of token (unicode) to username (unicode: key in
             # _token_to_session)
         }
+        self._live_sessions = {
+            # mapping of id(session) to session (Session), for every session
+            # held by this store
+        }
+        self._username_key_for_session = {
+            # mapping of id(session) to the key (unicode) it is stored under
+            # in _username_to_token
+        }
+        self._tokens_for_session = {
+            # mapping of id(session) to a list of every token (unicode) that
+            # maps to it, including impersonation tokens
+        }
+        self._lru = OrderedDict(
+            # id(session) of every session, least recently used first; only
+            # maintained if max_sessions is set
+        )
+        self._expiry_heap = [
+            # heap of (expiry in seconds, tiebreaker, id(session)) entries
+        ]
+        self._expiry_for_session = {
+            # mapping of id(session) to the expiry (seconds) of its most recent
+            # heap entry; older heap entries are ignored
+        }
+        self._expiry_counter = count()
+        self._sweep_call = None
+        self._eviction_observers = []
+
+    def __len__(self):
+        """
+        The number of sessions currently held by this store.
+        """
+        return len(self._live_sessions)
+
+    def __iter__(self):
+        """
+        Iterate over the sessions currently held by this store.
+        """
+        return iter(list(self._live_sessions.values()))
+
+    def add_eviction_observer(self, observer):
+        """
+        Arrange for ``observer`` to be called with each session discarded by
+        this store, after it has been removed from every index.
+        """
+        self._eviction_observers.append(observer)
+
+    def _touch(self, session):
+        """
+        Mark the given session as the most recently used one.
+
+        :return: ``session``
+        """
+        key = id(session)
+        if self.max_sessions is not None and key in self._lru:
+            self._lru[key] = self._lru.pop(key)
+        return session
+
+    def _schedule_expiry(self, session):
+        """
+        Record the session's current expiration time, and make sure a sweep is
+        scheduled no later than that time.
+        """
+        if not self.expire_sessions:
+            return
+        when = _seconds_from_datetime(session.expires)
+        self._expiry_for_session[id(session)] = when
+        heappush(self._expiry_heap,
+                 (when, next(self._expiry_counter), id(session)))
+        if self._sweep_call is not None and self._sweep_call.active():
+            if self._sweep_call.getTime() <= when:
+                return
+            self._sweep_call.cancel()
+        self._sweep_call = self.clock.callLater(
+            max(when - self.clock.seconds(), 0), self._sweep)
+
+    def _sweep(self):
+        """
+        Discard every session whose expiration time has passed, then schedule
+        the next sweep for the earliest remaining expiration time.
+
+        Only the entries at the top of the heap are examined.  Entries
+        superseded by a later call to :obj:`_schedule_expiry` for the same
+        session, or belonging to sessions that have already been discarded,
+        are dropped as they surface.
+        """
+        self._sweep_call = None
+        now = self.clock.seconds()
+        heap = self._expiry_heap
+        while heap:
+            when, _, key = heap[0]
+            if self._expiry_for_session.get(key) != when:
+                heappop(heap)
+            elif when <= now:
+                heappop(heap)
+                self._evict(self._live_sessions[key])
+            else:
+                break
+        if heap:
+            self._sweep_call = self.clock.callLater(
+                max(heap[0][0] - now, 0), self._sweep)
+
+    def _evict(self, session):
+        """
+        Remove a session from every index, and release its per-API data.
+        """
+        key = id(session)
+        for token in self._tokens_for_session.pop(key, []):
+            if self._token_to_session.get(token) is session:
+                del self._token_to_session[token]
+        if self._userid_to_session.get(session.user_id) is session:
+            del self._userid_to_session[session.user_id]
+        if self._tenant_to_session.get(session.tenant_id) is session:
+            del self._tenant_to_session[session.tenant_id]
+        username_key = self._username_key_for_session.pop(key, None)
+        if self._username_to_token.get(username_key) == session.token:
+            del self._username_to_token[username_key]
+        self._lru.pop(key, None)
+        self._expiry_for_session.pop(key, None)
+        del self._live_sessions[key]
+        session.release_api_data()
+        for observer in self._eviction_observers:
+            observer(session)
+
+    def _enforce_limit(self):
+        """
+        Discard least recently used sessions until no more than
+        ``max_sessions`` remain.
+        """
+        while len(self._lru) > self.max_sessions:
+            oldest = next(iter(self._lru))
+            self._evict(self._live_sessions[oldest])
 
     def _new_session(self, username_key=None, **attributes):
         """
@@ -119,10 +291,18 @@ class SessionStore(object):
         session = Session(**attributes)
         if username_key is None:
             username_key = session.username
+        key = id(session)
+        self._live_sessions[key] = session
+        self._username_key_for_session[key] = username_key
+        self._tokens_for_session[key] = [session.token]
         self._username_to_token[username_key] = session.token
         self._token_to_session[session.token] = session
         self._userid_to_session[session.user_id] = session
         self._tenant_to_session[session.tenant_id] = session
+        self._schedule_expiry(session)
+        if self.max_sessions is not None:
+            self._lru[key] = None
+            self._enforce_limit()
         return session
 
     def _assert_tenant_matches(self, session, tenant_id):
@@ -145,7 +325,7 @@ class SessionStore(object):
             s = self._tenant_to_session[tenant_id]
         else:
             s = self._new_session(token=token, tenant_id=tenant_id)
-        return s
+        return self._touch(s)
 
     def existing_session_for_token(self, token):
         """
@@ -160,7 +340,7 @@ class SessionStore(object):
         :raise: :obj:`KeyError` if no such thing exists.
         """
         if token in self._token_to_session:
-            return self._token_to_session[token]
+            return self._touch(self._token_to_session[token])
         raise KeyError(token)
 
     def session_for_api_key(self, username, api_key, tenant_id=None):
@@ -184,10 +364,10 @@ class SessionStore(object):
         if username in self._username_to_token:
             s = self._token_to_session[self._username_to_token[username]]
             self._assert_tenant_matches(s, tenant_id)
-            return s
+            return self._touch(s)
 
         if tenant_id and tenant_id in self._tenant_to_session:
-            return self._tenant_to_session[tenant_id]
+            return self._touch(self._tenant_to_session[tenant_id])
 
         return self._new_session(username=username,
                                  tenant_id=tenant_id)
@@ -204,7 +384,11 @@ class SessionStore(object):
         )
         session.expires = datetime.utcfromtimestamp(self.clock.seconds() + expires_in)
         session.impersonator_session_map[impersonated_token] = impersonator_session
+        tokens = self._tokens_for_session[id(session)]
+        if impersonated_token not in tokens:
+            tokens.append(impersonated_token)
         self._token_to_session[impersonated_token] = session
+        self._schedule_expiry(session)
         return session
 
     def session_for_tenant_id(self, tenant_id, token_id=None):
@@ -217,4 +401,4 @@ class SessionStore(object):
         """
         if tenant_id not in self._tenant_to_session:
             return self._new_session(tenant_id=tenant_id, token=token_id)
-        return self._tenant_to_session[tenant_id]
+        return self._touch(self._tenant_to_session[tenant_id])
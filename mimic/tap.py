@@ -7,21 +7,61 @@ from __future__ import absolute_import, division, unicode_literals
 from twisted.application.strports import service
 from twisted.application.service import MultiService
 from twisted.python import usage
+from mimic.clock import HeapClock, ScaledClock
 from mimic.core import MimicCore
+from mimic.request_log import DEFAULT_BODY_LIMIT, FileSink, RequestLog
 from mimic.resource import MimicRoot, get_site
-from twisted.internet.task import Clock
+from mimic.session import SessionStore
 
 
 class Options(usage.Options):
     """
     Options for Mimic
     """
-    optParameters = [['listen', 'l', '8900', 'The endpoint to listen on.']]
+    optParameters = [['listen', 'l', '8900', 'The endpoint to listen on.'],
+                     ['max-sessions', None, None,
+                      'Keep at most this many sessions, discarding the least '
+                      'recently used ones (and all their data) beyond that.',
+                      int],
+                     ['time-scale', None, None,
+                      'Make mimic advance time this many times faster than '
+                      'real time advances; the "tick" endpoint still works.',
+                      float],
+                     ['log-file', None, None,
+                      'Log requests and responses to this file, one line of '
+                      'JSON each, written by a background thread; implies '
+                      '--verbose.'],
+                     ['log-body-limit', None, DEFAULT_BODY_LIMIT,
+                      'Log at most this many bytes of each request and '
+                      'response body.',
+                      int],
+                     ['log-sample-rate', None, 1.0,
+                      'Log only this fraction of requests, chosen at random.',
+                      float]]
     optFlags = [['realtime', 'r',
                  'Make mimic advance time as real time advances; '
                  'disable the "tick" endpoint.'],
                 ['verbose', 'v',
-                 'Log more verbosely: include full requests and responses.']]
+                 'Log more verbosely: include full requests and responses.'],
+                ['expire-sessions', None,
+                 'Discard sessions (and all their data) once they expire.']]
+
+    def postOptions(self):
+        """
+        Reject combinations of options which make no sense together.
+        """
+        if self['realtime'] and self['time-scale'] is not None:
+            raise usage.UsageError(
+                "--realtime and --time-scale are mutually exclusive.")
+        if self['max-sessions'] is not None and self['max-sessions'] < 1:
+            raise usage.UsageError("--max-sessions must be at least 1.")
+        if self['time-scale'] is not None and self['time-scale'] <= 0:
+            raise usage.UsageError("--time-scale must be positive.")
+        if self['log-body-limit'] < 0:
+            raise usage.UsageError("--log-body-limit must not be negative.")
+        if not 0 < self['log-sample-rate'] <= 1:
+            raise usage.UsageError(
+                "--log-sample-rate must be more than 0 and at most 1.")
 
 
 def makeService(config):
@@ -31,10 +71,24 @@ def makeService(config):
     s = MultiService()
     if config['realtime']:
         from twisted.internet import reactor as clock
+    elif config['time-scale'] is not None:
+        from twisted.internet import reactor
+        clock = ScaledClock(reactor, config['time-scale'])
     else:
-        clock = Clock()
-    core = MimicCore.fromPlugins(clock)
+        clock = HeapClock()
+    session_store = SessionStore(
+        clock, expire_sessions=bool(config['expire-sessions']),
+        max_sessions=config['max-sessions'])
+    core = MimicCore.fromPlugins(clock, session_store=session_store)
     root = MimicRoot(core, clock)
-    site = get_site(root.app.resource(), logging=bool(config['verbose']))
+    request_log = None
+    if config['verbose'] or config['log-file'] is not None:
+        request_log = RequestLog(body_limit=config['log-body-limit'],
+                                 sample_rate=config['log-sample-rate'])
+        if config['log-file'] is not None:
+            request_log.sink = FileSink(config['log-file'])
+            request_log.sink.setServiceParent(s)
+    site = get_site(root.app.resource(), request_log=request_log,
+                    metrics=core.metrics)
     service(config['listen'], site).setServiceParent(s)
     return s
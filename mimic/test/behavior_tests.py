@@ -134,6 +134,8 @@ def make_behavior_tests(behavior_helper_factory):
 
     - sequence behavior will rotate through the behaviors and default behavior
 
+    - the statistics of each behavior count the times it was chosen
+
     :param behavior_helper_factory: a class that implements
         :class:`IBehaviorAPITestHelperFactory`
 
@@ -246,6 +248,39 @@ def make_behavior_tests(behavior_helper_factory):
                 self.bhelper.validate_default_behavior(
                     *self.bhelper.trigger_event())
 
+        def test_behavior_stats(self):
+            """
+            Getting the behavior API endpoint reports how many times each
+            registered behavior and the default behavior have been chosen.
+            """
+            name, params = self.bhelper.names_and_params[0]
+            behavior_id = register_behavior(
+                self, self.bhelper.root, self.bhelper.behavior_api_endpoint,
+                name, params, self.bhelper.criteria)
+            self.bhelper.trigger_event()
+            self.bhelper.trigger_event()
+
+            response, stats = self.successResultOf(json_request(
+                self, self.bhelper.root, b"GET",
+                self.bhelper.behavior_api_endpoint))
+            self.assertEqual(response.code, 200)
+            [behavior_stats] = stats["behaviors"]
+            self.assertEqual(
+                (behavior_stats["id"], behavior_stats["name"],
+                 behavior_stats["hits"]),
+                (behavior_id, name, 2))
+            self.assertIsNot(behavior_stats["last_hit"], None)
+            self.assertEqual(stats["default"]["hits"], 0)
+
+            self.delete_behavior(behavior_id)
+            self.bhelper.trigger_event()
+            response, stats = self.successResultOf(json_request(
+                self, self.bhelper.root, b"GET",
+                self.bhelper.behavior_api_endpoint))
+            self.assertEqual(stats["behaviors"], [])
+            self.assertEqual(stats["default"]["hits"], 1)
+            self.assertEqual(stats["lookups"], 3)
+
     Tester.__name__ = str("TestsFor{0}").format(
         str(behavior_helper_factory.name)
     )
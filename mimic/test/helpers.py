@@ -10,7 +10,7 @@ from six import text_type
 
 from zope.interface import implementer
 
-from twisted.test.proto_helpers import StringTransport, MemoryReactor
+from twisted.test.proto_helpers import StringTransport, MemoryReactorClock as MemoryReactor
 
 from twisted.internet.address import IPv4Address
 from twisted.internet.error import ConnectionDone
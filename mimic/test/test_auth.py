@@ -23,6 +23,7 @@ from mimic.test.behavior_tests import (
     behavior_tests_helper_class,
     register_behavior
 )
+from mimic.rest.nova_api import NovaApi
 from mimic.test.dummy import ExampleAPI
 from mimic.test.helpers import json_request, request, request_with_content
 
@@ -400,6 +401,40 @@ class GetAuthTokenAPITests(SynchronousTestCase):
         self.assertEqual(
             json_body2['access']['user']['roles'], HARD_CODED_ROLES)
 
+    def test_repeated_authentication_has_identical_catalog(self):
+        """
+        Authenticating repeatedly as the same tenant returns the same service
+        catalog every time.
+        """
+        core, root = core_and_root([ExampleAPI(
+            regions_and_versions=[("ORD", "v1"), ("DFW", "v2")])])
+        (response, json_body) = authenticate_with_username_password(
+            self, root, tenant_id="12345")
+        (response1, json_body1) = authenticate_with_username_password(
+            self, root, tenant_id="12345")
+        self.assertEqual(200, response1.code)
+        self.assertEqual(json_body["access"]["serviceCatalog"],
+                         json_body1["access"]["serviceCatalog"])
+        self.assertEqual(2, len(
+            json_body1["access"]["serviceCatalog"][0]["endpoints"]))
+
+    def test_endpoint_ids_stable_across_requests(self):
+        """
+        The endpoint IDs returned for a token are the same on every request,
+        even for APIs which generate random endpoint IDs.
+        """
+        core, root = core_and_root([NovaApi(["ORD", "DFW"])])
+
+        def endpoint_ids():
+            (response, json_body) = self.successResultOf(json_request(
+                self, root, b"GET",
+                "/identity/v2.0/tokens/1234567890/endpoints"))
+            return [endpoint["id"] for endpoint in json_body["endpoints"]]
+
+        first = endpoint_ids()
+        self.assertEqual(2, len(first))
+        self.assertEqual(first, endpoint_ids())
+
     def test_authentication_request_with_no_body_causes_http_bad_request(self):
         """
         The response for empty body request is bad_request.
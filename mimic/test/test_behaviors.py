@@ -0,0 +1,372 @@
+"""
+Tests for :mod:`mimic.model.behaviors`.
+"""
+
+from __future__ import absolute_import, division, unicode_literals
+
+from itertools import product
+
+from six import text_type
+
+from twisted.internet.defer import CancelledError
+from twisted.internet.task import Clock
+from twisted.trial.unittest import SynchronousTestCase
+
+from mimic.model.behaviors import (
+    BehaviorRegistry, BehaviorRegistryCollection, Criterion, EventDescription,
+    _delay_sampler, regexp_predicate)
+
+
+def make_event():
+    """
+    Make an event with ``name`` and ``tenant`` regular expression criteria, a
+    ``tags`` criterion which is an arbitrary predicate, a ``respond``
+    behavior which returns its parameter, and a default behavior which
+    returns ``"default"``.
+    """
+    event = EventDescription()
+
+    @event.declare_default_behavior
+    def default(*args, **kwargs):
+        return "default"
+
+    @event.declare_behavior_creator("respond")
+    def respond(parameters):
+        return lambda *args, **kwargs: parameters
+
+    for name in ["name", "tenant"]:
+        event.declare_criterion(name)(
+            lambda value, name=name: Criterion(
+                name=name, predicate=regexp_predicate(value)))
+
+    @event.declare_criterion("tags")
+    def tags(value):
+        return Criterion(name="tags",
+                         predicate=lambda tags: value in tags)
+
+    return event
+
+
+class BehaviorRegistryTests(SynchronousTestCase):
+    """
+    Tests for :obj:`BehaviorRegistry`.
+    """
+
+    def setUp(self):
+        """
+        Create a registry for an event from :obj:`make_event`.
+        """
+        self.registry = BehaviorRegistry(make_event(), Clock())
+
+    def register(self, response, *criteria):
+        """
+        Register a behavior which responds with ``response`` when all of the
+        given criteria match.
+        """
+        return self.registry.register_from_json({
+            "name": "respond", "parameters": response,
+            "criteria": list(criteria)})
+
+    def respond(self, **attributes):
+        """
+        Call the behavior chosen for ``attributes``.
+        """
+        return self.registry.behavior_for_attributes(attributes)()
+
+    def test_default(self):
+        """
+        The default behavior is chosen when nothing is registered, or nothing
+        registered matches.
+        """
+        self.assertEqual(self.respond(name="a"), "default")
+        self.register("a", {"name": "^a$"})
+        self.assertEqual(self.respond(name="b"), "default")
+        self.assertEqual(self.respond(tenant="a"), "default")
+
+    def test_first_match_wins(self):
+        """
+        The earliest registered behavior whose criteria all match is chosen,
+        whether its patterns are literals, prefixes or regular expressions.
+        """
+        self.register("literal", {"name": "exact$"}, {"tenant": "^1$"})
+        self.register("prefix", {"name": "ex"})
+        self.register("regexp", {"name": "(e|x)+.c"})
+        self.register("tenantless", {"name": r"\w+(ish)?"})
+        self.assertEqual(self.respond(name="exact", tenant="1"), "literal")
+        self.assertEqual(self.respond(name="exact\n", tenant="1"), "literal")
+        self.assertEqual(self.respond(name="exact", tenant="2"), "prefix")
+        self.assertEqual(self.respond(name="xexc"), "regexp")
+        self.assertEqual(self.respond(name="nothing"), "tenantless")
+        self.assertEqual(self.respond(name="!"), "default")
+
+    def test_uncombinable_patterns(self):
+        """
+        Patterns with backreferences, named groups or global flags still
+        match as they would on their own.
+        """
+        self.register("backreference", {"name": r"(.)\1"})
+        self.register("named", {"name": r"(?P<x>y)(?P=x)"})
+        self.register("flags", {"name": "(?i)upper"})
+        self.register("plain", {"name": "(z)"})
+        self.assertEqual(self.respond(name="aa"), "backreference")
+        self.assertEqual(self.respond(name="yy"), "backreference")
+        self.assertEqual(self.respond(name="UPPER"), "flags")
+        self.assertEqual(self.respond(name="z"), "plain")
+        self.assertEqual(self.respond(name="ab"), "default")
+
+    def test_other_criteria(self):
+        """
+        Criteria whose predicates are not regular expressions are evaluated
+        alongside the compiled ones, including for attributes which cannot be
+        remembered.
+        """
+        self.register("tagged", {"name": "a"}, {"tags": "t"})
+        self.assertEqual(self.respond(name="a", tags=["t"]), "tagged")
+        self.assertEqual(self.respond(name="a", tags=["u"]), "default")
+        self.assertEqual(self.respond(name="b", tags=["t"]), "default")
+
+    def test_non_string_attributes(self):
+        """
+        An attribute whose value is not a string, such as a tenant ID of
+        ``None`` when a user authenticates without one, matches no regular
+        expression criteria, literal or otherwise.
+        """
+        self.register("literal", {"name": "^a$"}, {"tenant": "^1$"})
+        self.register("regexp", {"tenant": "1+"})
+        self.register("backreference", {"tenant": r"(.)\1"})
+        self.assertEqual(self.respond(name="bob", tenant=None), "default")
+        self.assertEqual(self.respond(name="a", tenant=None), "default")
+        self.assertEqual(self.respond(name=None, tenant="1"), "regexp")
+        self.assertIs(regexp_predicate("1")(None), None)
+
+    def test_changes_seen(self):
+        """
+        Registering and removing behaviors changes the behavior chosen for
+        attributes which have been looked up before.
+        """
+        self.assertEqual(self.respond(name="a"), "default")
+        first = self.register("first", {"name": "a"})
+        self.assertEqual(self.respond(name="a"), "first")
+        self.register("second", {"name": "a"})
+        self.assertEqual(self.respond(name="a"), "first")
+        self.registry.remove_behavior_by_id(first)
+        self.assertEqual(self.respond(name="a"), "second")
+
+    def test_same_as_evaluating_each(self):
+        """
+        The behavior chosen is always the same as evaluating the criteria of
+        each registered behavior in turn.
+        """
+        patterns = ["a", "a$", "^ab$", "a+b", "b|c", "[bc]a$", "(a)(b)?c",
+                    "", "$"]
+        for (name, tenant) in product(patterns, ["1", "1$", "2"]):
+            self.register(name + "/" + tenant,
+                          {"name": name}, {"tenant": tenant})
+        for (name, tenant) in product(["", "a", "ab", "abc", "ba", "c", "d"],
+                                      ["1", "12", "2"]):
+            attributes = {"name": name, "tenant": tenant}
+            expected = next((behavior() for behavior, criteria, _
+                             in self.registry.registered_behaviors
+                             if criteria.evaluate(attributes)), "default")
+            self.assertEqual(self.respond(**attributes), expected)
+
+
+class BehaviorStatsTests(SynchronousTestCase):
+    """
+    Tests for the statistics a :obj:`BehaviorRegistry` keeps.
+    """
+
+    def setUp(self):
+        """
+        Create a registry whose timer and clock only move when they are told
+        to, with one behavior registered.
+        """
+        self.now = 0.0
+        self.clock = Clock()
+        self.registry = BehaviorRegistry(make_event(), self.clock,
+                                         timer=lambda: self.now)
+        self.behavior_id = self.registry.register_from_json({
+            "name": "respond", "parameters": "a",
+            "criteria": [{"name": "a"}]})
+
+    def test_hits_counted(self):
+        """
+        Each lookup counts a hit for the behavior chosen, or for the default
+        behavior if none matched.
+        """
+        for name in ["a", "a", "b"]:
+            self.registry.behavior_for_attributes({"name": name})
+        stats = self.registry.stats_json()
+        self.assertEqual(
+            [(behavior["id"], behavior["name"], behavior["hits"])
+             for behavior in stats["behaviors"]],
+            [(text_type(self.behavior_id), "respond", 2)])
+        self.assertEqual((stats["default"]["hits"], stats["lookups"]),
+                         (1, 3))
+        self.assertEqual(self.registry.default_stats.name, "default")
+
+    def test_same_behavior_returned(self):
+        """
+        Every lookup which chooses a behavior returns the same object for
+        it, which still adds to that behavior's statistics.
+        """
+        for name in ["a", "b"]:
+            behavior = self.registry.behavior_for_attributes({"name": name})
+            self.assertIs(
+                self.registry.behavior_for_attributes({"name": name}),
+                behavior)
+        self.now = 1.0
+        self.assertEqual(
+            self.registry.behavior_for_attributes({"name": "a"})(), "a")
+        self.assertEqual(self.registry.stats_json()["behaviors"][0]["hits"], 3)
+
+    def test_last_hit(self):
+        """
+        The time a behavior was last chosen is taken from the registry's
+        clock, not from its timer, so that it agrees with the simulated time
+        of everything else.
+        """
+        self.assertIs(self.registry.default_stats.last_hit, None)
+        self.now = 1000.0
+        self.clock.advance(60)
+        self.registry.behavior_for_attributes({"name": "b"})
+        self.assertEqual(self.registry.default_stats.last_hit, 60)
+        self.assertEqual(self.registry.stats_json()["default"]["last_hit"],
+                         "1970-01-01T00:01:00.000000Z")
+
+    def test_handler_time(self):
+        """
+        Running the behavior returned adds the time it took to the chosen
+        behavior's handler time, even if it fails.
+        """
+        def slow():
+            self.now += 2.5
+            raise ValueError()
+        self.registry.event.default_behavior = slow
+        self.registry.behavior_for_attributes({"name": "a"})()
+        self.assertRaises(
+            ValueError, self.registry.behavior_for_attributes({"name": "b"}))
+        self.assertEqual(self.registry.default_stats.handler_seconds, 2.5)
+        self.assertEqual(
+            self.registry.stats_json()["behaviors"][0]["handler_seconds"], 0)
+
+    def test_removed_behavior_forgotten(self):
+        """
+        Removing a behavior removes its statistics.
+        """
+        self.registry.remove_behavior_by_id(self.behavior_id)
+        self.assertEqual(self.registry.stats_json()["behaviors"], [])
+
+
+class DelayBehaviorTests(SynchronousTestCase):
+    """
+    Tests for the ``delay`` behavior every :obj:`EventDescription` has.
+    """
+
+    def setUp(self):
+        """
+        Create an event from :obj:`make_event`, and a clock.
+        """
+        self.event = make_event()
+        self.clock = Clock()
+
+    def test_fixed_delay(self):
+        """
+        A delayed behavior returns a :obj:`Deferred` which fires with the
+        wrapped behavior's response once the delay has passed on the clock
+        it was created with, whatever its arguments.
+        """
+        delayed = self.event.create_behavior("delay", {
+            "seconds": 2, "behavior": {"name": "respond", "parameters": "r"}},
+            self.clock)
+        responses = [delayed(object()) for _ in range(1000)]
+        self.clock.advance(1.5)
+        self.assertNoResult(responses[0])
+        self.clock.advance(0.5)
+        self.assertEqual([self.successResultOf(d) for d in responses],
+                         ["r"] * 1000)
+
+    def test_default_behavior(self):
+        """
+        By default the default behavior is delayed, and the delayed call is
+        cancelled along with the response.
+        """
+        delayed = self.event.create_behavior("delay", {"min": 1, "max": 1},
+                                             self.clock)
+        d = delayed(argument="value")
+        self.clock.advance(1)
+        self.assertEqual(self.successResultOf(d), "default")
+
+        d = delayed(argument="value")
+        d.cancel()
+        self.failureResultOf(d, CancelledError)
+        self.assertEqual(self.clock.getDelayedCalls(), [])
+
+    def test_registry_clock(self):
+        """
+        A delay registered with a :obj:`BehaviorRegistry`, even one nested
+        in a sequence, waits on the registry's clock.
+        """
+        registry = BehaviorRegistry(self.event, self.clock)
+        registry.register_from_json({
+            "name": "sequence", "criteria": [],
+            "parameters": {"behaviors": [
+                {"name": "delay", "parameters": {"seconds": 3}}]}})
+        d = registry.behavior_for_attributes({})()
+        self.clock.advance(3)
+        self.assertEqual(self.successResultOf(d), "default")
+
+    def test_distributions(self):
+        """
+        Delays are fixed, uniformly distributed or interpolated between
+        percentiles.
+        """
+        def uniform(low, high):
+            return high
+        self.assertEqual(_delay_sampler({"seconds": 3})(), 3)
+        self.assertEqual(_delay_sampler({"min": 1, "max": 4}, uniform)(), 4)
+        percentiles = {"50": 1, "90": 2, "100": 12}
+        for value, delay in [(0, 0), (25, 0.5), (50, 1), (70, 1.5),
+                             (95, 7), (100, 12)]:
+            self.assertEqual(
+                _delay_sampler({"percentiles": percentiles},
+                               lambda low, high: value)(), delay)
+
+    def test_invalid_parameters(self):
+        """
+        Parameters which do not describe a distribution of non-negative
+        delays are rejected.
+        """
+        for parameters in [{}, {"seconds": -1}, {"min": 2, "max": 1},
+                           {"max": 1}, {"percentiles": {}},
+                           {"percentiles": {"50": 2, "90": 1}},
+                           {"percentiles": {"150": 1}},
+                           {"seconds": None}, {"min": None, "max": 1},
+                           {"percentiles": [1, 2]},
+                           {"percentiles": {"50": None}}, [1, 2],
+                           {"seconds": "nan"}, {"seconds": float("inf")},
+                           {"min": 0, "max": "inf"},
+                           {"percentiles": {"nan": 1}}]:
+            self.assertRaises((ValueError, KeyError),
+                              _delay_sampler, parameters)
+
+
+class BehaviorRegistryCollectionTests(SynchronousTestCase):
+    """
+    Tests for :obj:`BehaviorRegistryCollection`.
+    """
+
+    def test_registry_by_event(self):
+        """
+        Each event gets its own registry, which is the same every time it is
+        asked for.
+        """
+        clock = Clock()
+        collection = BehaviorRegistryCollection(clock=clock)
+        event1 = make_event()
+        event2 = make_event()
+        registry = collection.registry_by_event(event1)
+        self.assertIs(registry.event, event1)
+        self.assertIs(registry.clock, clock)
+        self.assertIs(collection.registry_by_event(event1), registry)
+        self.assertIsNot(collection.registry_by_event(event2), registry)
@@ -0,0 +1,225 @@
+"""
+Tests for :mod:`mimic.clock`.
+"""
+
+from __future__ import absolute_import, division, unicode_literals
+
+from twisted.internet.interfaces import IReactorTime
+from twisted.internet.task import Clock
+from twisted.trial.unittest import SynchronousTestCase
+
+from zope.interface.verify import verifyObject
+
+from mimic.clock import HeapClock, ScaledClock
+
+
+class HeapClockTests(SynchronousTestCase):
+    """
+    Tests for :class:`HeapClock`.
+    """
+
+    def setUp(self):
+        """
+        Create a :class:`HeapClock` and a list to record calls in.
+        """
+        self.clock = HeapClock()
+        self.calls = []
+
+    def record(self, *args, **kwargs):
+        """
+        Record the time and arguments of a call.
+        """
+        self.calls.append((self.clock.seconds(), args, kwargs))
+
+    def test_provides_ireactortime(self):
+        """
+        :class:`HeapClock` provides :obj:`IReactorTime`.
+        """
+        self.assertTrue(verifyObject(IReactorTime, self.clock))
+
+    def test_advance(self):
+        """
+        :func:`HeapClock.advance` moves time forward, and runs every call
+        that is due in order of time, then order of scheduling.
+        """
+        self.clock.callLater(3, self.record, "c")
+        self.clock.callLater(1, self.record, "a", key="value")
+        self.clock.callLater(3, self.record, "d")
+        self.clock.callLater(2, self.record, "b")
+        self.clock.callLater(5, self.record, "e")
+        self.assertEqual(0, self.clock.seconds())
+        self.clock.advance(3)
+        self.assertEqual(3, self.clock.seconds())
+        self.assertEqual(
+            [(3, ("a",), {"key": "value"}), (3, ("b",), {}),
+             (3, ("c",), {}), (3, ("d",), {})],
+            self.calls)
+        self.assertEqual(1, len(self.clock.getDelayedCalls()))
+
+    def test_delayed_call_state(self):
+        """
+        The :obj:`DelayedCall` returned from :func:`HeapClock.callLater` knows
+        its time and whether it has been called.
+        """
+        call = self.clock.callLater(2, self.record)
+        self.assertEqual(2, call.getTime())
+        self.assertTrue(call.active())
+        self.assertEqual([call], self.clock.getDelayedCalls())
+        self.clock.advance(2)
+        self.assertFalse(call.active())
+        self.assertEqual([], self.clock.getDelayedCalls())
+
+    def test_cancel(self):
+        """
+        A cancelled call is never run and is no longer pending.
+        """
+        call = self.clock.callLater(1, self.record, "cancelled")
+        self.clock.callLater(1, self.record, "kept")
+        call.cancel()
+        self.assertEqual(1, len(self.clock.getDelayedCalls()))
+        self.clock.advance(1)
+        self.assertEqual([(1, ("kept",), {})], self.calls)
+
+    def test_reset_and_delay(self):
+        """
+        A call which is reset or delayed runs at its new time, and only once.
+        """
+        reset_call = self.clock.callLater(1, self.record, "reset")
+        delayed_call = self.clock.callLater(1, self.record, "delayed")
+        reset_call.reset(5)
+        delayed_call.delay(2)
+        self.assertEqual([delayed_call, reset_call],
+                         self.clock.getDelayedCalls())
+        self.clock.advance(1)
+        self.assertEqual([], self.calls)
+        self.clock.advance(2)
+        self.assertEqual([(3, ("delayed",), {})], self.calls)
+        self.clock.advance(2)
+        self.assertEqual([(3, ("delayed",), {}), (5, ("reset",), {})],
+                         self.calls)
+        self.clock.advance(10)
+        self.assertEqual(2, len(self.calls))
+
+    def test_call_scheduled_during_advance(self):
+        """
+        A call scheduled by another call runs in the same advance if it is
+        already due.
+        """
+        self.clock.callLater(
+            1, lambda: self.clock.callLater(0, self.record, "nested"))
+        self.clock.advance(1)
+        self.assertEqual([(1, ("nested",), {})], self.calls)
+
+    def test_stale_entries_compacted(self):
+        """
+        Cancelling most of a large number of calls does not leave the clock
+        holding on to them.
+        """
+        calls = [self.clock.callLater(i, self.record, i) for i in range(1000)]
+        for call in calls[:-10]:
+            call.cancel()
+        self.assertTrue(len(self.clock._heap) < 100)
+        self.clock.advance(1000)
+        self.assertEqual(list(range(990, 1000)),
+                         [args[0] for (_, args, _) in self.calls])
+
+    def test_pump(self):
+        """
+        :func:`HeapClock.pump` advances by each of the given amounts in turn.
+        """
+        self.clock.callLater(1, self.record)
+        self.clock.callLater(2, self.record)
+        self.clock.pump([1.5, 1.5])
+        self.assertEqual([1.5, 3], [when for (when, _, _) in self.calls])
+
+
+class ScaledClockTests(SynchronousTestCase):
+    """
+    Tests for :class:`ScaledClock`.
+    """
+
+    def setUp(self):
+        """
+        Create a :class:`ScaledClock` running ten times faster than a fake
+        reactor.
+        """
+        self.reactor = Clock()
+        self.reactor.advance(1000)
+        self.clock = ScaledClock(self.reactor, 10)
+        self.calls = []
+
+    def test_provides_ireactortime(self):
+        """
+        :class:`ScaledClock` provides :obj:`IReactorTime`.
+        """
+        self.assertTrue(verifyObject(IReactorTime, self.clock))
+
+    def test_seconds_scaled(self):
+        """
+        Time on a :class:`ScaledClock` starts at 0 and passes ``scale`` times
+        faster than on the reactor.
+        """
+        self.assertEqual(0, self.clock.seconds())
+        self.reactor.advance(2.5)
+        self.assertEqual(25, self.clock.seconds())
+
+    def test_calls_run_by_reactor(self):
+        """
+        Calls are run by the reactor once they are due on the scaled clock,
+        with only one reactor call pending at a time.
+        """
+        self.clock.callLater(100, self.calls.append, "later")
+        self.clock.callLater(50, self.calls.append, "sooner")
+        self.assertEqual(1, len(self.reactor.getDelayedCalls()))
+        self.assertEqual(5, self.reactor.getDelayedCalls()[0].getTime() - 1000)
+
+        self.reactor.advance(5)
+        self.assertEqual(["sooner"], self.calls)
+        self.assertEqual(1, len(self.reactor.getDelayedCalls()))
+
+        self.reactor.advance(5)
+        self.assertEqual(["sooner", "later"], self.calls)
+        self.assertEqual([], self.reactor.getDelayedCalls())
+
+    def test_cancel(self):
+        """
+        A cancelled call is not run when the reactor wakes up.
+        """
+        self.clock.callLater(10, self.calls.append, "cancelled").cancel()
+        self.reactor.advance(1)
+        self.assertEqual([], self.calls)
+        self.assertEqual([], self.clock.getDelayedCalls())
+
+    def test_advance(self):
+        """
+        :func:`ScaledClock.advance` moves time forward on top of the scaled
+        real time, and runs any calls that are due.
+        """
+        self.clock.callLater(100, self.calls.append, "advanced")
+        self.reactor.advance(1)
+        self.clock.advance(90)
+        self.assertEqual(100, self.clock.seconds())
+        self.assertEqual(["advanced"], self.calls)
+        self.reactor.advance(1)
+        self.assertEqual(110, self.clock.seconds())
+
+    def test_failing_call(self):
+        """
+        A call which raises an exception, whether run by the reactor or by
+        :func:`ScaledClock.advance`, does not stop later calls from being
+        run by the reactor.
+        """
+        def fail():
+            raise ZeroDivisionError()
+        self.clock.callLater(10, fail)
+        self.clock.callLater(20, self.calls.append, "after reactor")
+        self.assertRaises(ZeroDivisionError, self.reactor.advance, 1)
+        self.reactor.advance(1)
+        self.assertEqual(["after reactor"], self.calls)
+
+        self.clock.callLater(10, fail)
+        self.clock.callLater(20, self.calls.append, "after advance")
+        self.assertRaises(ZeroDivisionError, self.clock.advance, 30)
+        self.assertEqual(1, len(self.reactor.getDelayedCalls()))
+        self.reactor.advance(0)
+        self.assertEqual(["after reactor", "after advance"], self.calls)
@@ -1,12 +1,16 @@
 from __future__ import absolute_import, division, unicode_literals
 
+import json
 import sys
 
 from twisted.internet.task import Clock
 from twisted.trial.unittest import SynchronousTestCase
 from twisted.python.filepath import FilePath
 
+from mimic import core as core_module
 from mimic.core import MimicCore
+from mimic.session import SessionStore
+from mimic.test.dummy import ExampleAPI
 from mimic.plugins import (nova_plugin, loadbalancer_plugin, swift_plugin,
                            queue_plugin, maas_plugin, rackconnect_v3_plugin,
                            glance_plugin, cloudfeeds_plugin, heat_plugin,
@@ -86,3 +90,159 @@ dummy_domain_plugin = ExampleDomainAPI()
             fake_plugin.dummy_domain_plugin,
             core.domains
         )
+
+
+class ServiceResourceCacheTests(SynchronousTestCase):
+    """
+    Tests for caching of resources by :func:`MimicCore.service_with_region`.
+    """
+    def setUp(self):
+        """
+        Create a :class:`MimicCore` with a single :class:`ExampleAPI` that
+        counts how many times its resource has been constructed.
+        """
+        self.api = ExampleAPI()
+        self.calls = []
+        original = self.api.resource_for_region
+
+        def counting_resource_for_region(*args):
+            self.calls.append(args)
+            return original(*args)
+
+        self.api.resource_for_region = counting_resource_for_region
+        self.core = MimicCore(Clock(), [self.api])
+        self.service_id = next(iter(self.core._uuid_to_api))
+
+    def test_same_resource_returned_for_same_key(self):
+        """
+        Asking for the same service, region and base URI twice returns the
+        same resource, and only constructs it once.
+        """
+        first = self.core.service_with_region(
+            "ORD", self.service_id, "http://mimic/")
+        second = self.core.service_with_region(
+            "ORD", self.service_id, "http://mimic/")
+        self.assertIs(first, second)
+        self.assertEqual(1, len(self.calls))
+
+    def test_different_region_or_base_uri_not_shared(self):
+        """
+        A different region or base URI results in a different resource, with
+        the corresponding URI prefix.
+        """
+        ord_resource = self.core.service_with_region(
+            "ORD", self.service_id, "http://mimic/")
+        dfw_resource = self.core.service_with_region(
+            "DFW", self.service_id, "http://mimic/")
+        other_base = self.core.service_with_region(
+            "ORD", self.service_id, "http://other/")
+        self.assertEqual(3, len(set([id(ord_resource), id(dfw_resource),
+                                     id(other_base)])))
+        self.assertEqual(
+            ["http://mimic/mimicking/{0}/ORD/".format(self.service_id),
+             "http://mimic/mimicking/{0}/DFW/".format(self.service_id),
+             "http://other/mimicking/{0}/ORD/".format(self.service_id)],
+            [call[1] for call in self.calls])
+
+    def test_unknown_service_not_cached(self):
+        """
+        An unknown service ID returns ``None`` and does not populate the cache.
+        """
+        self.assertIsNone(
+            self.core.service_with_region("ORD", "nope", "http://mimic/"))
+        self.assertEqual({}, self.core._resource_cache)
+
+
+    def test_base_uris_bounded(self):
+        """
+        Resources and catalogs are only cached for the
+        :obj:`mimic.core.MAX_BASE_URIS` most recently used base URIs.
+        """
+        self.patch(core_module, "MAX_BASE_URIS", 2)
+        resources = {}
+        catalogs = {}
+        for base_uri in ["http://a/", "http://b/"]:
+            resources[base_uri] = self.core.service_with_region(
+                "ORD", self.service_id, base_uri)
+            catalogs[base_uri] = self.core.catalog_for_tenant(
+                "1234", base_uri)[0]
+        self.core.service_with_region("ORD", self.service_id, "http://a/")
+        self.core.catalog_for_tenant("1234", "http://c/")
+        self.assertIs(resources["http://a/"], self.core.service_with_region(
+            "ORD", self.service_id, "http://a/"))
+        self.assertIs(catalogs["http://a/"],
+                      self.core.catalog_for_tenant("1234", "http://a/")[0])
+        self.assertEqual(
+            [("1234", "http://a/"), ("1234", "http://c/")],
+            sorted(self.core._catalog_cache))
+        self.assertEqual([(self.service_id, "ORD", "http://a/")],
+                         list(self.core._resource_cache))
+        self.assertIsNot(resources["http://b/"], self.core.service_with_region(
+            "ORD", self.service_id, "http://b/"))
+
+
+class CatalogCacheTests(SynchronousTestCase):
+    """
+    Tests for caching of service catalogs by
+    :func:`MimicCore.catalog_for_tenant` and
+    :func:`MimicCore.service_catalog_json`.
+    """
+    def test_catalog_cached_per_tenant_and_base_uri(self):
+        """
+        The same entries are returned for the same tenant and base URI, and
+        different ones otherwise.
+        """
+        core = MimicCore(Clock(), [ExampleAPI()])
+        entries, prefix_map = core.catalog_for_tenant("1234", "http://mimic/")
+        self.assertIs(entries,
+                      core.catalog_for_tenant("1234", "http://mimic/")[0])
+        self.assertIsNot(entries,
+                         core.catalog_for_tenant("5678", "http://mimic/")[0])
+        self.assertIsNot(entries,
+                         core.catalog_for_tenant("1234", "http://other/")[0])
+        self.assertEqual(
+            ["http://mimic/mimicking/{0}/ORD/".format(
+                next(iter(core._uuid_to_api)))],
+            [prefix_map[endpoint] for endpoint in entries[0].endpoints])
+
+    def test_service_catalog_json(self):
+        """
+        :func:`MimicCore.service_catalog_json` renders the cached entries.
+        """
+        core = MimicCore(Clock(), [ExampleAPI()])
+        self.assertEqual(
+            [{"name": "serviceName", "type": "serviceType",
+              "endpoints": [{
+                  "region": "ORD", "tenantId": "1234",
+                  "publicURL": "http://mimic/mimicking/{0}/ORD/v1/1234".format(
+                      next(iter(core._uuid_to_api)))}]}],
+            json.loads(core.service_catalog_json("1234", "http://mimic/")))
+
+    def test_add_api_invalidates_catalogs(self):
+        """
+        Adding an API discards all cached catalogs, so the new API appears in
+        subsequent catalogs.
+        """
+        core = MimicCore(Clock(), [ExampleAPI()])
+        entries, _ = core.catalog_for_tenant("1234", "http://mimic/")
+        self.assertEqual(1, len(entries))
+        core.add_api(ExampleAPI())
+        entries, _ = core.catalog_for_tenant("1234", "http://mimic/")
+        self.assertEqual(2, len(entries))
+
+    def test_evicted_session_forgets_catalog(self):
+        """
+        When a session is discarded by the session store, the cached catalogs
+        for its tenant are discarded too.
+        """
+        clock = Clock()
+        core = MimicCore(clock, [ExampleAPI()],
+                         session_store=SessionStore(clock,
+                                                    expire_sessions=True))
+        core.sessions.session_for_tenant_id("1234")
+        core.catalog_for_tenant("1234", "http://mimic/")
+        core.catalog_for_tenant("5678", "http://mimic/")
+        clock.advance(86400)
+        self.assertEqual([("5678", "http://mimic/")],
+                         list(core._catalog_cache))
+        self.assertEqual(["5678"], list(core._catalog_keys))
@@ -4,8 +4,12 @@ Tests for :mod:`nova_api` and :mod:`nova_objects` for flavors.
 
 from __future__ import absolute_import, division, unicode_literals
 
+import json
+
 from twisted.trial.unittest import SynchronousTestCase
 
+from mimic.model.flavor_collections import (
+    FLAVOR_CATALOG, GlobalFlavorCollection)
 from mimic.test.helpers import json_request, request
 from mimic.rest.nova_api import NovaApi
 from mimic.test.fixtures import APIMockHelper
@@ -148,3 +152,44 @@ class NovaAPIFlavorsTests(SynchronousTestCase):
         self.assertEqual(get_server_flavor['flavor']['id'], 'onmetal-compute1')
         self.assertEqual(sorted(get_server_flavor['flavor']['OS-FLV-WITH-EXT-SPECS:extra_specs'].keys()),
                          sorted(['quota_resources', 'class', 'policy_class']))
+
+
+class FlavorCatalogTests(SynchronousTestCase):
+    """
+    Tests for the :obj:`FlavorCatalog` shared by every tenant.
+    """
+
+    def test_render_matches_flavor_json(self):
+        """
+        :obj:`FlavorCatalog.render` produces the same JSON as the flavor's
+        own ``brief_json`` and ``detailed_json`` would for the tenant.
+        """
+        def absolutize_url(path):
+            return "http://mimic/" + path
+
+        for flavor in FLAVOR_CATALOG.flavors:
+            tenant_flavor = type(flavor)(
+                flavor_id=flavor.flavor_id, tenant_id="1234",
+                name=flavor.name, ram=flavor.ram, vcpus=flavor.vcpus,
+                rxtx=flavor.rxtx, disk=flavor.disk)
+            self.assertEqual(
+                json.loads(FLAVOR_CATALOG.render(
+                    flavor, False, "1234", absolutize_url)),
+                tenant_flavor.brief_json(absolutize_url))
+            self.assertEqual(
+                json.loads(FLAVOR_CATALOG.render(
+                    flavor, True, "1234", absolutize_url)),
+                tenant_flavor.detailed_json(absolutize_url))
+
+    def test_shared_between_tenants(self):
+        """
+        Every tenant's flavor collections look flavors up in the same catalog,
+        by ID.
+        """
+        one = GlobalFlavorCollection(tenant_id="1", clock=None)
+        two = GlobalFlavorCollection(tenant_id="2", clock=None)
+        self.assertIs(
+            one.collection_for_region("ORD").flavor_by_id("2"),
+            two.collection_for_region("DFW").flavor_by_id("2"))
+        self.assertIs(
+            one.collection_for_region("ORD").flavor_by_id("nope"), None)
@@ -1,8 +1,10 @@
 import json
 import treq
 
+from twisted.internet.task import Clock
 from twisted.trial.unittest import SynchronousTestCase
 
+from mimic.model.behaviors import BehaviorRegistryCollection
 from mimic.model.heat_objects import RegionalStackCollection, Stack
 from mimic.rest.heat_api import HeatApi
 from mimic.test.fixtures import APIMockHelper
@@ -14,8 +16,10 @@ class HeatObjectTests(SynchronousTestCase):
         """
         Test initialization.
         """
-        self.coll = RegionalStackCollection(tenant_id='tenant123',
-                                            region_name='XYZ')
+        self.coll = RegionalStackCollection(
+            tenant_id='tenant123', region_name='XYZ',
+            behavior_registry_collection=BehaviorRegistryCollection(
+                clock=Clock()))
         self.stack = Stack(stack_name='foo', collection=self.coll)
 
     def test_update_stack_action(self):
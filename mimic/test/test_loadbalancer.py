@@ -7,6 +7,7 @@ from __future__ import absolute_import, division, unicode_literals
 import json
 import treq
 
+from twisted.internet.task import Clock
 from twisted.trial.unittest import SynchronousTestCase
 from mimic.canned_responses.loadbalancer import load_balancer_example
 from mimic.model.clb_errors import (
@@ -17,6 +18,7 @@ from mimic.model.clb_errors import (
     updating_node_validation_error
 )
 from mimic.test.fixtures import APIMockHelper, TenantAuthentication
+from mimic.model.clb_objects import RegionalCLBCollection
 from mimic.rest.loadbalancer_api import LoadBalancerApi, LoadBalancerControlApi
 from mimic.test.helpers import json_request, request_with_content, request
 from mimic.util.helper import EMPTY_RESPONSE
@@ -236,6 +238,129 @@ class LoadbalancerAPITests(SynchronousTestCase):
         r = self._patch_attributes_request(lb_id_offset=1000)
         self.assertEqual(r.resp.code, 404)
 
+    def _control(self, method, path, body):
+        """
+        Make a request to the CLB control plane, returning the response and
+        its JSON body, if it has one.
+        """
+        ctl_uri = self.helper.auth.get_service_endpoint(
+            "cloudLoadBalancerControl", "ORD")
+        resp, body = self.successResultOf(request_with_content(
+            self, self.root, method, ctl_uri + path,
+            json.dumps(body).encode("utf-8")))
+        return resp, (json.loads(body.decode("utf-8")) if body else None)
+
+    def _add_nodes(self, lb_id, *ports):
+        """
+        Add nodes on the given ports through the regular API, returning the
+        response code.
+        """
+        resp, _ = self.successResultOf(json_request(
+            self, self.root, b"POST",
+            "{0}/loadbalancers/{1}/nodes".format(self.uri, lb_id),
+            {"nodes": [{"address": "10.0.0.1", "port": port,
+                        "condition": "ENABLED"} for port in ports]}))
+        return resp.code
+
+    def test_node_limits(self):
+        """
+        The control plane can change the most nodes the tenant's load
+        balancers may have, and the most a particular one may have, which
+        takes precedence.
+        """
+        lb_ids = [self._create_loadbalancer(), self._create_loadbalancer()]
+        resp, _ = self._control(b"PATCH", "/loadbalancer/attributes",
+                                {"node_limit": 30})
+        self.assertEqual(resp.code, 204)
+        resp, _ = self._control(
+            b"PATCH", "/loadbalancer/{0}/attributes".format(lb_ids[1]),
+            {"node_limit": 2})
+        self.assertEqual(resp.code, 204)
+
+        self.assertEqual(self._add_nodes(lb_ids[0], *range(30)), 202)
+        self.assertEqual(self._add_nodes(lb_ids[0], 30), 413)
+        self.assertEqual(self._add_nodes(lb_ids[1], 1, 2, 3), 413)
+        self.assertEqual(self._add_nodes(lb_ids[1], 1, 2), 202)
+
+    def test_node_limits_validated(self):
+        """
+        Node limits must be positive integers, and only node limits may be
+        set for all the tenant's load balancers.
+        """
+        lb_id = self._create_loadbalancer()
+        for path in ["/loadbalancer/attributes",
+                     "/loadbalancer/{0}/attributes".format(lb_id)]:
+            for limit in [0, "10", True, 1.5]:
+                resp, body = self._control(b"PATCH", path,
+                                           {"node_limit": limit})
+                self.assertEqual(resp.code, 400)
+                self.assertIn("node_limit", body["message"])
+        resp, _ = self._control(b"PATCH", "/loadbalancer/attributes",
+                                {"status": "ERROR"})
+        self.assertEqual(resp.code, 400)
+
+    def test_bulk_nodes(self):
+        """
+        The control plane can upsert or replace a load balancer's whole set
+        of nodes in one request, matching nodes to existing nodes by address
+        and port.
+        """
+        lb_id = self._create_loadbalancer()
+        self.assertEqual(self._add_nodes(lb_id, 80, 81), 202)
+        path = "/loadbalancer/{0}/nodes".format(lb_id)
+
+        resp, body = self._control(b"PATCH", path, {"nodes": [
+            {"address": "10.0.0.1", "port": 81, "condition": "DRAINING",
+             "weight": 5},
+            {"address": "10.0.0.2", "port": 80}]})
+        self.assertEqual(resp.code, 200)
+        self.assertEqual(
+            [(n["address"], n["port"], n["condition"], n["weight"])
+             for n in body["nodes"]],
+            [("10.0.0.1", 80, "ENABLED", 1),
+             ("10.0.0.1", 81, "DRAINING", 5),
+             ("10.0.0.2", 80, "ENABLED", 1)])
+        ids = [n["id"] for n in body["nodes"]]
+
+        resp, body = self._control(b"PUT", path, {"nodes": [
+            {"address": "10.0.0.2", "port": 80, "condition": "DISABLED"},
+            {"address": "10.0.0.3", "port": 80}]})
+        self.assertEqual(resp.code, 200)
+        self.assertEqual(
+            [(n["address"], n["condition"]) for n in body["nodes"]],
+            [("10.0.0.2", "DISABLED"), ("10.0.0.3", "ENABLED")])
+        self.assertEqual(body["nodes"][0]["id"], ids[2])
+
+        nodes = self.successResultOf(json_request(
+            self, self.root, b"GET",
+            "{0}/loadbalancers/{1}/nodes".format(self.uri, lb_id)))[1]
+        self.assertEqual(nodes, body)
+
+    def test_bulk_nodes_errors(self):
+        """
+        A bulk node request changes nothing if the body is malformed, a node
+        is invalid or duplicated, the node limit would be exceeded, or the
+        load balancer does not exist.
+        """
+        lb_id = self._create_loadbalancer()
+        path = "/loadbalancer/{0}/nodes".format(lb_id)
+        node = {"address": "10.0.0.1", "port": 80}
+        for (method, body, code) in [
+                (b"PUT", {"node": [node]}, 400),
+                (b"PUT", {"nodes": [dict(node, condition="UP")]}, 400),
+                (b"PUT", {"nodes": [dict(node, weight=101)]}, 400),
+                (b"PATCH", {"nodes": [node, node]}, 413),
+                (b"PATCH", {"nodes": [dict(node, port=port)
+                                      for port in range(26)]}, 413)]:
+            resp, _ = self._control(method, path, body)
+            self.assertEqual(resp.code, code)
+        resp, _ = self._control(b"PUT", "/loadbalancer/{0}/nodes".format(
+            lb_id + 1), {"nodes": [node]})
+        self.assertEqual(resp.code, 404)
+        self.assertEqual(self.successResultOf(json_request(
+            self, self.root, b"GET", "{0}/loadbalancers/{1}/nodes".format(
+                self.uri, lb_id)))[1], {"nodes": []})
+
     def test_multiple_regions_multiple_endpoints(self):
         """
         API object created with multiple regions has multiple entries
@@ -328,6 +453,39 @@ class LoadbalancerAPITests(SynchronousTestCase):
         self.assertTrue(list_lb_response_body['loadBalancers'][0]['id'] !=
                         list_lb_response_body['loadBalancers'][1]['id'])
 
+    def test_list_loadbalancers_paged(self):
+        """
+        ``GET .../loadbalancers`` lists load balancers in order of ID, a page
+        at a time with the ``marker`` and ``limit`` query parameters, and
+        only those with a node at the ``nodeaddress`` given.
+        """
+        ids = sorted(
+            self._create_loadbalancer(
+                nodes=[{"address": address, "port": 80,
+                        "condition": "ENABLED"}])
+            for address in ["10.0.0.1", "10.0.0.2", "10.0.0.1"])
+
+        def list_ids(query):
+            resp, body = self.successResultOf(json_request(
+                self, self.root, b"GET", self.uri + '/loadbalancers' + query))
+            self.assertEqual(resp.code, 200)
+            return [lb["id"] for lb in body["loadBalancers"]]
+
+        self.assertEqual(list_ids(""), ids)
+        self.assertEqual(list_ids("?limit=2"), ids[:2])
+        self.assertEqual(list_ids("?limit=2&marker={0}".format(ids[1])),
+                         ids[2:])
+        self.assertEqual(list_ids("?nodeaddress=10.0.0.2&status=ACTIVE"),
+                         [lb_id for lb_id in ids if lb_id in list_ids(
+                             "?nodeaddress=10.0.0.2")])
+        self.assertEqual(len(list_ids("?nodeaddress=10.0.0.1")), 2)
+        self.assertEqual(list_ids("?status=BUILD"), [])
+
+        for query in ["?limit=0", "?marker=x"]:
+            resp = self.successResultOf(request(
+                self, self.root, b"GET", self.uri + '/loadbalancers' + query))
+            self.assertEqual(resp.code, 400)
+
     def test_list_loadbalancers_have_no_nodes(self):
         """
         When listing load balancers, nodes do not appear even if the load
@@ -1048,6 +1206,40 @@ class LoadbalancerNodeAPITests(SynchronousTestCase):
              "port: '80', weight: '100', condition: 'DISABLED'</summary>"
              "<updated>1970-01-01T00:00:00.000000Z</updated></entry></feed>"))
 
+    def test_get_feed_paged(self):
+        """
+        A node's feed is paged through newest first, following the ``next``
+        link of each page, which is left out of the last page.
+        """
+        node_id = self.node[0]["id"]
+        for weight in [2, 3, 4]:
+            _update_clb_node(
+                self, self.helper, self.lb_id, node_id,
+                json.dumps({"node": {"weight": weight}}).encode("utf-8"),
+                request_func=request_with_content)
+
+        def get_feed(query):
+            resp, body = self.successResultOf(request_with_content(
+                self, self.root, b"GET",
+                "{0}/loadbalancers/{1}/nodes/{2}.atom{3}".format(
+                    self.uri, self.lb_id, node_id, query)))
+            return resp.code, body.decode("utf-8")
+
+        code, body = get_feed("?limit=2")
+        self.assertEqual(code, 200)
+        link = '<link rel="next" href="?marker=2&amp;limit=2"/>'
+        self.assertIn(link, body)
+        self.assertTrue(body.index("weight: '4'") < body.index("weight: '3'"))
+        self.assertNotIn("weight: '2'", body)
+
+        code, body = get_feed("?marker=2&limit=2")
+        self.assertIn("weight: '2'", body)
+        self.assertNotIn("weight: '3'", body)
+        self.assertNotIn("<link", body)
+
+        self.assertEqual(get_feed("?limit=0")[0], 400)
+        self.assertEqual(get_feed("?marker=x")[0], 400)
+
     def test_get_feed_node_404(self):
         """
         Getting feed of non-existent node returns 404 with "Node not found"
@@ -1361,3 +1553,207 @@ class LoadbalancerAPINegativeTests(SynchronousTestCase):
 
         self.assertEqual((body, resp.code),
                          considered_immutable_error("PENDING-UPDATE", lb_id))
+
+
+class RegionalCLBCollectionTests(SynchronousTestCase):
+    """
+    Tests for :obj:`RegionalCLBCollection`.
+    """
+
+    def setUp(self):
+        """
+        Create an empty collection, on a clock which only moves when it is
+        told to.
+        """
+        self.clock = Clock()
+        self.clock.advance(1000)
+        self.collection = RegionalCLBCollection(self.clock)
+
+    def add(self, lb_id, *metadata):
+        """
+        Add a load balancer with the given metadata keys and values.
+        """
+        self.collection.add_load_balancer(
+            {"name": "lb", "protocol": "HTTP",
+             "metadata": [{"key": key, "value": value}
+                          for (key, value) in metadata]},
+            lb_id)
+
+    def status(self, lb_id):
+        """
+        The status of a load balancer.
+        """
+        return self.collection.get_load_balancers(lb_id)[0][
+            "loadBalancer"]["status"]
+
+    def test_build_scheduled(self):
+        """
+        A building load balancer becomes ``ACTIVE`` when its build time has
+        passed on the clock, without needing to be read, and without
+        changing when it was last updated.
+        """
+        self.add(1, ("lb_building", 5))
+        self.clock.advance(4)
+        self.assertEqual(self.status(1), "BUILD")
+        self.clock.advance(1)
+        self.assertEqual(self.collection.lbs[1]["status"], "ACTIVE")
+        self.assertEqual(self.collection.lbs[1].updated, 1000)
+        self.assertEqual(self.clock.getDelayedCalls(), [])
+
+    def test_pending_delete_then_purged(self):
+        """
+        A load balancer pending deletion is ``DELETED`` once that time has
+        passed since it was deleted, and is forgotten an hour later.
+        """
+        self.add(1, ("lb_pending_delete", 2))
+        self.clock.advance(10)
+        self.assertEqual(self.collection.del_load_balancer(1)[1], 202)
+        self.assertEqual(self.status(1), "PENDING-DELETE")
+        self.clock.advance(2)
+        self.assertEqual(self.status(1), "DELETED")
+        self.assertEqual(self.collection.lbs[1].updated, 1012)
+        self.assertEqual(self.collection.lbs[1]["updated"],
+                         {"time": "1970-01-01T00:16:52.000000Z"})
+        self.clock.advance(3600)
+        self.assertEqual(self.collection.lbs, {})
+
+    def test_status_set_cancels_transition(self):
+        """
+        Setting the status of a load balancer through the control API
+        cancels its pending transition, and deleting it forgets it entirely.
+        """
+        self.add(1, ("lb_building", 5))
+        self.collection.set_attributes(1, {"status": "ERROR"})
+        self.clock.advance(5)
+        self.assertEqual(self.status(1), "ERROR")
+
+        self.add(2, ("lb_pending_update", 5))
+        self.collection.add_node([{"address": "1.1.1.1", "port": 80}], 2)
+        self.assertEqual(self.status(2), "PENDING-UPDATE")
+        self.assertEqual(self.collection.del_load_balancer(2)[1], 202)
+        self.assertEqual(self.clock.getDelayedCalls(), [])
+
+    def add_nodes(self, lb_id, *addresses):
+        """
+        Add nodes with the given addresses, on port 80, to a load balancer.
+        """
+        return self.collection.add_node(
+            [{"address": address, "port": 80} for address in addresses],
+            lb_id)
+
+    def test_nodes_indexed(self):
+        """
+        Nodes are found by ID and by address and port, keep the order they
+        were added in when others are deleted, and their address and port
+        can be reused once they are gone.
+        """
+        self.collection.node_limit = 100
+        self.add(1)
+        body, code = self.add_nodes(1, *["10.0.0.{0}".format(i)
+                                         for i in range(10)])
+        self.assertEqual(code, 202)
+        ids = [node["id"] for node in body["nodes"]]
+        lb = self.collection.lbs[1]
+        self.assertIs(lb.node_at("10.0.0.3", 80), lb.node_by_id(ids[3]))
+
+        self.assertEqual(self.collection.delete_nodes(1, ids[2:8])[1], 202)
+        self.assertEqual([node.id for node in lb.nodes],
+                         ids[:2] + ids[8:])
+        self.assertIs(lb.node_at("10.0.0.3", 80), None)
+        self.assertEqual(self.add_nodes(1, "10.0.0.3")[1], 202)
+        self.assertEqual(lb.node_count(), 5)
+
+    def test_duplicate_nodes(self):
+        """
+        Nodes duplicating the address and port of an existing node, or of
+        each other, are rejected, and a node whose ID is taken is given
+        another.
+        """
+        self.add(1)
+        self.add_nodes(1, "10.0.0.1")
+        self.assertEqual(self.add_nodes(1, "10.0.0.1")[1], 413)
+        self.assertEqual(self.add_nodes(1, "10.0.0.2", "10.0.0.2")[1], 413)
+
+        [existing] = self.collection.lbs[1].nodes
+        body, code = self.collection.add_node(
+            [{"address": "10.0.0.3", "port": 80, "id": existing.id}], 1)
+        self.assertEqual(code, 202)
+        self.assertNotEqual(body["nodes"][0]["id"], existing.id)
+        self.assertEqual(self.collection.lbs[1].node_count(), 2)
+
+    def test_apply_nodes_within_limit(self):
+        """
+        Replacing every node counts only the nodes in the new set against the
+        load balancer's node limit, and does not change its status.
+        """
+        self.add(1)
+        self.collection.set_attributes(1, {"node_limit": 3})
+        self.add_nodes(1, "10.0.0.1", "10.0.0.2", "10.0.0.3")
+        nodes = [{"address": "10.0.1.{0}".format(i), "port": 80}
+                 for i in range(3)]
+        self.assertEqual(self.collection.apply_nodes(1, nodes)[1], 413)
+        body, code = self.collection.apply_nodes(1, nodes, replace=True)
+        self.assertEqual(code, 200)
+        self.assertEqual([node["address"] for node in body["nodes"]],
+                         ["10.0.1.0", "10.0.1.1", "10.0.1.2"])
+        self.assertEqual(self.status(1), "ACTIVE")
+
+    def test_node_feed_bounded(self):
+        """
+        A node's feed keeps only as many of its most recent events as the
+        collection's feed size, which can be changed.
+        """
+        self.add(1)
+        [node] = self.add_nodes(1, "10.0.0.1")[0]["nodes"]
+        self.collection.set_default_attributes({"node_feed_size": 3})
+        for weight in range(2, 7):
+            self.collection.update_node(1, node["id"], {"weight": weight})
+        feed = self.collection.lbs[1].node_by_id(node["id"]).feed_events
+        self.assertEqual((len(feed), feed.capacity, feed.next_id), (3, 3, 6))
+
+        events, marker = feed.page(limit=2)
+        self.assertEqual([event[0] for event in events], [5, 4])
+        events, marker = feed.page(marker, limit=2)
+        self.assertEqual(([event[0] for event in events], marker), ([3], None))
+
+        self.collection.set_default_attributes({"node_feed_size": 1})
+        self.collection.get_node_feed(1, node["id"])
+        events, marker = feed.page()
+        self.assertEqual(([event[0] for event in events], marker), ([5], None))
+
+    def test_list_indexed(self):
+        """
+        Load balancers are listed in order of ID, by status and by node
+        address, as their statuses and nodes change, and not at all once they
+        are forgotten.
+        """
+        for lb_id in [3, 1, 2]:
+            self.add(lb_id, ("lb_pending_delete", 1))
+        self.add(4, ("lb_building", 5))
+
+        def ids(**kwargs):
+            return [lb["id"] for lb in self.collection.list_load_balancers(
+                **kwargs)[0]["loadBalancers"]]
+
+        self.assertEqual(ids(), [1, 2, 3, 4])
+        self.assertEqual(ids(marker=1, limit=2), [2, 3])
+        self.assertEqual(ids(status="ACTIVE"), [1, 2, 3])
+        self.assertEqual(ids(status="BUILD"), [4])
+
+        self.add_nodes(2, "10.0.0.1")
+        self.add_nodes(3, "10.0.0.1", "10.0.0.2")
+        self.assertEqual(ids(nodeaddress="10.0.0.1"), [2, 3])
+        self.assertEqual(ids(nodeaddress="10.0.0.1", status="PENDING-DELETE"),
+                         [2, 3])
+
+        [node] = [node for node in self.collection.lbs[3].nodes
+                  if node.address == "10.0.0.1"]
+        self.collection.lbs[3].remove_node(node.id)
+        self.assertEqual(ids(nodeaddress="10.0.0.1"), [2])
+        self.assertEqual(ids(nodeaddress="10.0.0.2"), [3])
+
+        self.clock.advance(1)
+        self.clock.advance(3600)
+        self.assertEqual(ids(), [1, 4])
+        self.assertEqual(ids(status="ACTIVE"), [1, 4])
+        self.assertEqual(ids(nodeaddress="10.0.0.1"), [])
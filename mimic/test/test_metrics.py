@@ -0,0 +1,142 @@
+"""
+Tests for :mod:`mimic.metrics`.
+"""
+
+from __future__ import absolute_import, division, unicode_literals
+
+from io import BytesIO
+
+from twisted.internet.task import Clock
+from twisted.trial.unittest import SynchronousTestCase
+
+from mimic.metrics import Histogram, RequestMetrics, prometheus_text
+from mimic.session import SessionStore
+
+
+class FakeRequest(object):
+    """
+    The parts of a request which :obj:`RequestMetrics` looks at.
+    """
+    def __init__(self, body=b"", method=b"GET", mimic_route=None):
+        self.content = BytesIO(body)
+        self.method = method
+        self.mimic_route = mimic_route
+        self.code = 200
+        self.sentLength = 0
+
+
+class CountingApi(object):
+    """
+    An API mock which counts the objects in its data.
+    """
+    def object_counts(self, data):
+        return {"things": len(data)}
+
+
+class HistogramTests(SynchronousTestCase):
+    """
+    Tests for :obj:`Histogram`.
+    """
+
+    def test_observe(self):
+        """
+        Each observation is counted in the first bucket whose bound it does
+        not exceed, or after every bucket if it exceeds them all, and added
+        to the total.
+        """
+        histogram = Histogram.with_buckets((1, 2))
+        for value in [0.5, 1, 1.5, 3]:
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [2, 1, 1])
+        self.assertEqual(histogram.cumulative_counts(), [2, 3, 4])
+        self.assertEqual(histogram.total, 6)
+
+
+class RequestMetricsTests(SynchronousTestCase):
+    """
+    Tests for :obj:`RequestMetrics`.
+    """
+
+    def setUp(self):
+        """
+        Create metrics whose timer only moves when it is told to.
+        """
+        self.now = 0.0
+        self.metrics = RequestMetrics(timer=lambda: self.now)
+
+    def test_request_counted(self):
+        """
+        A request is in flight until it finishes, and is then counted against
+        its route, method and status, with its latency and the size of its
+        request and response bodies.
+        """
+        request = FakeRequest(b"12345", b"POST", ("api.handler", "/a"))
+        started = self.metrics.request_started(request)
+        self.assertEqual((self.metrics.in_flight, self.metrics.bytes_in),
+                         (1, 5))
+        self.assertEqual(request.content.read(), b"12345")
+        self.now += 0.2
+        request.code = 201
+        request.sentLength = 7
+        self.metrics.request_finished(request, started)
+
+        self.assertEqual((self.metrics.in_flight, self.metrics.bytes_out),
+                         (0, 7))
+        [(key, route)] = self.metrics.routes()
+        self.assertEqual(key, ("api.handler", "/a", b"POST"))
+        self.assertEqual(dict(route.statuses), {201: 1})
+        self.assertEqual(route.latency.total, 0.2)
+
+    def test_unmatched(self):
+        """
+        A request which no route handled is counted as ``unmatched``.
+        """
+        request = FakeRequest()
+        request.code = 404
+        self.metrics.request_finished(
+            request, self.metrics.request_started(request))
+        [(key, route)] = self.metrics.routes()
+        self.assertEqual(key, ("unmatched", "", b"GET"))
+
+
+class PrometheusTextTests(SynchronousTestCase):
+    """
+    Tests for :obj:`prometheus_text`.
+    """
+
+    def test_rendered(self):
+        """
+        Every metric is rendered with its labels, including the number of
+        sessions and the objects that API mocks count in them.
+        """
+        now = [0.0]
+        metrics = RequestMetrics(timer=lambda: now[0])
+        request = FakeRequest(mimic_route=("api.handler", '/a/"b"'))
+        started = metrics.request_started(request)
+        now[0] = 0.003
+        metrics.request_finished(request, started)
+
+        sessions = SessionStore(Clock())
+        api = CountingApi()
+        for tenant_id, things in [("1", [1, 2]), ("2", [3])]:
+            sessions.session_for_tenant_id(tenant_id).data_for_api(
+                api, lambda: things)
+        sessions.session_for_tenant_id("3")
+
+        lines = prometheus_text(metrics, sessions).splitlines()
+        route = 'method="GET",route="/a/\\"b\\""'
+        labels = 'handler="api.handler",' + route
+        for line in [
+                'mimic_http_requests_total{code="200",' + labels + '} 1',
+                'mimic_http_request_duration_seconds_bucket{handler="api.handler",'
+                'le="0.0025",' + route + '} 0',
+                'mimic_http_request_duration_seconds_bucket{handler="api.handler",'
+                'le="0.005",' + route + '} 1',
+                'mimic_http_request_duration_seconds_bucket{handler="api.handler",'
+                'le="+Inf",' + route + '} 1',
+                'mimic_http_request_duration_seconds_count{' + labels + '} 1',
+                "mimic_http_requests_in_flight 0",
+                "mimic_sessions 3",
+                'mimic_objects{kind="things"} 3',
+                "# TYPE mimic_http_request_duration_seconds histogram"]:
+            self.assertIn(line, lines)
@@ -4,6 +4,8 @@ Tests for :mod:`nova_api` and :mod:`nova_objects`.
 from __future__ import absolute_import, division, unicode_literals
 
 import json
+from copy import copy
+from io import BytesIO
 
 from six import text_type
 from six.moves.urllib.parse import urlencode, parse_qs
@@ -13,17 +15,21 @@ from testtools.matchers import (
 
 import treq
 
+from twisted.internet.task import Clock
 from twisted.trial.unittest import SynchronousTestCase
+from twisted.web.test.requesthelper import DummyRequest
 
 from mimic.test.helpers import json_request, request, request_with_content, validate_link_json
-from mimic.rest.nova_api import NovaApi, NovaControlApi
+from mimic.rest.nova_api import NovaApi, NovaControlApi, NovaRegion
 from mimic.test.behavior_tests import (
     behavior_tests_helper_class,
     register_behavior)
 from mimic.test.fixtures import APIMockHelper, TenantAuthentication
 from mimic.util.helper import seconds_to_timestamp
+from mimic.model.behaviors import BehaviorRegistryCollection
 from mimic.model.nova_objects import (
-    RegionalServerCollection, Server, IPv4Address)
+    AddressPool, AddressPoolExhaustedError, RegionalServerCollection, Server,
+    ServerTombstone, IPv4Address, IPv6Address)
 import random
 
 
@@ -160,6 +166,17 @@ def use_creation_behavior(helper, name, parameters, criteria):
         name, parameters, criteria)
 
 
+def server_collection(clock, **kwargs):
+    """
+    Make a :obj:`RegionalServerCollection` for tenant ``abc123`` in ``ORD``,
+    whose behaviors and servers both use ``clock``.
+    """
+    return RegionalServerCollection(
+        tenant_id='abc123', region_name='ORD', clock=clock,
+        behavior_registry_collection=BehaviorRegistryCollection(clock=clock),
+        **kwargs)
+
+
 class NovaAPITests(SynchronousTestCase):
 
     """
@@ -1096,6 +1113,69 @@ class NovaAPIChangesSinceTests(SynchronousTestCase):
         mismatch = matcher.match(self.list_servers_detail(1.5))
         self.assertIs(mismatch, None)
 
+    def test_deleted_servers_kept_in_full(self):
+        """
+        Unless a tombstone retention has been set, deleted servers are
+        listed with all their details, forever.
+        """
+        [before] = [s for s in self.list_servers_detail(0.5)
+                    if s["id"] == self.server2]
+        delete_server(self.helper, self.server2)
+        self.clock.advance(86400)
+        [after] = self.list_servers_detail(0.5)
+        for key in ["metadata", "addresses", "flavor", "image"]:
+            self.assertEqual(after[key], before[key])
+        self.assertEqual(after["status"], u"DELETED")
+
+    def set_tombstone_retention(self, retention):
+        """
+        Set the tombstone retention through the control plane, returning the
+        response code.
+        """
+        resp, _ = self.successResultOf(request_with_content(
+            self, self.root, b"POST", self.control_endpoint + "/attributes/",
+            json.dumps({"tombstone_retention": retention}).encode("utf-8")))
+        return resp.code
+
+    def test_tombstone_retention_set_by_control_plane(self):
+        """
+        The control plane can set how long deleted servers are listed for,
+        which must be a non-negative number of seconds, or ``null`` to list
+        them forever.
+        """
+        for retention in [-1, "10", True]:
+            self.assertEqual(self.set_tombstone_retention(retention), 400)
+        self.assertEqual(self.set_tombstone_retention(10), 201)
+        delete_server(self.helper, self.server1)
+        self.assertEqual(self.list_servers(0), [self.server1, self.server2])
+        self.clock.advance(10)
+        self.assertEqual(self.list_servers(0), [self.server2])
+
+        self.assertEqual(self.set_tombstone_retention(None), 201)
+        delete_server(self.helper, self.server2)
+        self.clock.advance(86400)
+        self.assertEqual(self.list_servers(0), [self.server2])
+
+    def test_tombstone_retention_covers_earlier_deletions(self):
+        """
+        Servers deleted before a tombstone retention is set are discarded
+        once it has passed since their deletion, as are those deleted while
+        it was unset again.
+        """
+        delete_server(self.helper, self.server1)
+        self.clock.advance(5)
+        self.assertEqual(self.set_tombstone_retention(10), 201)
+        self.assertEqual(self.list_servers(0), [self.server1, self.server2])
+        self.clock.advance(5)
+        self.assertEqual(self.list_servers(0), [self.server2])
+
+        self.assertEqual(self.set_tombstone_retention(None), 201)
+        delete_server(self.helper, self.server2)
+        self.clock.advance(20)
+        self.assertEqual(self.set_tombstone_retention(10), 201)
+        self.clock.advance(0)
+        self.assertEqual(self.list_servers(0), [])
+
     def test_returns_updated_status_servers(self):
         """
         Returns servers whose status has been updated since given time
@@ -1120,6 +1200,26 @@ class NovaAPIChangesSinceTests(SynchronousTestCase):
         update_metdata(self.helper, self.server1, {"a": "b"})
         self.assertEqual(self.list_servers(1.5), [self.server1])
 
+    def test_changed_servers_listed_in_creation_order(self):
+        """
+        Servers changed since the given time are listed in the order they were
+        created, not the order they were changed in, and can be paginated
+        with a marker.
+        """
+        self.clock.advance(1)
+        update_metdata_item(self.helper, self.server2, "a", "b")
+        self.clock.advance(1)
+        update_metdata_item(self.helper, self.server1, "a", "b")
+        self.assertEqual(self.list_servers(1.5), [self.server1, self.server2])
+
+        params = urlencode({"changes-since": seconds_to_timestamp(1.5),
+                            "marker": self.server1})
+        resp, body = self.successResultOf(json_request(
+            self, self.root, b"GET",
+            '{0}/servers?{1}'.format(self.uri, params)))
+        self.assertEqual(resp.code, 200)
+        self.assertEqual([s['id'] for s in body['servers']], [self.server2])
+
 
 class NovaAPIListServerPaginationTests(SynchronousTestCase):
     """
@@ -1597,6 +1697,7 @@ class NovaAPINegativeTests(SynchronousTestCase):
         """
         nova_api = NovaApi(["ORD", "MIMIC"])
         nova_control_api = NovaControlApi(nova_api=nova_api)
+        self.nova_api = nova_api
         self.helper = APIMockHelper(self, [nova_api, nova_control_api])
         self.nova_control_endpoint = self.helper.auth.get_service_endpoint(
             "cloudServersBehavior",
@@ -1811,6 +1912,55 @@ class NovaAPINegativeTests(SynchronousTestCase):
         self.assertEquals(
             create_server_response_body['computeFault']['code'], 500)
 
+    def test_create_server_delayed_using_behaviors(self):
+        """
+        :func:`create_server` responds only once the delay has passed on
+        Mimic's clock when a ``delay`` behavior is registered, with the
+        response of the behavior it delays.
+        """
+        use_creation_behavior(
+            self.helper,
+            "delay",
+            {"seconds": 5,
+             "behavior": {"name": "fail",
+                          "parameters": {"message": "Slow failure",
+                                         "code": 500}}},
+            [{"server_name": "slow_server"}]
+        )
+        # The in-memory request helpers need a synchronous response, so
+        # call the route directly.
+        tenant_id = self.helper.service_catalog_json[
+            "access"]["token"]["tenant"]["id"]
+        region = NovaRegion(self.nova_api, self.uri, self.helper.core.sessions,
+                            "ORD")
+        http_request = DummyRequest([b''])
+        http_request.content = BytesIO(json.dumps(
+            {"server": {"name": "slow_server", "imageRef": "test-image",
+                        "flavorRef": "test-flavor"}}).encode("utf-8"))
+        d = region.create_server(http_request, tenant_id)
+        self.helper.clock.advance(4)
+        self.assertNoResult(d)
+        self.helper.clock.advance(1)
+        body = json.loads(self.successResultOf(d))
+        self.assertEqual(http_request.responseCode, 500)
+        self.assertEqual(body['computeFault']['message'], "Slow failure")
+
+    def test_invalid_delay_rejected(self):
+        """
+        Registering a ``delay`` behavior whose parameters are of the wrong
+        type, or are not finite, responds with a 400, like any other invalid
+        parameters.
+        """
+        uri = "{0}/behaviors/creation".format(
+            self.helper.auth.get_service_endpoint("cloudServersBehavior"))
+        for parameters in [{"seconds": None}, {"percentiles": [1, 2]},
+                           {"seconds": "nan"}]:
+            response, body = self.successResultOf(request_with_content(
+                self, self.root, b"POST", uri,
+                json.dumps({"name": "delay", "parameters": parameters,
+                            "criteria": []}).encode("utf-8")))
+            self.assertEqual(response.code, 400)
+
     def test_create_server_failure_based_on_metadata(self):
         """
         :func:`create_server` fails with the given error message and response
@@ -2424,6 +2574,121 @@ class NovaAPIMetadataTests(SynchronousTestCase):
             *self.set_metadata_item(metadata, 'key', {"meta": {"key": []}}))
 
 
+class NovaAPIBatchCreationTests(SynchronousTestCase):
+    """
+    Tests for creating several servers at once with ``min_count`` and
+    ``max_count``.
+    """
+
+    def setUp(self):
+        """
+        Create a :obj:`MimicCore` with :obj:`NovaApi` as the only plugin.
+        """
+        self.nova_api = NovaApi(["ORD", "MIMIC"])
+        self.helper = APIMockHelper(self, [self.nova_api])
+
+    def create(self, **server_attributes):
+        """
+        Create servers with the given extra attributes in the request.
+        """
+        server = {"name": "batch", "imageRef": "test-image",
+                  "flavorRef": "test-flavor"}
+        server.update(server_attributes)
+        return create_server(
+            self.helper,
+            body_override=json.dumps({"server": server}).encode("utf-8"))
+
+    def list_names(self):
+        """
+        List the names of the servers.
+        """
+        resp, body = self.successResultOf(json_request(
+            self, self.helper.root, b"GET",
+            '{0}/servers'.format(self.helper.uri)))
+        return [server['name'] for server in body['servers']]
+
+    def test_max_count(self):
+        """
+        ``max_count`` servers are created, each with its index in the batch
+        appended to its name, and the first one is returned.
+        """
+        resp, body = self.create(max_count=3)
+        self.assertEqual(resp.code, 202)
+        self.assertEqual(self.list_names(), ["batch-1", "batch-2", "batch-3"])
+        resp, server = self.successResultOf(json_request(
+            self, self.helper.root, b"GET",
+            '{0}/servers/{1}'.format(self.helper.uri, body['server']['id'])))
+        self.assertEqual(server['server']['name'], "batch-1")
+
+    def test_single_server_keeps_name(self):
+        """
+        A batch of one server keeps the requested name.
+        """
+        self.create(min_count=1, max_count=1)
+        self.assertEqual(self.list_names(), ["batch"])
+
+    def test_return_reservation_id(self):
+        """
+        When ``return_reservation_id`` is true, a reservation ID is returned
+        instead of the server.
+        """
+        resp, body = self.create(max_count=2, return_reservation_id=True)
+        self.assertEqual(resp.code, 202)
+        self.assertEqual(list(body.keys()), ["reservation_id"])
+        self.assertTrue(body["reservation_id"].startswith("r-"))
+        self.assertEqual(len(self.list_names()), 2)
+
+    def test_invalid_counts(self):
+        """
+        Counts which are not integers, less than 1, or where ``min_count`` is
+        greater than ``max_count``, are rejected and no servers are created.
+        """
+        for attributes, message in [
+                ({"min_count": "x"}, "min_count and max_count must be integers"),
+                ({"min_count": 0}, "min_count must be >= 1"),
+                ({"min_count": 3, "max_count": 2},
+                 "min_count must be <= max_count")]:
+            resp, body = self.create(**attributes)
+            self.assertEqual(resp.code, 400)
+            self.assertEqual(body["badRequest"]["message"], message)
+        self.assertEqual(self.list_names(), [])
+
+    def test_count_over_quota(self):
+        """
+        A ``max_count`` greater than the tenant's instance quota is
+        forbidden, and no servers are created.
+        """
+        resp, body = self.create(max_count=100000)
+        self.assertEqual(resp.code, 403)
+        self.assertEqual(
+            body["forbidden"]["message"],
+            "Quota exceeded for instances: Requested 100000, but the quota "
+            "is 200 instances")
+        self.assertEqual(self.list_names(), [])
+
+    def test_min_count_limited_by_addresses(self):
+        """
+        As many servers as there are addresses for are created, as long as
+        that is at least ``min_count``; otherwise none are.
+        """
+        tenant_id = self.helper.service_catalog_json[
+            "access"]["token"]["tenant"]["id"]
+        coll = (self.nova_api._get_session(self.helper.core.sessions, tenant_id)
+                .collection_for_region("ORD"))
+        coll.public_ipv4_pool = AddressPool(
+            name="public IPv4", size=3,
+            address_for_offset=lambda offset: "198.101.241.{0}".format(offset))
+
+        resp, body = self.create(min_count=4, max_count=5)
+        self.assertEqual(resp.code, 500)
+        self.assertEqual(self.list_names(), [])
+        self.assertEqual(len(coll.private_ipv4_pool), 0)
+
+        resp, body = self.create(min_count=2, max_count=5)
+        self.assertEqual(resp.code, 202)
+        self.assertEqual(self.list_names(), ["batch-1", "batch-2", "batch-3"])
+
+
 class NovaServerTests(SynchronousTestCase):
     def test_unique_ips(self):
         """
@@ -2434,9 +2699,7 @@ class NovaServerTests(SynchronousTestCase):
         self.helper = self.helper = APIMockHelper(
             self, [nova_api, NovaControlApi(nova_api=nova_api)]
         )
-        coll = RegionalServerCollection(
-            tenant_id='abc123', region_name='ORD', clock=self.helper.clock,
-            servers=[])
+        coll = server_collection(self.helper.clock)
         creation_json = {
             'server': {'name': 'foo', 'flavorRef': 'bar', 'imageRef': 'baz'}}
 
@@ -2458,3 +2721,359 @@ class NovaServerTests(SynchronousTestCase):
                          [IPv4Address(address='10.180.1.1')])
         self.assertEqual(coll.servers[1].private_ips,
                          [IPv4Address(address='10.180.2.2')])
+
+    def test_server_by_id(self):
+        """
+        :obj:`RegionalServerCollection.server_by_id` finds a server added to
+        the collection by its ID, and stops finding it once it has been
+        deleted.
+        """
+        clock = Clock()
+        coll = server_collection(clock)
+        creation_json = {
+            'server': {'name': 'foo', 'flavorRef': 'bar', 'imageRef': 'baz'}}
+        servers = [Server.from_creation_request_json(coll, creation_json)
+                   for _ in range(3)]
+        for server in servers:
+            self.assertIs(coll.server_by_id(server.server_id), server)
+        self.assertIs(coll.server_by_id('not-a-server'), None)
+
+        coll.request_delete(DummyRequest([b'']), servers[1].server_id)
+        self.assertIs(coll.server_by_id(servers[1].server_id), None)
+        self.assertIs(coll.server_by_id(servers[0].server_id), servers[0])
+        self.assertEqual([server.server_id for server in coll.servers],
+                         [server.server_id for server in servers])
+
+    def test_deleted_server_addresses_are_reused(self):
+        """
+        Deleting a server returns its addresses to the region's pools, so
+        that they can be given to a new server.
+        """
+        coll = server_collection(Clock())
+        creation_json = {
+            'server': {'name': 'foo', 'flavorRef': 'bar', 'imageRef': 'baz'}}
+        first = Server.from_creation_request_json(
+            coll, creation_json, ipsegment=lambda: 7)
+        self.assertEqual(first.private_ips,
+                         [IPv4Address(address='10.180.7.7')])
+        self.assertEqual(first.public_ips, [
+            IPv4Address(address='198.101.241.7'),
+            IPv6Address(address='2001:4800:780e:0510:d87b:9cbc:ff04:513a')])
+
+        coll.request_delete(DummyRequest([b'']), first.server_id)
+        second = Server.from_creation_request_json(
+            coll, creation_json, ipsegment=lambda: 7)
+        self.assertEqual(second.private_ips, first.private_ips)
+        self.assertEqual(second.public_ips[0], first.public_ips[0])
+
+    def test_create_server_when_addresses_exhausted(self):
+        """
+        Creating a server when the region has run out of addresses fails with
+        a compute fault, and does not create a server.
+        """
+        nova_api = NovaApi(["ORD", "MIMIC"])
+        helper = APIMockHelper(self, [nova_api])
+        tenant_id = helper.service_catalog_json["access"]["token"]["tenant"]["id"]
+        coll = (nova_api._get_session(helper.core.sessions, tenant_id)
+                .collection_for_region("ORD"))
+        coll.public_ipv4_pool = AddressPool(
+            name="public IPv4", size=1,
+            address_for_offset=lambda offset: "198.101.241.1")
+        create_server(helper)
+
+        resp, body = create_server(helper, request_func=json_request)
+        self.assertEqual(resp.code, 500)
+        self.assertEqual(body, {"computeFault": {
+            "message": "No more public IPv4 addresses are available",
+            "code": 500}})
+        self.assertEqual(len(coll.servers), 1)
+        self.assertEqual(len(coll.private_ipv4_pool), 1)
+
+    def test_rendered_json_cached_until_changed(self):
+        """
+        A server's encoded JSON is cached for a given ``absolutize_url``, and
+        re-rendered once the server changes or a different
+        ``absolutize_url`` is used.
+        """
+        coll = server_collection(Clock())
+        server = Server.from_creation_request_json(coll, {
+            'server': {'name': 'foo', 'flavorRef': 'bar', 'imageRef': 'baz'}})
+
+        def absolutize_url(path):
+            return "http://mimic/" + path
+
+        detail = server.detail_json_text(absolutize_url)
+        self.assertEqual(json.loads(detail),
+                         server.detail_json(absolutize_url))
+        self.assertIs(server.detail_json_text(absolutize_url), detail)
+        self.assertEqual(json.loads(server.brief_json_text(absolutize_url)),
+                         server.brief_json(absolutize_url))
+
+        other = server.detail_json_text(lambda path: path)
+        self.assertEqual(json.loads(other)["links"][0]["href"],
+                         "v2/abc123/servers/" + server.server_id)
+
+        server.update_status(u"ERROR")
+        self.assertEqual(
+            json.loads(server.detail_json_text(absolutize_url))["status"],
+            u"ERROR")
+        server.set_metadata_item("a", "b")
+        self.assertEqual(
+            json.loads(server.detail_json_text(absolutize_url))["metadata"],
+            {"a": "b"})
+
+    def test_rendered_json_not_compared(self):
+        """
+        Whether a server's JSON has been rendered does not affect whether it
+        is equal to another server.
+        """
+        coll = server_collection(Clock())
+        server = Server.from_creation_request_json(coll, {
+            'server': {'name': 'foo', 'flavorRef': 'bar', 'imageRef': 'baz'}})
+        unrendered = copy(server)
+        server.detail_json_text(lambda path: path)
+        self.assertEqual(server, unrendered)
+
+
+class ServerTombstoneTests(SynchronousTestCase):
+    """
+    Tests for replacing deleted servers with :obj:`ServerTombstone` objects,
+    and for discarding those after the collection's ``tombstone_retention``.
+    """
+
+    def setUp(self):
+        """
+        Create a collection which keeps tombstones for 100 seconds, holding
+        three servers.
+        """
+        self.clock = Clock()
+        self.coll = server_collection(self.clock, tombstone_retention=100)
+        creation_json = {
+            'server': {'name': 'foo', 'flavorRef': 'bar', 'imageRef': 'baz'}}
+        self.ids = [
+            Server.from_creation_request_json(
+                self.coll, creation_json).server_id
+            for _ in range(3)]
+
+    def delete(self, server_id):
+        """
+        Delete a server from the collection.
+        """
+        self.coll.request_delete(DummyRequest([b'']), server_id)
+
+    def list_ids(self, **kwargs):
+        """
+        List the IDs of the servers in the collection.
+        """
+        body = json.loads(self.coll.request_list(
+            DummyRequest([b'']), False, lambda path: path, **kwargs))
+        return [server['id'] for server in body['servers']]
+
+    def test_deleted_server_replaced_by_tombstone(self):
+        """
+        A deleted server is replaced by a :obj:`ServerTombstone` remembering
+        its ID, name, status and update time, which is still reported when
+        listing changes.
+        """
+        self.clock.advance(5)
+        self.delete(self.ids[1])
+        self.assertEqual(self.coll.servers[1], ServerTombstone(
+            tenant_id='abc123', server_id=self.ids[1], server_name='foo',
+            status=u"DELETED", update_time=5))
+        self.assertEqual(self.list_ids(), [self.ids[0], self.ids[2]])
+        self.assertEqual(self.list_ids(changes_since=seconds_to_timestamp(1)),
+                         [self.ids[1]])
+
+    def test_tombstones_discarded_after_retention(self):
+        """
+        Tombstones are discarded once ``tombstone_retention`` seconds have
+        passed since the deletion, after which the server is no longer a
+        valid marker.
+        """
+        self.delete(self.ids[0])
+        self.clock.advance(50)
+        self.delete(self.ids[2])
+        self.clock.advance(50)
+        self.assertEqual([server.server_id for server in self.coll.servers],
+                         self.ids[1:])
+        self.clock.advance(50)
+        self.assertEqual([server.server_id for server in self.coll.servers],
+                         [self.ids[1]])
+        self.assertEqual(self.list_ids(changes_since=seconds_to_timestamp(0)),
+                         [self.ids[1]])
+        self.assertEqual(self.list_ids(marker=self.ids[1]), [])
+        self.assertIn("not found", self.coll.request_list(
+            DummyRequest([b'']), False, lambda path: path,
+            marker=self.ids[2]))
+        self.assertEqual(self.clock.getDelayedCalls(), [])
+
+    def test_late_update_to_deleted_server_ignored(self):
+        """
+        A status change scheduled before a server was deleted does not bring
+        it back.
+        """
+        server = self.coll.server_by_id(self.ids[0])
+        self.clock.callLater(10, server.update_status, u"ACTIVE")
+        self.delete(self.ids[0])
+        self.clock.advance(10)
+        self.assertEqual(self.list_ids(changes_since=seconds_to_timestamp(5)),
+                         [])
+        self.assertEqual(self.list_ids(), self.ids[1:])
+
+
+class LifecycleSchedulerTests(SynchronousTestCase):
+    """
+    Tests for :obj:`LifecycleScheduler`, and the control plane endpoint
+    reporting on it.
+    """
+
+    def setUp(self):
+        """
+        Create a collection with three servers.
+        """
+        self.clock = Clock()
+        self.coll = server_collection(self.clock)
+        self.servers = Server.batch_from_creation_request_json(self.coll, {
+            'server': {'name': 'foo', 'flavorRef': 'bar', 'imageRef': 'baz',
+                       'max_count': 3}})
+
+    def test_transitions_share_one_call(self):
+        """
+        However many transitions are pending, only one call is pending on the
+        clock, and transitions due at the same time are applied together, in
+        the order they were scheduled.
+        """
+        updates = []
+        for server in self.servers:
+            self.patch(server, "update_status",
+                       lambda status, server=server:
+                       updates.append((server.server_name, status)))
+        lifecycle = self.coll.lifecycle
+        lifecycle.schedule(self.servers[0], 10, u"ERROR")
+        lifecycle.schedule(self.servers[1], 5, u"ACTIVE")
+        lifecycle.schedule(self.servers[2], 5, u"ACTIVE")
+        self.assertEqual(len(self.clock.getDelayedCalls()), 1)
+        self.assertEqual(lifecycle.pending_counts(),
+                         {u"ACTIVE": 2, u"ERROR": 1})
+
+        self.clock.advance(5)
+        self.assertEqual(updates, [("foo-2", u"ACTIVE"), ("foo-3", u"ACTIVE")])
+        self.assertEqual(len(self.clock.getDelayedCalls()), 1)
+        self.clock.advance(5)
+        self.assertEqual(updates[2:], [("foo-1", u"ERROR")])
+        self.assertEqual(self.clock.getDelayedCalls(), [])
+        self.assertEqual(lifecycle.pending_counts(), {})
+
+    def test_cancel(self):
+        """
+        Cancelling a server's transitions means they never happen.
+        """
+        lifecycle = self.coll.lifecycle
+        lifecycle.schedule(self.servers[0], 5, u"ERROR")
+        lifecycle.schedule(self.servers[0], 10, u"ERROR")
+        lifecycle.schedule(self.servers[1], 10, u"ERROR")
+        lifecycle.cancel(self.servers[0])
+        self.assertEqual(lifecycle.pending_counts(), {u"ERROR": 1})
+        self.clock.advance(10)
+        self.assertEqual([server.status for server in self.servers],
+                         [u"ACTIVE", u"ERROR", u"ACTIVE"])
+        self.assertEqual(self.clock.getDelayedCalls(), [])
+
+    def test_delete_cancels_transitions(self):
+        """
+        Deleting a server cancels its pending transitions.
+        """
+        self.coll.lifecycle.schedule(self.servers[0], 5, u"ERROR")
+        self.coll.request_delete(DummyRequest([b'']),
+                                 self.servers[0].server_id)
+        self.assertEqual(self.coll.lifecycle.pending_counts(), {})
+
+    def test_control_endpoint(self):
+        """
+        The pending transitions for a tenant's servers in a region are
+        counted by ``GET .../lifecycle`` on the control plane.
+        """
+        nova_api = NovaApi(["ORD", "MIMIC"])
+        helper = APIMockHelper(
+            self, [nova_api, NovaControlApi(nova_api=nova_api)])
+        control_endpoint = helper.auth.get_service_endpoint(
+            "cloudServersBehavior", "ORD")
+        create_server(helper, metadata={"server_building": "30"})
+        create_server(helper, metadata={"server_building": "60"})
+
+        def pending():
+            resp, body = self.successResultOf(json_request(
+                self, helper.root, b"GET", control_endpoint + "/lifecycle"))
+            self.assertEqual(resp.code, 200)
+            return body
+
+        self.assertEqual(pending(), {"pending_transitions": {
+            "total": 2, "by_status": {"ACTIVE": 2}}})
+        helper.clock.advance(30)
+        self.assertEqual(pending(), {"pending_transitions": {
+            "total": 1, "by_status": {"ACTIVE": 1}}})
+
+
+class AddressPoolTests(SynchronousTestCase):
+    """
+    Tests for :obj:`AddressPool`.
+    """
+
+    def pool(self, size=4, first=0):
+        """
+        Create a small pool whose addresses are their offsets as strings.
+        """
+        return AddressPool(name="test", size=size, first=first,
+                           address_for_offset=text_type)
+
+    def test_allocates_in_order(self):
+        """
+        Without any preferred offsets, addresses are handed out in order
+        starting at ``first`` and wrapping around the end of the pool.
+        """
+        pool = self.pool(first=2)
+        self.assertEqual([pool.allocate() for _ in range(4)],
+                         ["2", "3", "0", "1"])
+
+    def test_preferred(self):
+        """
+        The first preferred offset which is in the pool and not in use is
+        allocated; if there is none, allocation falls back to the usual
+        order.
+        """
+        pool = self.pool()
+        self.assertEqual(pool.allocate([2]), "2")
+        self.assertEqual(pool.allocate([2, 9, 3]), "3")
+        self.assertEqual(pool.allocate([2, 3]), "0")
+        self.assertEqual(pool.allocate(), "1")
+
+    def test_exhausted(self):
+        """
+        Once every address is in use, :obj:`AddressPool.allocate` raises
+        :obj:`AddressPoolExhaustedError`, until an address is released.
+        """
+        pool = self.pool(size=2)
+        pool.allocate()
+        pool.allocate()
+        e = self.assertRaises(AddressPoolExhaustedError, pool.allocate)
+        self.assertEqual(e.nova_message,
+                         "No more test addresses are available")
+        pool.release("0")
+        self.assertEqual(pool.allocate(), "0")
+        self.assertRaises(AddressPoolExhaustedError, pool.allocate)
+
+    def test_release_reuses_oldest_first(self):
+        """
+        Released addresses are reused in the order they were released, and
+        releasing an address which is not in use does nothing.
+        """
+        pool = self.pool(size=3)
+        for _ in range(3):
+            pool.allocate()
+        pool.release("2")
+        pool.release("0")
+        pool.release("0")
+        pool.release("7")
+        self.assertEqual(len(pool), 1)
+        self.assertEqual([pool.allocate(), pool.allocate()], ["2", "0"])
+        self.assertRaises(AddressPoolExhaustedError, pool.allocate)
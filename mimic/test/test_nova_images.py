@@ -6,6 +6,9 @@ from __future__ import absolute_import, division, unicode_literals
 
 from twisted.trial.unittest import SynchronousTestCase
 
+from mimic.model.rackspace_image_store import (
+    BASE_IMAGE_CATALOG, RackspaceImageStore)
+from mimic.model.rackspace_images import RackspaceSavedImage
 from mimic.test.helpers import json_request, request
 from mimic.rest.nova_api import NovaApi, NovaControlApi
 from mimic.test.fixtures import APIMockHelper
@@ -210,3 +213,50 @@ class NovaAPIOnMetalImageTests(SynchronousTestCase):
                                                                 'metadata', 'progress', 'created',
                                                                 'updated', 'minDisk',
                                                                 'com.rackspace__1__ui_default_show']))
+
+
+class RackspaceImageStoreTests(SynchronousTestCase):
+    """
+    Tests for :obj:`RackspaceImageStore`.
+    """
+
+    def test_base_images_shared(self):
+        """
+        Every store holds the very same base images, and holds nothing of its
+        own until an image is added to it.
+        """
+        store1 = RackspaceImageStore()
+        store2 = RackspaceImageStore()
+        self.assertIs(store1.base, BASE_IMAGE_CATALOG)
+        self.assertIs(store2.base, BASE_IMAGE_CATALOG)
+        self.assertEqual(store1.image_list, list(BASE_IMAGE_CATALOG.images))
+        self.assertIs(store1.image_list[0], store2.image_list[0])
+        self.assertIs(store1._added, None)
+
+    def test_added_image_only_in_one_store(self):
+        """
+        An image added to one store is listed after the base images and can
+        be looked up by ID in that store, but is not visible in any other.
+        """
+        store1 = RackspaceImageStore()
+        store2 = RackspaceImageStore()
+        image = RackspaceSavedImage(
+            image_id="saved-image", tenant_id="1234", image_size=1,
+            name="saved", minRam=256, minDisk=20, server_id="server",
+            links="", flavor_classes="*", os_type="linux", os_distro="ubuntu",
+            vm_mode="hvm", disk_config="MANUAL")
+        store1.add_image_to_store(image)
+        self.assertEqual(store1.image_list[-1], image)
+        self.assertIs(store1.get_image_by_id("saved-image"), image)
+        self.assertIs(store2.get_image_by_id("saved-image"), None)
+        self.assertEqual(store2.image_list, list(BASE_IMAGE_CATALOG.images))
+
+    def test_base_image_links_use_viewing_tenant(self):
+        """
+        The links of a shared base image are rendered for the tenant viewing
+        it.
+        """
+        image = BASE_IMAGE_CATALOG.images[0]
+        links = image.brief_json(lambda path: "http://mimic/" + path,
+                                 "5678")["links"]
+        self.assertIn("/5678/", links[0]["href"])
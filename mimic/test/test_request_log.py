@@ -0,0 +1,163 @@
+"""
+Tests for :mod:`mimic.request_log`.
+"""
+
+from __future__ import absolute_import, division, unicode_literals
+
+import json
+from functools import partial
+
+from twisted.internet.task import Clock
+from twisted.trial.unittest import SynchronousTestCase
+
+from mimic.core import MimicCore
+from mimic.request_log import Body, Exchange, FileSink, RequestLog
+from mimic.resource import MimicRoot, get_site
+from mimic.test import helpers
+
+
+class RecordingSink(object):
+    """
+    A sink which keeps what it is given.
+    """
+    def __init__(self):
+        self.received = []
+        self.sent = []
+
+    def request_received(self, exchange):
+        self.received.append(exchange)
+
+    def response_sent(self, exchange):
+        self.sent.append(exchange)
+
+
+class BodyTests(SynchronousTestCase):
+    """
+    Tests for :obj:`Body`.
+    """
+
+    def test_limit(self):
+        """
+        Only as many bytes as the limit allows are kept, but the length of
+        the whole body is counted, and noted when it is formatted.
+        """
+        body = Body(5)
+        for data in [b"abc", b"def", b"ghi"]:
+            body.add(data)
+        self.assertEqual(body.chunks, [b"abc", b"de"])
+        self.assertEqual(body.text(), "abcde... [4 more bytes]")
+        self.assertEqual(body.to_json(), {"body": "abcde... [4 more bytes]",
+                                          "length": 9, "truncated": True})
+
+    def test_no_limit(self):
+        """
+        With no limit, everything is kept.
+        """
+        body = Body(None)
+        body.add(b"abc")
+        body.add(b"\xff")
+        self.assertEqual(body.text(), "abc\ufffd")
+
+
+class RequestLogTests(SynchronousTestCase):
+    """
+    Tests for :obj:`RequestLog` as used by
+    :obj:`mimic.resource.MimicLoggingRequest`.
+    """
+
+    def setUp(self):
+        """
+        Create a Mimic with nothing but its own routes.
+        """
+        clock = Clock()
+        self.root = MimicRoot(MimicCore(clock, []), clock).app.resource()
+
+    def log_requests(self, request_log, count=1):
+        """
+        Make ``count`` requests to a site which logs them with
+        ``request_log``.
+        """
+        self.patch(helpers, 'get_site',
+                   partial(get_site, request_log=request_log))
+        for _ in range(count):
+            self.successResultOf(helpers.request(
+                self, self.root, b"POST", "/mimic/v1.1/tick",
+                body=json.dumps({"amount": 1.5}).encode("utf-8")))
+
+    def test_exchange_recorded(self):
+        """
+        The method, URI, headers, code and capped bodies of each request and
+        its response are given to the sink.
+        """
+        sink = RecordingSink()
+        self.log_requests(RequestLog(sink=sink, body_limit=15))
+        [exchange] = sink.sent
+        self.assertEqual(sink.received, [exchange])
+        self.assertEqual((exchange.method, exchange.uri, exchange.code),
+                         (b"POST", b"/mimic/v1.1/tick", 200))
+        self.assertEqual(exchange.request_body.text(), '{"amount": 1.5}')
+        self.assertEqual(exchange.response_body.text()[:12], '{"advanced":')
+        self.assertTrue(exchange.response_body.to_json()["truncated"])
+        self.assertIn((b"Content-Type", [b"application/json"]),
+                      exchange.response_headers)
+        self.assertTrue(exchange.duration >= 0)
+
+    def test_sampling(self):
+        """
+        Only the requests which are sampled are logged.
+        """
+        samples = iter([0.1, 0.3, 0.2, 0.9])
+        sink = RecordingSink()
+        self.log_requests(RequestLog(sink=sink, sample_rate=0.25,
+                                     random=lambda: next(samples)),
+                          count=4)
+        self.assertEqual(len(sink.sent), 2)
+
+    def test_file_sink(self):
+        """
+        :obj:`FileSink` appends each exchange to its file as a line of JSON,
+        and has written them all once it has stopped.
+        """
+        path = self.mktemp()
+        sink = FileSink(path)
+        sink.startService()
+        self.log_requests(RequestLog(sink=sink, body_limit=4), count=3)
+        sink.stopService()
+
+        with open(path, "rb") as f:
+            records = [json.loads(line.decode("utf-8")) for line in f]
+        self.assertEqual(len(records), 3)
+        self.assertEqual(
+            (records[0]["method"], records[0]["uri"], records[0]["code"]),
+            ("POST", "/mimic/v1.1/tick", 200))
+        self.assertEqual(records[0]["request"]["body"],
+                         '{"am... [11 more bytes]')
+        self.assertEqual(records[0]["request"]["length"], 15)
+        self.assertEqual(records[0]["response"]["headers"]["Content-Type"],
+                         ["application/json"])
+
+    def test_file_sink_bad_exchange(self):
+        """
+        :obj:`FileSink` writes a URI which is not UTF-8 with the bad bytes
+        replaced, and logs and skips an exchange which cannot be written at
+        all, carrying on with the ones after it.
+        """
+        def exchange(uri, code=200):
+            return Exchange(method=b"GET", uri=uri, request_headers=[],
+                            request_body=Body(None),
+                            response_body=Body(None), timestamp=0,
+                            code=code, response_headers=[], duration=0)
+
+        path = self.mktemp()
+        sink = FileSink(path)
+        sink.startService()
+        for logged in [exchange(b"/a\xff"), exchange(b"/b", code=object()),
+                       exchange(b"/c")]:
+            sink.response_sent(logged)
+        sink.stopService()
+
+        with open(path, "rb") as f:
+            records = [json.loads(line.decode("utf-8")) for line in f]
+        self.assertEqual([record["uri"] for record in records],
+                         ["/a\ufffd", "/c"])
+        self.assertEqual(len(self.flushLoggedErrors(TypeError)), 1)
@@ -171,6 +171,26 @@ class RootAndPresetTests(SynchronousTestCase):
                          response.headers.getRawHeaders(b'content-type'))
         self.assertEqual(get_presets, json_content)
 
+    def test_presets_not_modified(self):
+        """
+        The presets are served with an ETag, and a client which already has
+        them gets an empty 304 response.
+        """
+        core = MimicCore(Clock(), [])
+        root = MimicRoot(core).app.resource()
+
+        response = self.successResultOf(request(
+            self, root, b'GET', '/mimic/v1.0/presets'))
+        [etag] = response.headers.getRawHeaders(b'etag')
+        response = self.successResultOf(request(
+            self, root, b'GET', '/mimic/v1.0/presets'))
+        self.assertEqual(response.headers.getRawHeaders(b'etag'), [etag])
+
+        response = self.successResultOf(request(
+            self, root, b'GET', '/mimic/v1.0/presets',
+            headers={b'if-none-match': [etag]}))
+        self.assertEqual(304, response.code)
+
     def test_tick(self):
         """
         ``/mimic/v1.1/tick`` (handled by :func:`MimicRoot.advance_time`)
@@ -284,3 +304,31 @@ class RequestTests(SynchronousTestCase):
         self.assertEqual(url, response_match.group('url'))
         headers = json.loads(response_match.group('headers'))
         self.assertEqual(['application/json'], headers.get('Content-Type'))
+
+    def test_metrics(self):
+        """
+        If the site has metrics, each request is counted against the route
+        which handled it, and ``/mimic/v1.1/metrics`` reports them in the
+        Prometheus text format.
+        """
+        core = MimicCore(Clock(), [])
+        root = MimicRoot(core).app.resource()
+        self.patch(helpers, 'get_site', partial(get_site,
+                                                metrics=core.metrics))
+        self.successResultOf(request(self, root, b"GET",
+                                     "/mimic/v1.0/presets"))
+        self.successResultOf(request(self, root, b"GET", "/nothing/here"))
+
+        response, content = self.successResultOf(request_with_content(
+            self, root, b"GET", "/mimic/v1.1/metrics"))
+        self.assertEqual(response.headers.getRawHeaders(b"content-type"),
+                         [b"text/plain; version=0.0.4"])
+        lines = content.decode("utf-8").splitlines()
+        self.assertIn(
+            'mimic_http_requests_total{code="200",'
+            'handler="resource.get_mimic_presets",method="GET",'
+            'route="/mimic/v1.0/presets"} 1', lines)
+        self.assertIn(
+            'mimic_http_requests_total{code="404",handler="unmatched",'
+            'method="GET",route=""} 1', lines)
+        self.assertIn("mimic_http_requests_in_flight 1", lines)
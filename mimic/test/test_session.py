@@ -274,3 +274,138 @@ class SessionCreationTests(SynchronousTestCase):
         session_by_username_password = sessions.session_for_username_password(
             "user1", "pass", "tenant1337")
         self.assertIs(session_by_token, session_by_username_password)
+
+
+class SessionExpiryTests(SynchronousTestCase):
+    """
+    Tests for a :class:`SessionStore` that discards expired sessions.
+    """
+
+    def setUp(self):
+        """
+        Create a :class:`SessionStore` with session expiry enabled.
+        """
+        self.clock = Clock()
+        self.sessions = SessionStore(self.clock, expire_sessions=True)
+
+    def test_sessions_kept_by_default(self):
+        """
+        A :class:`SessionStore` created without ``expire_sessions`` keeps
+        sessions past their expiration time, and schedules nothing.
+        """
+        clock = Clock()
+        sessions = SessionStore(clock)
+        session = sessions.session_for_username_password("user", "pass")
+        self.assertEqual([], clock.getDelayedCalls())
+        clock.advance(86400 * 2)
+        self.assertIs(session, sessions.existing_session_for_token(
+            session.token))
+
+    def test_session_discarded_when_expired(self):
+        """
+        Once the clock passes a session's expiration time, the session can no
+        longer be found by any of its keys, and its API data is released.
+        """
+        session = self.sessions.session_for_username_password(
+            "user", "pass", "tenant")
+        data = session.data_for_api("api", list)
+        data.append("server")
+        self.clock.advance(86399)
+        self.assertEqual(1, len(self.sessions))
+        self.assertIs(session, self.sessions.existing_session_for_token(
+            session.token))
+
+        self.clock.advance(1)
+        self.assertEqual(0, len(self.sessions))
+        self.assertRaises(KeyError, self.sessions.existing_session_for_token,
+                          session.token)
+        self.assertEqual([], self.clock.getDelayedCalls())
+        self.assertEqual({}, session._api_objects)
+        self.assertEqual(["server"], data)
+
+        new_session = self.sessions.session_for_username_password(
+            "user", "pass", "tenant")
+        self.assertIsNot(session, new_session)
+        self.assertEqual([], new_session.data_for_api("api", list))
+
+    def test_only_one_sweep_scheduled(self):
+        """
+        Only a single delayed call is pending no matter how many sessions
+        there are, and each sweep only discards the sessions that expired.
+        """
+        first = self.sessions.session_for_token("first")
+        self.clock.advance(10)
+        second = self.sessions.session_for_token("second")
+        self.assertEqual(1, len(self.clock.getDelayedCalls()))
+
+        self.clock.advance(86390)
+        self.assertRaises(KeyError, self.sessions.existing_session_for_token,
+                          first.token)
+        self.assertIs(second, self.sessions.existing_session_for_token(
+            second.token))
+        self.assertEqual(1, len(self.clock.getDelayedCalls()))
+
+        self.clock.advance(10)
+        self.assertEqual(0, len(self.sessions))
+        self.assertEqual([], self.clock.getDelayedCalls())
+
+    def test_impersonation_changes_expiry(self):
+        """
+        Impersonating a user sets the session's expiration time, and both the
+        user's token and the impersonation token are discarded at that time.
+        """
+        session = self.sessions.session_for_username_password("user", "pass")
+        self.sessions.session_for_impersonation(
+            "user", 100, impersonated_token="impersonated")
+        self.assertIs(session, self.sessions.existing_session_for_token(
+            "impersonated"))
+        self.clock.advance(100)
+        self.assertRaises(KeyError, self.sessions.existing_session_for_token,
+                          session.token)
+        self.assertRaises(KeyError, self.sessions.existing_session_for_token,
+                          "impersonated")
+        self.assertEqual([], self.clock.getDelayedCalls())
+
+    def test_impersonation_extends_expiry(self):
+        """
+        If impersonation pushes a session's expiration time later, the session
+        survives past its original expiration time.
+        """
+        session = self.sessions.session_for_username_password("user", "pass")
+        self.sessions.session_for_impersonation(
+            "user", 86400 * 2, impersonated_token="impersonated")
+        self.clock.advance(86400)
+        self.assertIs(session, self.sessions.existing_session_for_token(
+            session.token))
+        self.clock.advance(86400)
+        self.assertEqual(0, len(self.sessions))
+
+
+class SessionLimitTests(SynchronousTestCase):
+    """
+    Tests for a :class:`SessionStore` with a maximum number of sessions.
+    """
+
+    def test_least_recently_used_discarded(self):
+        """
+        Creating a session beyond ``max_sessions`` discards the least recently
+        used session, and releases its API data.
+        """
+        sessions = SessionStore(Clock(), max_sessions=2)
+        a = sessions.session_for_tenant_id("a")
+        b = sessions.session_for_tenant_id("b")
+        a.data_for_api("api", list)
+        b.data_for_api("api", list)
+
+        self.assertIs(a, sessions.session_for_token(a.token))
+        c = sessions.session_for_tenant_id("c")
+
+        self.assertEqual(2, len(sessions))
+        self.assertIs(a, sessions.existing_session_for_token(a.token))
+        self.assertIs(c, sessions.existing_session_for_token(c.token))
+        self.assertRaises(KeyError, sessions.existing_session_for_token,
+                          b.token)
+        self.assertEqual({}, b._api_objects)
+        self.assertIsNot(b, sessions.session_for_tenant_id("b"))
+        self.assertRaises(KeyError, sessions.existing_session_for_token,
+                          a.token)
@@ -18,12 +18,15 @@ from twisted.internet.defer import succeed
 
 from twisted.plugin import IPlugin
 from twisted.python.filepath import FilePath
+from twisted.python.usage import UsageError
 
 from twisted.trial.unittest import SynchronousTestCase
 from twisted.plugins.mimic import mimicService
 from twisted.application.service import IServiceMaker
 
+from mimic.clock import ScaledClock
 from mimic.core import MimicCore
+from mimic.request_log import FileSink
 from mimic.resource import MimicLoggingRequest, MimicRequest
 from mimic.tap import Options, makeService
 
@@ -135,8 +138,8 @@ class TapTests(SynchronousTestCase):
 
         class CheckClock(MimicCore):
             @classmethod
-            def fromPlugins(cls, clock):
-                result = super(CheckClock, cls).fromPlugins(clock)
+            def fromPlugins(cls, clock, **kwargs):
+                result = super(CheckClock, cls).fromPlugins(clock, **kwargs)
                 CheckClock.clock = clock
                 return result
         from mimic import tap
@@ -163,3 +166,97 @@ class TapTests(SynchronousTestCase):
         self.assertTrue(IPlugin.providedBy(mimicService))
         self.assertTrue(IServiceMaker.providedBy(mimicService))
         self.assertIs(mimicService.makeService, makeService)
+
+    def test_session_options(self):
+        """
+        The C{--expire-sessions} and C{--max-sessions} options configure the
+        core's :class:`SessionStore`.
+        """
+        o = Options()
+        o.parseOptions(["--listen", "tcp:0", "--expire-sessions",
+                        "--max-sessions", "10"])
+
+        class CheckSessions(MimicCore):
+            @classmethod
+            def fromPlugins(cls, clock, **kwargs):
+                result = super(CheckSessions, cls).fromPlugins(clock, **kwargs)
+                CheckSessions.sessions = result.sessions
+                return result
+        from mimic import tap
+        self.patch(tap, "MimicCore", CheckSessions)
+        makeService(o)
+        self.assertTrue(CheckSessions.sessions.expire_sessions)
+        self.assertEqual(10, CheckSessions.sessions.max_sessions)
+
+    def test_max_sessions_validated(self):
+        """
+        C{--max-sessions} must allow at least one session.
+        """
+        for max_sessions in ["0", "-1"]:
+            self.assertRaises(UsageError, Options().parseOptions,
+                              ["--max-sessions", max_sessions])
+        options = Options()
+        options.parseOptions(["--max-sessions", "1"])
+        self.assertEqual(options["max-sessions"], 1)
+
+    def test_time_scale(self):
+        """
+        The C{--time-scale} option makes mimic use a :class:`ScaledClock`
+        driven by the global reactor.
+        """
+        o = Options()
+        o.parseOptions(["--listen", "tcp:0", "--time-scale", "20"])
+
+        class CheckClock(MimicCore):
+            @classmethod
+            def fromPlugins(cls, clock, **kwargs):
+                result = super(CheckClock, cls).fromPlugins(clock, **kwargs)
+                CheckClock.clock = clock
+                return result
+        from mimic import tap
+        self.patch(tap, "MimicCore", CheckClock)
+        makeService(o)
+        from twisted.internet import reactor as real_reactor
+        self.assertIsInstance(CheckClock.clock, ScaledClock)
+        self.assertIdentical(CheckClock.clock._reactor, real_reactor)
+        self.assertEqual(20, CheckClock.clock.scale)
+
+    def test_time_scale_and_realtime_exclusive(self):
+        """
+        C{--time-scale} cannot be combined with C{--realtime}, and must be
+        positive.
+        """
+        self.assertRaises(UsageError, Options().parseOptions,
+                          ["--realtime", "--time-scale", "10"])
+        self.assertRaises(UsageError, Options().parseOptions,
+                          ["--time-scale", "0"])
+
+    def test_log_options(self):
+        """
+        The C{--log-file} option turns on verbose logging to a
+        :class:`FileSink`, which runs as part of the service, and the
+        C{--log-body-limit} and C{--log-sample-rate} options say how much to
+        log.
+        """
+        o = Options()
+        o.parseOptions(["--listen", "tcp:0", "--log-file", self.mktemp(),
+                        "--log-body-limit", "10", "--log-sample-rate", "0.5"])
+        service = makeService(o)
+        [sink] = [child for child in service if isinstance(child, FileSink)]
+        self.assertEqual(sink.parent, service)
+
+        site = self.get_site(["--listen", "fake:", "--verbose",
+                              "--log-body-limit", "10"])
+        self.assertEqual(site.requestFactory, MimicLoggingRequest)
+        self.assertEqual((site.request_log.body_limit,
+                          site.request_log.sample_rate), (10, 1.0))
+
+    def test_log_options_validated(self):
+        """
+        C{--log-body-limit} cannot be negative, and C{--log-sample-rate} must
+        be a fraction more than 0.
+        """
+        for options in [["--log-body-limit", "-1"],
+                        ["--log-sample-rate", "0"],
+                        ["--log-sample-rate", "1.5"]]:
+            self.assertRaises(UsageError, Options().parseOptions, options)
@@ -4,10 +4,20 @@ Unit tests for :mod:`mimic.util`
 
 from __future__ import absolute_import, division, unicode_literals
 
+import gzip
+import json
+from io import BytesIO
+
+from twisted.internet.defer import CancelledError
 from twisted.trial.unittest import SynchronousTestCase
+from twisted.web.server import NOT_DONE_YET, Request
 from twisted.web.resource import Resource
+from twisted.web.test.requesthelper import DummyChannel, DummyRequest
 
+from mimic.rest.mimicapp import MimicApp
 from mimic.util import helper
+from mimic.util.static import StaticBody, StaticBodyRegistry
+from mimic.util.stream import stream
 from mimic.test.helpers import request
 
 
@@ -123,3 +133,203 @@ class TestRandomString(SynchronousTestCase):
             a_string = helper.random_string(1024, selectable=desired_chars)
             for char in a_string:
                 self.assertTrue(char in desired_chars)
+
+
+class StaticBodyTests(SynchronousTestCase):
+    """
+    Tests for :obj:`StaticBody` and :obj:`StaticBodyRegistry`.
+    """
+
+    json_object = {"values": ["value"] * 100}
+
+    def render(self, body, **headers):
+        """
+        Render ``body`` for a request with the given headers.
+
+        :return: the request and the bytes rendered
+        """
+        request = DummyRequest([b""])
+        for name, value in headers.items():
+            request.requestHeaders.setRawHeaders(name.replace("_", "-"),
+                                                 [value])
+        return request, body.render(request)
+
+    def test_render(self):
+        """
+        A :obj:`StaticBody` renders its encoded body, with its content type,
+        content length and ETag.
+        """
+        body = StaticBody.from_json(self.json_object)
+        request, rendered = self.render(body)
+        self.assertEqual(json.loads(rendered.decode("utf-8")),
+                         self.json_object)
+        headers = request.responseHeaders
+        self.assertEqual(headers.getRawHeaders(b"content-type"),
+                         [b"application/json"])
+        self.assertEqual(headers.getRawHeaders(b"content-length"),
+                         [str(len(rendered)).encode("ascii")])
+        self.assertEqual(headers.getRawHeaders(b"etag"), [body.etag])
+        self.assertEqual(headers.getRawHeaders(b"content-encoding"), None)
+
+    def test_not_modified(self):
+        """
+        A request whose ``If-None-Match`` header matches the ETag gets an
+        empty 304 response.
+        """
+        body = StaticBody.from_json(self.json_object)
+        request, rendered = self.render(
+            body, if_none_match=b'"other", ' + body.etag)
+        self.assertEqual(request.responseCode, 304)
+        self.assertEqual(rendered, b"")
+
+    def test_gzip(self):
+        """
+        A client which accepts gzip gets the gzipped body, under its own
+        ETag, while a client which refuses it does not.
+        """
+        body = StaticBody.from_json(self.json_object)
+        request, rendered = self.render(body, accept_encoding=b"deflate, gzip")
+        headers = request.responseHeaders
+        self.assertEqual(headers.getRawHeaders(b"content-encoding"),
+                         [b"gzip"])
+        self.assertEqual(headers.getRawHeaders(b"vary"),
+                         [b"Accept-Encoding"])
+        self.assertNotEqual(headers.getRawHeaders(b"etag"), [body.etag])
+        self.assertEqual(
+            gzip.GzipFile(fileobj=BytesIO(rendered)).read(), body.body)
+
+        request, rendered = self.render(body, accept_encoding=b"gzip;q=0")
+        self.assertEqual(rendered, body.body)
+
+    def test_gzip_only_if_smaller(self):
+        """
+        A body which gzip would not make smaller is never gzipped, nor is a
+        body which is not to be compressed.
+        """
+        request, rendered = self.render(StaticBody.from_json({}),
+                                        accept_encoding=b"gzip")
+        self.assertEqual(rendered, b"{}")
+        request, rendered = self.render(
+            StaticBody.from_json(self.json_object, compress=False),
+            accept_encoding=b"gzip")
+        self.assertEqual(request.responseHeaders.getRawHeaders(b"vary"), None)
+        self.assertEqual(request.responseHeaders.getRawHeaders(
+            b"content-encoding"), None)
+
+    def test_registry_encodes_once(self):
+        """
+        :obj:`StaticBodyRegistry.json_body` only produces and encodes the JSON
+        the first time a key is asked for.
+        """
+        registry = StaticBodyRegistry()
+        calls = []
+
+        def make_json():
+            calls.append(None)
+            return self.json_object
+
+        body = registry.json_body("key", make_json)
+        self.assertIs(registry.json_body("key", make_json), body)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(registry), 1)
+        self.assertIsNot(registry.json_body("other", make_json), body)
+
+
+class PausingRequest(Request):
+    """
+    A ``GET /`` request whose transport asks its producer to pause after each
+    write.
+
+    :ivar streamer: The producer registered, even once it is unregistered.
+    :ivar written: The pieces of the body written.
+    """
+
+    def __init__(self):
+        Request.__init__(self, DummyChannel(), False)
+        self.method = b"GET"
+        self.uri = self.path = b"/"
+        self.prepath = []
+        self.postpath = [b""]
+        self.clientproto = b"HTTP/1.1"
+        self.streamer = None
+        self.written = []
+
+    def registerProducer(self, producer, streaming):
+        self.producer = self.streamer = producer
+
+    def unregisterProducer(self):
+        self.producer = None
+
+    def write(self, data):
+        Request.write(self, data)
+        self.written.append(data)
+        self.streamer.pauseProducing()
+
+
+class StreamTests(SynchronousTestCase):
+    """
+    Tests for :obj:`mimic.util.stream.stream`.
+    """
+
+    def test_stream(self):
+        """
+        Each piece is written as bytes, and the :obj:`Deferred` returned then
+        fires with ``None``, leaving the request to be finished by the caller.
+        """
+        request = DummyRequest([b""])
+        d = stream(request, ["a", b"b", "\u00e9"])
+        self.assertIs(self.successResultOf(d), None)
+        self.assertEqual(request.written, [b"a", b"b", b"\xc3\xa9"])
+        self.assertEqual(request.finished, 0)
+
+    def test_paused(self):
+        """
+        No more pieces are generated while the transport has paused the
+        producer, and none at all once the connection is lost.
+        """
+        generated = []
+
+        def chunks():
+            for chunk in [b"a", b"b", b"c"]:
+                generated.append(chunk)
+                yield chunk
+
+        request = PausingRequest()
+        d = stream(request, chunks())
+        self.assertEqual((request.written, generated), ([b"a"], [b"a"]))
+        request.streamer.resumeProducing()
+        self.assertEqual(request.written, [b"a", b"b"])
+        self.assertNoResult(d)
+        request.connectionLost(Exception("connection lost"))
+        request.streamer.resumeProducing()
+        self.assertEqual(generated, [b"a", b"b"])
+        d.cancel()
+        self.failureResultOf(d, CancelledError)
+
+    def test_klein_route(self):
+        """
+        A Klein route returning :obj:`stream` has its request finished only
+        once every piece has been written, however often the transport
+        pauses, and has it left alone if the connection is lost first.
+        """
+        app = MimicApp()
+
+        @app.route("/")
+        def route(request):
+            return stream(request, ["a", "b"])
+
+        request = PausingRequest()
+        self.assertIs(app.resource().render(request), NOT_DONE_YET)
+        self.assertEqual((request.written, request.finished), ([b"a"], 0))
+        request.streamer.resumeProducing()
+        self.assertEqual((request.written, request.finished),
+                         ([b"a", b"b"], 0))
+        request.streamer.resumeProducing()
+        self.assertEqual((request.written, request.finished),
+                         ([b"a", b"b"], 1))
+
+        request = PausingRequest()
+        app.resource().render(request)
+        request.connectionLost(Exception("connection lost"))
+        request.streamer.resumeProducing()
+        self.assertEqual((request.written, request.finished), ([b"a"], 0))
@@ -12,7 +12,7 @@ import binascii
 import os
 import string
 import calendar
-from datetime import datetime, timedelta
+from datetime import datetime
 import json
 from random import choice, randint
 
@@ -161,33 +161,6 @@ def invalid_resource(message, response_code=400):
     return {"message": message, "code": response_code}
 
 
-def set_resource_status(updated_time, time_delta, status='ACTIVE',
-                        current_timestamp=None):
-    """
-    Given the updated_time and time delta, if the updated_time + time_delta is
-    greater than the current time in UTC, returns the given status; otherwise
-    return None.
-
-    :param str updated_time: The time that the server was last updated by a
-        client.
-    :param int time_delta: The delta, in seconds, from ``updated_time``.
-    :param str status: The status to return if the time_delta has expired (i.e.
-        the wall clock has advanced more than ``time_delta`` past
-        ``updated_time``).
-    :param float current_timestamp: The current time, in seconds from the POSIX
-        epoch.
-
-    :return: ``status`` or ``None``.
-    """
-    current_datetime = datetime.utcfromtimestamp(current_timestamp)
-    last_updated_datetime = datetime.strptime(updated_time, fmt)
-    expiration_interval = timedelta(seconds=int(time_delta))
-    expiration_datetime = last_updated_datetime + expiration_interval
-
-    if current_datetime >= expiration_datetime:
-        return status
-
-
 class Matcher(object):
     """
     Class for implementing custom matching.
@@ -0,0 +1,184 @@
+# -*- test-case-name: mimic.test.test_util -*-
+"""
+Response bodies which never change, encoded once and served many times.
+
+Canned responses such as the MaaS monitoring zones or the Glance image list
+are the same for every request, so there is no need to serialize them again
+for each one.  A :obj:`StaticBody` holds the encoded bytes of such a response,
+its ETag and, once a client has asked for it, a gzipped copy.
+:obj:`STATIC_BODIES` builds each one the first time it is needed.
+"""
+
+from __future__ import absolute_import, division, unicode_literals
+
+import gzip
+import json
+from hashlib import sha1
+from io import BytesIO
+
+import attr
+
+from twisted.web.http import NOT_MODIFIED
+
+
+def _gzip(data):
+    """
+    Compress ``data`` with gzip.  The modification time in the header is
+    fixed, so that the same data always compresses to the same bytes.
+    """
+    buffer = BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode="wb", mtime=0) as compressor:
+        compressor.write(data)
+    return buffer.getvalue()
+
+
+def _accepts_gzip(request):
+    """
+    Whether the client which made ``request`` accepts gzipped responses.
+    """
+    header = request.getHeader(b"accept-encoding")
+    if header is None:
+        return False
+    for coding in header.split(b","):
+        params = [param.strip() for param in coding.split(b";")]
+        if params[0].lower() != b"gzip":
+            continue
+        for param in params[1:]:
+            name, _, value = param.partition(b"=")
+            if name.strip().lower() == b"q":
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+def _etag_matches(header, etag):
+    """
+    Whether the value of an ``If-None-Match`` header matches ``etag``.
+    """
+    if header is None:
+        return False
+    for candidate in header.split(b","):
+        candidate = candidate.strip()
+        if candidate.startswith(b"W/"):
+            candidate = candidate[2:]
+        if candidate in (b"*", etag):
+            return True
+    return False
+
+
+@attr.s
+class StaticBody(object):
+    """
+    An immutable response body.
+
+    :ivar bytes body: The encoded body.
+    :ivar bytes etag: The (quoted) entity tag of ``body``.
+    :ivar bytes content_type: The value of the ``Content-Type`` header.
+    :ivar bool compress: Whether to serve a gzipped copy of ``body`` to
+        clients which accept one.  The copy is only made the first time a
+        client asks for it, and is only served if it is smaller than
+        ``body``.
+    """
+    body = attr.ib()
+    etag = attr.ib()
+    content_type = attr.ib(default=b"application/json")
+    compress = attr.ib(default=True)
+    _gzipped = attr.ib(default=None, repr=False)
+
+    @classmethod
+    def from_bytes(cls, body, content_type=b"application/json",
+                   compress=True):
+        """
+        Create a :obj:`StaticBody` serving ``body`` as it is.
+        """
+        return cls(body=body,
+                   etag=b'"' + sha1(body).hexdigest().encode("ascii") + b'"',
+                   content_type=content_type, compress=compress)
+
+    @classmethod
+    def from_json(cls, json_object, compress=True):
+        """
+        Create a :obj:`StaticBody` serving ``json_object`` serialized as JSON.
+        """
+        return cls.from_bytes(json.dumps(json_object).encode("utf-8"),
+                              compress=compress)
+
+    def _gzipped_body(self):
+        """
+        The gzipped copy of the body, or ``None`` if gzipping does not make it
+        any smaller.
+        """
+        if self._gzipped is None:
+            gzipped = _gzip(self.body)
+            self._gzipped = gzipped if len(gzipped) < len(self.body) else b""
+        return self._gzipped or None
+
+    def render(self, request):
+        """
+        Set the response headers of ``request`` for this body, and return the
+        bytes to write: the body itself, its gzipped copy if the client
+        accepts one, or nothing if the client's ``If-None-Match`` header says
+        it already has this body.
+        """
+        body = self.body
+        etag = self.etag
+        if self.compress:
+            request.setHeader(b"vary", b"Accept-Encoding")
+            gzipped = self._gzipped_body() if _accepts_gzip(request) else None
+            if gzipped is not None:
+                body = gzipped
+                etag = etag[:-1] + b'-gzip"'
+                request.setHeader(b"content-encoding", b"gzip")
+        request.setHeader(b"content-type", self.content_type)
+        request.setHeader(b"etag", etag)
+        if _etag_matches(request.getHeader(b"if-none-match"), etag):
+            request.setResponseCode(NOT_MODIFIED)
+            return b""
+        request.setHeader(b"content-length",
+                          str(len(body)).encode("ascii"))
+        return body
+
+
+@attr.s
+class StaticBodyRegistry(object):
+    """
+    A registry of :obj:`StaticBody` objects, each created the first time it
+    is asked for.
+    """
+    _bodies = attr.ib(default=attr.Factory(dict), repr=False)
+
+    def json_body(self, key, make_json, compress=True):
+        """
+        Get the :obj:`StaticBody` registered under ``key``, first registering
+        the JSON serialization of ``make_json()`` if there is none yet.
+
+        :param key: A hashable key identifying the body.  If the body depends
+            on anything, such as the URL it was requested from, the key must
+            include it.
+        :param make_json: A callable with no arguments returning the JSON
+            object to serialize.  The object must never change.
+        """
+        static = self._bodies.get(key)
+        if static is None:
+            static = self._bodies[key] = StaticBody.from_json(
+                make_json(), compress=compress)
+        return static
+
+    def render_json(self, request, key, make_json, compress=True):
+        """
+        Render the :obj:`StaticBody` which :obj:`json_body` returns for
+        ``key`` and ``make_json`` as the response to ``request``.
+        """
+        return self.json_body(key, make_json, compress).render(request)
+
+    def __len__(self):
+        """
+        The number of bodies registered.
+        """
+        return len(self._bodies)
+
+
+STATIC_BODIES = StaticBodyRegistry()
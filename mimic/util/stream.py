@@ -0,0 +1,105 @@
+# -*- test-case-name: mimic.test.test_util -*-
+"""
+Response bodies which are written a piece at a time.
+
+Some responses, such as the Atom feed of a CLB node, are made of many small
+pieces.  Rather than joining them all into one string before writing any of
+it, :obj:`stream` writes each piece as it is generated, and stops generating
+them while the transport's buffer is full.  The route returns a
+:obj:`Deferred` which fires once the last piece has been written, and Klein
+finishes the request then.
+"""
+
+from __future__ import absolute_import, division, unicode_literals
+
+import attr
+
+from six import text_type
+
+from zope.interface import implementer
+
+from twisted.internet.defer import Deferred
+from twisted.internet.interfaces import IPushProducer
+
+
+@implementer(IPushProducer)
+@attr.s
+class ChunkProducer(object):
+    """
+    Write the pieces of a response body to a request until they run out,
+    pausing whenever the transport asks.
+
+    The request is left for whoever started the producer to finish.
+
+    :ivar request: The request to write to.
+    :ivar chunks: An iterator of the pieces of the body, as text or bytes.
+    """
+    request = attr.ib()
+    chunks = attr.ib()
+    _paused = attr.ib(default=False, repr=False)
+    _done = attr.ib(default=False, repr=False)
+    _written = attr.ib(default=None, repr=False)
+
+    def start(self):
+        """
+        Register with the request and start writing.
+
+        :return: A :obj:`Deferred` which fires with ``None`` once the last
+            piece has been written.  Cancelling it stops the writing, as
+            Klein does when the connection is lost.
+        """
+        self._written = Deferred(lambda _: self.stopProducing())
+        self.request.notifyFinish().addErrback(lambda _: self.stopProducing())
+        self.request.registerProducer(self, True)
+        self._produce()
+        return self._written
+
+    def _produce(self):
+        """
+        Write pieces until paused or done, firing :obj:`start`'s
+        :obj:`Deferred` once they have all been written.
+        """
+        while not self._paused and not self._done:
+            try:
+                chunk = next(self.chunks)
+            except StopIteration:
+                self._done = True
+                self.request.unregisterProducer()
+                self._written.callback(None)
+                return
+            if isinstance(chunk, text_type):
+                chunk = chunk.encode("utf-8")
+            self.request.write(chunk)
+
+    def pauseProducing(self):
+        """
+        Stop writing until :obj:`resumeProducing` is called.
+        """
+        self._paused = True
+
+    def resumeProducing(self):
+        """
+        Carry on writing.
+        """
+        self._paused = False
+        self._produce()
+
+    def stopProducing(self):
+        """
+        Stop writing for good, because the connection was lost.
+        """
+        self._done = True
+
+
+def stream(request, chunks):
+    """
+    Write the pieces of a response body to ``request`` as they are generated.
+    For use as the return value of a Klein route, which finishes the request
+    once they have all been written.
+
+    :param chunks: An iterable of the pieces of the body, as text or bytes.
+
+    :return: A :obj:`Deferred` which fires with ``None`` once the last piece
+        has been written.
+    """
+    return ChunkProducer(request, iter(chunks)).start()
@@ -36,7 +36,7 @@ def setup_options(name, version):
             "iso8601>=0.1.10",
         ],
         package_dir={"mimic": "mimic"},
-        packages=find_packages(exclude=[]) + ["twisted.plugins"],
+        packages=find_packages(exclude=["benchmarks", "benchmarks.*"]) + ["twisted.plugins"],
     )
     if not py2app_available:
         return info